@@ -0,0 +1,273 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+import generate_registry
+from callouts.bounds import normalize_to_origin
+from callouts.cache import write_if_changed
+from callouts.corpus import DEFAULTS, generate_corpus
+from callouts.extract import CHUNK_SIZE, extract_svg
+from callouts.parallel import default_jobs
+from callouts.pathdata import PathSyntaxError, optimize_segments, parse_path, quantize, serialize, transform_segments
+
+# Configuration
+BENCHMARK_DIR = ".cache/callouts/benchmark"
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, "baseline.json")
+RESULTS_VERSION = 1
+
+# The ingester's stages, in pipeline order
+STAGES = ("read", "extract", "parse", "transform", "serialize", "write")
+# A stage counts as regressed when it is this much slower (or bigger) than the baseline
+DEFAULT_THRESHOLD = 0.10
+# Differences below these are noise, whatever the ratio
+MIN_SECONDS = 0.005
+MIN_PEAK_BYTES = 64 * 1024
+
+
+def run_stages(filepaths, work_dir, simplify, extract_images, trace=False):
+    """
+    Runs every source through the ingester one stage at a time and returns
+    {stage: {'seconds', 'peak_bytes'}}. Seconds are summed over the files;
+    with `trace`, 'peak_bytes' is the largest tracemalloc peak a single call
+    of the stage reached above what was allocated before it (None otherwise).
+    """
+    totals = {stage: {'seconds': 0.0, 'peak_bytes': 0 if trace else None} for stage in STAGES}
+    image_dir = os.path.join(work_dir, "images") if extract_images else None
+
+    def timed(stage, func, *args):
+        if trace:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        value = func(*args)
+        totals[stage]['seconds'] += time.perf_counter() - start
+        if trace:
+            peak = tracemalloc.get_traced_memory()[1] - before
+            totals[stage]['peak_bytes'] = max(totals[stage]['peak_bytes'], peak)
+        return value
+
+    def read(filepath):
+        with open(filepath, 'rb') as f:
+            while f.read(CHUNK_SIZE):
+                pass
+
+    def transform(parsed, matrices):
+        segments = []
+        for path, matrix in zip(parsed, matrices):
+            segments.extend(transform_segments(path, matrix))
+        return normalize_to_origin(segments)
+
+    def optimize(segments):
+        if simplify is None:
+            return serialize(quantize(segments, generate_registry.RAW_PRECISION), generate_registry.RAW_PRECISION)
+        return optimize_segments(segments, simplify['tolerance'], simplify['precision'])[0]
+
+    paths = []
+    for filepath in filepaths:
+        timed('read', read, filepath)
+        try:
+            svg = timed('extract', extract_svg, filepath, image_dir is None, CHUNK_SIZE, image_dir)
+        except ET.ParseError:
+            continue
+        if svg is None or not svg['paths'] or (svg['has_image'] and image_dir is None):
+            continue
+        try:
+            parsed = timed('parse', lambda: [parse_path(d) for d in svg['paths']])
+        except PathSyntaxError:
+            continue
+        geometry = timed('transform', transform, parsed, svg['transforms'])
+        if geometry is not None:
+            paths.append(timed('serialize', optimize, geometry[0]))
+
+    # One registry-sized module holding every path, like the literal output
+    content = timed('serialize', lambda: "".join(f"    path: \"{p}\",\n" for p in paths))
+    timed('write', write_if_changed, os.path.join(work_dir, "registry.ts"), content)
+    return totals
+
+
+def run_end_to_end(corpus_dir, work_dir, simplify, extract_images, jobs):
+    """Seconds taken by a cold generate_registry.process_files() run over the corpus."""
+    start = time.perf_counter()
+    # Extracted images go to the scratch directory, not the app's assets
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        generate_registry.process_files(jobs=jobs, use_cache=False, simplify=simplify, source_dir=corpus_dir,
+                                        output_file=os.path.join(work_dir, "CalloutRegistry.ts"),
+                                        image_dir=os.path.join(work_dir, "images"), extract_images=extract_images)
+    return time.perf_counter() - start
+
+
+def run_benchmark(corpus_dir, corpus, simplify, extract_images, repeat, jobs, memory):
+    filepaths = [os.path.join(corpus_dir, name) for name in corpus['filenames']]
+    stages = {stage: {'seconds': None, 'peak_bytes': None} for stage in STAGES}
+    end_to_end = None
+    with tempfile.TemporaryDirectory(prefix="callout-bench-") as work_dir:
+        # Best of `repeat` runs: the least disturbed by everything else on the machine
+        for run in range(repeat):
+            totals = run_stages(filepaths, work_dir, simplify, extract_images)
+            for stage, total in totals.items():
+                best = stages[stage]['seconds']
+                stages[stage]['seconds'] = total['seconds'] if best is None else min(best, total['seconds'])
+            seconds = run_end_to_end(corpus_dir, work_dir, simplify, extract_images, jobs)
+            end_to_end = seconds if end_to_end is None else min(end_to_end, seconds)
+            print(f"Run {run + 1}/{repeat}: {sum(t['seconds'] for t in totals.values()):.3f} s in stages,"
+                  f" {seconds:.3f} s end to end")
+
+        # tracemalloc slows allocation-heavy code several times over, so
+        # memory gets its own pass instead of skewing the timings
+        if memory:
+            tracemalloc.start()
+            try:
+                for stage, total in run_stages(filepaths, work_dir, simplify, extract_images, trace=True).items():
+                    stages[stage]['peak_bytes'] = total['peak_bytes']
+            finally:
+                tracemalloc.stop()
+
+    for stage in stages.values():
+        stage['mb_per_s'] = round(corpus['bytes'] / 1e6 / max(stage['seconds'], 1e-9), 2)
+    return {
+        'version': RESULTS_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'cpus': os.cpu_count()},
+        'corpus': {key: value for key, value in corpus.items() if key != 'filenames'},
+        'settings': {'simplify': simplify, 'extract_images': extract_images, 'jobs': jobs},
+        'repeat': repeat,
+        'stages': stages,
+        'end_to_end': {'seconds': end_to_end, 'mb_per_s': round(corpus['bytes'] / 1e6 / max(end_to_end, 1e-9), 2)},
+    }
+
+
+def format_rate(values):
+    """The MB/s column: '-' for stages too quick to time meaningfully."""
+    if values['seconds'] is None or values['seconds'] < MIN_SECONDS:
+        return '-'
+    return f"{values['mb_per_s']:.1f}"
+
+
+def print_results(results):
+    corpus = results['corpus']
+    print(f"Corpus: {corpus['files']} files, {corpus['bytes'] / 1e6:.1f} MB"
+          f" ({corpus['segments']} segments x {corpus['paths']} paths, depth {corpus['depth']},"
+          f" images {corpus['image_bytes']} bytes)")
+    print(f"  {'stage':<11}{'seconds':>10}{'MB/s':>10}{'peak KB':>11}")
+    for stage, values in results['stages'].items():
+        peak = '-' if values['peak_bytes'] is None else f"{values['peak_bytes'] / 1024:.0f}"
+        print(f"  {stage:<11}{values['seconds']:>10.3f}{format_rate(values):>10}{peak:>11}")
+    total = results['end_to_end']
+    print(f"  {'end to end':<11}{total['seconds']:>10.3f}{format_rate(total):>10}")
+
+
+def compare_results(results, baseline, threshold):
+    """Prints how `results` differ from `baseline`; returns the list of regressions."""
+    if baseline.get('corpus') != results['corpus'] or baseline.get('settings') != results['settings']:
+        print("Warning: the baseline was measured on a different corpus or with different settings")
+    regressions = []
+
+    def check(name, metric, current, previous, floor):
+        if current is None or previous is None:
+            return
+        ratio = current / previous if previous else float('inf')
+        flag = ""
+        if ratio > 1 + threshold and current - previous > floor:
+            regressions.append(f"{name} {metric}")
+            flag = "  REGRESSION"
+        elif ratio < 1 - threshold and previous - current > floor:
+            flag = "  improved"
+        if metric == 'seconds':
+            change = f"{previous:.3f} s -> {current:.3f} s"
+        else:
+            change = f"{previous / 1024:.0f} KB -> {current / 1024:.0f} KB"
+        print(f"  {name:<11}{metric:<12}{change:<26}{ratio:>6.2f}x{flag}")
+
+    print(f"Compared with the baseline of {baseline.get('created', 'unknown date')}"
+          f" (threshold {threshold:.0%}):")
+    for stage, values in results['stages'].items():
+        old = baseline.get('stages', {}).get(stage, {})
+        check(stage, 'seconds', values['seconds'], old.get('seconds'), MIN_SECONDS)
+        check(stage, 'peak_bytes', values['peak_bytes'], old.get('peak_bytes'), MIN_PEAK_BYTES)
+    check('end to end', 'seconds', results['end_to_end']['seconds'],
+          baseline.get('end_to_end', {}).get('seconds'), MIN_SECONDS)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the callout registry pipeline on a deterministic synthetic corpus.")
+    parser.add_argument("--corpus-dir", default=None,
+                        help=f"Where the corpus is generated (default: under {BENCHMARK_DIR}, one per option set)")
+    parser.add_argument("--files", type=int, default=DEFAULTS['files'],
+                        help="Number of source files (default: %(default)s)")
+    parser.add_argument("--segments", type=int, default=DEFAULTS['segments'],
+                        help="Path segments per path (default: %(default)s)")
+    parser.add_argument("--paths", type=int, default=DEFAULTS['paths'],
+                        help="Paths per file (default: %(default)s)")
+    parser.add_argument("--depth", type=int, default=DEFAULTS['depth'],
+                        help="Groups nested around each path (default: %(default)s)")
+    parser.add_argument("--no-transforms", action="store_true",
+                        help="Leave the nested groups without transform attributes")
+    parser.add_argument("--image-bytes", type=int, default=DEFAULTS['image_bytes'],
+                        help="Size of an embedded base64 raster per file, 0 for none (default: %(default)s);"
+                             " implies --extract-images, since sources with rasters are skipped otherwise")
+    parser.add_argument("--seed", type=int, default=DEFAULTS['seed'],
+                        help="Corpus seed (default: %(default)s)")
+    parser.add_argument("--raw-paths", action="store_true",
+                        help="Benchmark without path simplification, like generate_registry.py --raw-paths")
+    parser.add_argument("--extract-images", action="store_true",
+                        help="Decode embedded rasters, like generate_registry.py --extract-images")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Timed runs; the fastest counts (default: %(default)s)")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help=f"Worker processes for the end-to-end run (0 = one per CPU, {default_jobs()} here)")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Skip the tracemalloc pass that measures peak memory per stage")
+    parser.add_argument("--baseline", default=BASELINE_FILE,
+                        help="Baseline results file (default: %(default)s)")
+    parser.add_argument("--compare", action="store_true",
+                        help="Compare with --baseline instead of overwriting it; exits with status 1"
+                             " on regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown (or memory growth) counted as a regression"
+                             " (default: %(default)s)")
+    args = parser.parse_args()
+
+    options = {'files': args.files, 'segments': args.segments, 'paths': args.paths, 'depth': args.depth,
+               'transforms': not args.no_transforms, 'image_bytes': args.image_bytes, 'seed': args.seed}
+    corpus_dir = args.corpus_dir or os.path.join(
+        BENCHMARK_DIR, "corpus-" + "-".join(f"{key}{int(value)}" for key, value in options.items()))
+    start = time.perf_counter()
+    corpus = generate_corpus(corpus_dir, **options)
+    print(f"Corpus ready in {corpus_dir} ({time.perf_counter() - start:.1f} s)")
+
+    # Without extraction every source with a raster is skipped, leaving nothing to time
+    extract_images = args.extract_images or args.image_bytes > 0
+    if extract_images and not args.extract_images:
+        print("--image-bytes implies --extract-images")
+
+    simplify = None if args.raw_paths else {'tolerance': generate_registry.DEFAULT_TOLERANCE,
+                                            'precision': generate_registry.DEFAULT_PRECISION}
+    results = run_benchmark(corpus_dir, corpus, simplify, extract_images, max(args.repeat, 1),
+                            args.jobs or default_jobs(), not args.no_memory)
+    print_results(results)
+
+    if args.compare:
+        try:
+            with open(args.baseline, 'r') as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            sys.exit(f"No baseline at {args.baseline}; run without --compare first")
+        regressions = compare_results(results, baseline, args.threshold)
+        latest = os.path.join(os.path.dirname(args.baseline) or '.', "latest.json")
+        write_if_changed(latest, json.dumps(results, indent=1) + "\n")
+        if regressions:
+            sys.exit(f"Regressions beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        print("No regressions")
+    else:
+        write_if_changed(args.baseline, json.dumps(results, indent=1) + "\n")
+        print(f"Baseline written to {args.baseline}")
@@ -0,0 +1,194 @@
+import argparse
+import base64
+import functools
+import io
+import json
+import math
+import os
+import re
+
+from PIL import Image, ImageOps
+
+from callouts.cache import BuildCache, file_digest, generator_version, write_if_changed
+from callouts.parallel import default_jobs, run_per_file
+
+# Configuration
+SOURCE_DIR = "public/assets/images"
+SOURCE_URL = "/assets/images"
+OUTPUT_DIR = "public/assets/images/responsive"
+OUTPUT_URL = "/assets/images/responsive"
+MANIFEST_FILE = "src/data/ImageManifest.json"
+
+SOURCE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp', '.jp2'}
+
+# Derivative widths in pixels. Images are never upscaled: narrower sources
+# get the widths below their own plus one at their intrinsic width.
+WIDTHS = (320, 640, 1280, 1920)
+WEBP_QUALITY = 78
+JPEG_QUALITY = 82
+# The JPEG fallback has no alpha; transparent areas are flattened onto the
+# app's dark background.
+JPEG_BACKGROUND = (0, 0, 0)
+
+ORIENTATION_TAG = 0x0112
+
+# Blur placeholder: longest side in pixels, inlined as a data URI
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 40
+
+# Cached entries are only reused while the code that produced them is unchanged
+GENERATOR_VERSION = generator_version(__file__)
+
+
+def slugify(name):
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-') or 'image'
+
+
+def target_widths(width):
+    widths = [w for w in WIDTHS if w < width]
+    if width <= WIDTHS[-1]:
+        widths.append(width)
+    return widths
+
+
+def encode_placeholder(image):
+    thumb = image.copy()
+    thumb.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE), Image.Resampling.BILINEAR)
+    buffer = io.BytesIO()
+    thumb.save(buffer, 'WEBP', quality=PLACEHOLDER_QUALITY)
+    return "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def to_rgb(image):
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, JPEG_BACKGROUND)
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def process_image(filepath, output_dir):
+    """
+    Writes the WebP and JPEG derivatives of one source image into
+    `output_dir` and returns its manifest entry: intrinsic 'width' and
+    'height', a 'placeholder' data URI, and the derivative 'widths' from
+    narrowest to widest, each available as `{base}-{width}.webp` and
+    `{base}-{width}.jpg`. The base name carries a prefix of the source
+    hash, so a changed image never reuses a stale URL.
+    """
+    filename = os.path.basename(filepath)
+    stem = f"{slugify(os.path.splitext(filename)[0])}-{file_digest(filepath)[:10]}"
+
+    with Image.open(filepath) as source:
+        raw_width, raw_height = source.size
+        # EXIF orientations 5-8 turn the picture by a quarter
+        rotated = source.getexif().get(ORIENTATION_TAG, 1) in (5, 6, 7, 8)
+        width, height = (raw_height, raw_width) if rotated else (raw_width, raw_height)
+        # JPEG can decode straight at 1/2, 1/4 or 1/8 scale; ask for the
+        # smallest that still covers the widest derivative.
+        scale = min(1.0, WIDTHS[-1] / width)
+        source.draft('RGB', (math.ceil(raw_width * scale), math.ceil(raw_height * scale)))
+        image = ImageOps.exif_transpose(source)
+    transparent = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+    image = image.convert('RGBA' if transparent else 'RGB')
+
+    entry = {
+        'width': width, 'height': height,
+        'base': f"{OUTPUT_URL}/{stem}",
+        'placeholder': encode_placeholder(image),
+        'widths': target_widths(width),
+    }
+
+    # Scale down from widest to narrowest, each step starting from the
+    # previous result instead of the full-size original.
+    current = image
+    for target in reversed(entry['widths']):
+        size = (target, max(1, round(height * target / width)))
+        if current.size != size:
+            current = current.resize(size, Image.Resampling.LANCZOS)
+        webp = io.BytesIO()
+        current.save(webp, 'WEBP', quality=WEBP_QUALITY, method=4)
+        write_if_changed(os.path.join(output_dir, f"{stem}-{target}.webp"), webp.getvalue())
+        jpeg = io.BytesIO()
+        to_rgb(current).save(jpeg, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+        write_if_changed(os.path.join(output_dir, f"{stem}-{target}.jpg"), jpeg.getvalue())
+    return entry
+
+
+def derivative_files(entry):
+    stem = os.path.basename(entry['base'])
+    return [f"{stem}-{w}.{ext}" for w in entry['widths'] for ext in ('webp', 'jpg')]
+
+
+def outputs_present(entry):
+    """False if a cached entry points at derivatives that were deleted."""
+    return entry is not None and all(os.path.exists(os.path.join(OUTPUT_DIR, name))
+                                     for name in derivative_files(entry))
+
+
+def build_assets(jobs=1, use_cache=True):
+    if not os.path.exists(SOURCE_DIR):
+        print(f"Directory not found: {SOURCE_DIR}")
+        return
+
+    files = sorted(f for f in os.listdir(SOURCE_DIR)
+                   if os.path.splitext(f)[1].lower() in SOURCE_EXTENSIONS
+                   and os.path.isfile(os.path.join(SOURCE_DIR, f)))
+    filepaths = [os.path.join(SOURCE_DIR, f) for f in files]
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    # Only new or edited originals are decoded and resized again
+    cache = BuildCache("build_image_assets", GENERATOR_VERSION, enabled=use_cache)
+    entries = [None] * len(files)
+    stale = []
+    for index, filepath in enumerate(filepaths):
+        hit, entry = cache.lookup(filepath, valid=outputs_present)
+        if hit:
+            entries[index] = entry
+        else:
+            stale.append(index)
+
+    worker = functools.partial(process_image, output_dir=OUTPUT_DIR)
+    for n, entry, error in run_per_file(worker, [filepaths[i] for i in stale], jobs):
+        index = stale[n]
+        if error is not None:
+            print(f"Error processing {files[index]}: {error}")
+            continue
+        cache.store(filepaths[index], entry)
+        entries[index] = entry
+        print(f"Processed {files[index]}: {entry['width']}x{entry['height']},"
+              f" widths {', '.join(str(w) for w in entry['widths'])}")
+    cache.save()
+    if use_cache:
+        print(f"Cache: {cache.hits} unchanged, {cache.misses} reprocessed")
+
+    # Keyed by the URL the components already use for the original
+    manifest = {f"{SOURCE_URL}/{name}": entry for name, entry in zip(files, entries) if entry}
+
+    # Drop derivatives of images that were removed or changed
+    used = {name for entry in manifest.values() for name in derivative_files(entry)}
+    for filename in os.listdir(OUTPUT_DIR):
+        if filename not in used:
+            os.remove(os.path.join(OUTPUT_DIR, filename))
+
+    source_bytes = sum(os.path.getsize(p) for p, e in zip(filepaths, entries) if e)
+    thumb_bytes = sum(os.path.getsize(os.path.join(OUTPUT_DIR, derivative_files(e)[0]))
+                      for e in manifest.values())
+    derived_bytes = sum(os.path.getsize(os.path.join(OUTPUT_DIR, f)) for f in used)
+    print(f"Images: {len(manifest)} originals ({source_bytes} bytes), {len(used)} derivatives"
+          f" ({derived_bytes} bytes); narrowest WebP of each: {thumb_bytes} bytes in total")
+
+    if write_if_changed(MANIFEST_FILE, json.dumps(manifest, indent=1, sort_keys=True) + "\n"):
+        print(f"Successfully generated {MANIFEST_FILE}")
+    else:
+        print(f"Manifest unchanged: {MANIFEST_FILE}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=f"Build responsive derivatives of {SOURCE_DIR}.")
+    parser.add_argument("--jobs", "-j", type=int, default=0,
+                        help=f"Resize images in N worker processes (0 = one per CPU, {default_jobs()} here)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore the build cache and reprocess every image")
+    args = parser.parse_args()
+    build_assets(jobs=args.jobs or default_jobs(), use_cache=not args.no_cache)
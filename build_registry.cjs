@@ -1,49 +1,18 @@
-const fs = require('fs');
+// Kept for `node build_registry.cjs`: the registry is built by generate_registry.py,
+// which parses every callout source once into its callout model and writes
+// CalloutRegistry.ts (and, on request, JSON, packed geometry, the atlas, ...)
+// from that. Arguments are passed through, e.g. `node build_registry.cjs --json`.
+const { spawnSync } = require('child_process');
 const path = require('path');
 
-const dir = 'reference/Callouts Codes';
-let svg1Path = '';
+const python = process.env.PYTHON || 'python3';
+const result = spawnSync(python, [path.join(__dirname, 'generate_registry.py'), ...process.argv.slice(2)], {
+    cwd: __dirname,
+    stdio: 'inherit',
+});
 
-let out = `export interface CalloutDef {
-    id: string;
-    name: string;
-    path: string;
-    viewBox: string;
+if (result.error) {
+    console.error(`Could not run ${python}: ${result.error.message}`);
+    process.exit(1);
 }
-
-export const CALLOUTS: Record<string, CalloutDef> = {
-`;
-
-for (let i = 1; i <= 25; i++) {
-    const filePath = path.join(dir, `${i}.md`);
-    let d = '';
-    if (fs.existsSync(filePath)) {
-        const content = fs.readFileSync(filePath, 'utf-8');
-        // Match the first valid path data string, usually starting with M or m 
-        // We'll search for d="M..." or d="m..."
-        const match = content.match(/d="([Mm][^"]+)"/);
-        if (match) {
-            d = match[1].replace(/[\r\n]+/g, ' ').replace(/\s+/g, ' ').trim();
-        }
-    }
-
-    if (i === 1) {
-        svg1Path = d;
-    }
-
-    let isFallback = false;
-    if (!d || !/^[Mm]/.test(d)) {
-        d = svg1Path;
-        isFallback = true;
-    }
-
-    if (isFallback) {
-        out += `  // TODO: Missing or invalid path, fallback to svg1\n`;
-    }
-    out += `  'svg${i}': { id: 'svg${i}', name: 'Callout ${i}', path: '${d}', viewBox: '0 0 1000 1000' },\n`;
-}
-
-out += `};\n`;
-
-fs.writeFileSync('src/modes/comic/data/CalloutRegistry.ts', out);
-console.log('Successfully wrote src/modes/comic/data/CalloutRegistry.ts');
+process.exit(result.status === null ? 1 : result.status);
@@ -0,0 +1 @@
+"""Shared helpers for turning the reference callout exports into registry entries."""
@@ -0,0 +1,118 @@
+import numpy as np
+
+# Exact bounding boxes for absolute path segments (see callouts.pathdata).
+# Every segment of a kind is evaluated at once: the extrema of a Bézier are
+# its end points plus the roots of its derivative inside (0, 1), and those
+# roots have closed forms for the quadratic and cubic case.
+
+EPSILON = 1e-12
+
+
+def _segment_arrays(segments):
+    """Splits segments into (points, quads, cubics) arrays with explicit start points."""
+    points = []
+    quads = []
+    cubics = []
+    x = y = 0.0
+    start_x = start_y = 0.0
+    for cmd, args in segments:
+        if cmd == 'M':
+            x, y = args
+            start_x, start_y = x, y
+            points.append((x, y))
+        elif cmd == 'Z':
+            x, y = start_x, start_y
+        elif cmd == 'L':
+            x, y = args
+            points.append((x, y))
+        elif cmd == 'Q':
+            quads.append((x, y, *args))
+            x, y = args[2], args[3]
+        elif cmd == 'C':
+            cubics.append((x, y, *args))
+            x, y = args[4], args[5]
+        else:
+            raise ValueError(f"Unsupported segment '{cmd}' (expand arcs first)")
+    return (
+        np.array(points, dtype=float).reshape(-1, 2),
+        np.array(quads, dtype=float).reshape(-1, 3, 2),
+        np.array(cubics, dtype=float).reshape(-1, 4, 2),
+    )
+
+
+def _quad_extrema(quads):
+    p0, p1, p2 = quads[:, 0], quads[:, 1], quads[:, 2]
+    denom = p0 - 2 * p1 + p2
+    safe = np.where(np.abs(denom) > EPSILON, denom, 1.0)
+    t = np.where(np.abs(denom) > EPSILON, (p0 - p1) / safe, -1.0)
+    # One candidate per axis; clamp out-of-range roots onto an end point
+    t = np.clip(t, 0.0, 1.0)[:, :, None]
+    mt = 1 - t
+    pts = mt * mt * p0[:, None, :] + 2 * mt * t * p1[:, None, :] + t * t * p2[:, None, :]
+    return pts.reshape(-1, 2)
+
+
+def _cubic_extrema(cubics):
+    p0, p1, p2, p3 = cubics[:, 0], cubics[:, 1], cubics[:, 2], cubics[:, 3]
+    # B'(t) / 3 = a t^2 + b t + c, per axis
+    a = -p0 + 3 * p1 - 3 * p2 + p3
+    b = 2 * (p0 - 2 * p1 + p2)
+    c = p1 - p0
+
+    quadratic = np.abs(a) > EPSILON
+    disc = b * b - 4 * a * c
+    sqrt_disc = np.sqrt(np.maximum(disc, 0.0))
+    safe_a = np.where(quadratic, a, 1.0)
+    safe_b = np.where(np.abs(b) > EPSILON, b, 1.0)
+    linear_root = np.where(np.abs(b) > EPSILON, -c / safe_b, -1.0)
+
+    t1 = np.where(quadratic, (-b + sqrt_disc) / (2 * safe_a), linear_root)
+    t2 = np.where(quadratic, (-b - sqrt_disc) / (2 * safe_a), -1.0)
+    no_real = quadratic & (disc < 0)
+    t1 = np.where(no_real, -1.0, t1)
+    t2 = np.where(no_real, -1.0, t2)
+
+    # Candidates: both roots for each axis (4 per segment), clamped into range
+    t = np.clip(np.concatenate([t1, t2], axis=1), 0.0, 1.0)[:, :, None]
+    mt = 1 - t
+    pts = (mt ** 3 * p0[:, None, :] + 3 * mt * mt * t * p1[:, None, :]
+           + 3 * mt * t * t * p2[:, None, :] + t ** 3 * p3[:, None, :])
+    return pts.reshape(-1, 2)
+
+
+def exact_bounds(segments):
+    """
+    Tight (min_x, min_y, max_x, max_y) of arc-free absolute segments, or
+    None for an empty path. Unlike a control-point box this follows the
+    curves themselves, so handles that stick out do not inflate it.
+    """
+    points, quads, cubics = _segment_arrays(segments)
+    candidates = [points]
+    if len(quads):
+        candidates.append(quads[:, 2])
+        candidates.append(_quad_extrema(quads))
+    if len(cubics):
+        candidates.append(cubics[:, 3])
+        candidates.append(_cubic_extrema(cubics))
+    allpts = np.concatenate(candidates)
+    if not len(allpts):
+        return None
+    lo = allpts.min(axis=0)
+    hi = allpts.max(axis=0)
+    return float(lo[0]), float(lo[1]), float(hi[0]), float(hi[1])
+
+
+def normalize_to_origin(segments):
+    """
+    Translates segments so their exact bounding box starts at (0, 0).
+    Returns (segments, width, height, (min_x, min_y)), where the last item
+    is the offset that was removed, or None for an empty path.
+    """
+    bounds = exact_bounds(segments)
+    if bounds is None:
+        return None
+    min_x, min_y, max_x, max_y = bounds
+    moved = []
+    for cmd, args in segments:
+        moved.append((cmd, [v - (min_x if i % 2 == 0 else min_y) for i, v in enumerate(args)]))
+    return moved, max_x - min_x, max_y - min_y, (min_x, min_y)
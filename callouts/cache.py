@@ -0,0 +1,168 @@
+import glob
+import hashlib
+import json
+import os
+import tempfile
+
+# Default location of the incremental build manifests, relative to the repo root
+CACHE_DIR = ".cache/callouts"
+
+HASH_CHUNK = 1024 * 1024
+
+
+def file_digest(filepath):
+    h = hashlib.blake2b(digest_size=20)
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def code_fingerprint(*paths):
+    """
+    Hashes the generator's own source files. Any edit to the code that
+    produces cached entries invalidates the whole cache.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    for path in sorted(paths):
+        h.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def generator_version(script):
+    """Fingerprint of an entry-point script plus every module in this package."""
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    return code_fingerprint(script, *glob.glob(os.path.join(package_dir, '*.py')))
+
+
+def write_if_changed(filepath, content):
+    """
+    Atomically replaces `filepath` with `content` (str or bytes), but only
+    when the bytes differ from what is already on disk. Returns True if it wrote.
+    Leaving an identical file untouched keeps its mtime, so Vite does not
+    see a change and skips the HMR reload.
+    """
+    data = content if isinstance(content, bytes) else content.encode('utf-8')
+    try:
+        with open(filepath, 'rb') as f:
+            if f.read() == data:
+                return False
+        mode = os.stat(filepath).st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+
+    directory = os.path.dirname(filepath) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(filepath), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        # mkstemp creates 0600 files; keep the permissions a plain open() would give
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return True
+
+
+class BuildCache:
+    """
+    Per-source result cache persisted as a JSON manifest under CACHE_DIR.
+
+    Entries are keyed by file name and validated by content hash plus the
+    generator version. A (size, mtime) match skips hashing altogether, so an
+    unchanged tree costs one stat() per source. Results must be JSON-safe.
+    """
+
+    def __init__(self, name, version, cache_dir=CACHE_DIR, enabled=True):
+        self.path = os.path.join(cache_dir, f"{name}.json")
+        self.version = version
+        self.enabled = enabled
+        self.entries = {}
+        self.seen = {}
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+        if enabled:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if manifest.get('version') == self.version:
+            self.entries = manifest.get('files', {})
+
+    def lookup(self, filepath, valid=None):
+        """
+        Returns (hit, result) for `filepath`. A cached result rejected by
+        `valid(result)`, e.g. because files it points at are gone, is a miss.
+        """
+        if not self.enabled:
+            return False, None
+        key = os.path.basename(filepath)
+        st = os.stat(filepath)
+        stamp = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+        cached = self.entries.get(key)
+        if cached and valid is not None and not valid(cached['result']):
+            cached = None
+
+        if cached and cached['size'] == stamp['size'] and cached['mtime_ns'] == stamp['mtime_ns']:
+            self.seen[key] = cached
+            self.hits += 1
+            return True, cached['result']
+
+        stamp['digest'] = file_digest(filepath)
+        if cached and cached['digest'] == stamp['digest']:
+            # Touched but not changed: refresh the stamp, keep the result
+            self.seen[key] = dict(cached, **stamp)
+            self.dirty = True
+            self.hits += 1
+            return True, cached['result']
+
+        # Stays without a 'result' until store(); failed files are not cached
+        self.seen[key] = stamp
+        self.misses += 1
+        return False, None
+
+    def store(self, filepath, result):
+        if not self.enabled:
+            return
+        self.seen[os.path.basename(filepath)]['result'] = result
+        self.dirty = True
+
+    def save(self, write=True):
+        """
+        Drops sources that were not seen this run and writes the manifest.
+        With write=False the entries are only kept in memory, for the next
+        run in the same process (see restart()); a later save() writes them.
+        """
+        if not self.enabled:
+            return
+        if set(self.seen) != set(self.entries):
+            self.dirty = True
+        if not self.dirty:
+            return
+        self.entries = {key: entry for key, entry in self.seen.items() if 'result' in entry}
+        if write:
+            manifest = {'version': self.version, 'files': self.entries}
+            write_if_changed(self.path, json.dumps(manifest, sort_keys=True))
+            self.dirty = False
+
+    def restart(self):
+        """Starts another run over the sources, e.g. in watch mode, reusing the entries in memory."""
+        self.seen = {}
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        """Forgets every cached entry, so the next run reparses everything."""
+        self.entries = {}
+        self.dirty = True
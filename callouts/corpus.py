@@ -0,0 +1,176 @@
+import base64
+import json
+import math
+import os
+import random
+
+# Deterministic synthetic callout sources for benchmarking the registry
+# pipeline (see benchmark_registry.py). Every file is a markdown-wrapped SVG
+# like the exports in reference/Callouts Codes: a bubble outline of
+# configurable length, nested in groups with transforms, optionally with an
+# embedded base64 raster. The same parameters and seed always produce the
+# same bytes, and files are written in chunks, so a corpus can run to
+# thousands of files and gigabytes without being held in memory.
+
+# Written next to the files; a corpus with matching parameters is reused
+CORPUS_MANIFEST = "corpus.json"
+CORPUS_VERSION = 1
+
+DEFAULTS = {
+    'files': 200,
+    # Segments per path and paths per file
+    'segments': 400,
+    'paths': 1,
+    # <g> elements wrapped around each path
+    'depth': 2,
+    'transforms': True,
+    # Decoded size of the embedded raster, 0 for none
+    'image_bytes': 0,
+    'seed': 0,
+}
+
+# Segments written per chunk, and raw image bytes encoded per chunk (a multiple of 3)
+SEGMENT_CHUNK = 512
+IMAGE_CHUNK = 3 * 256 * 1024
+
+CANVAS = 2500.0
+PNG_HEADER = b'\x89PNG\r\n\x1a\n'
+
+
+def _number(value):
+    return f"{value:.3f}".rstrip('0').rstrip('.')
+
+
+def _transform(rng):
+    kind = rng.choice(('translate', 'scale', 'rotate', 'matrix'))
+    if kind == 'translate':
+        return f"translate({_number(rng.uniform(-200, 200))} {_number(rng.uniform(-200, 200))})"
+    if kind == 'scale':
+        return f"scale({_number(rng.uniform(0.8, 1.25))})"
+    if kind == 'rotate':
+        return f"rotate({_number(rng.uniform(-15, 15))} {_number(CANVAS / 2)} {_number(CANVAS / 2)})"
+    a, d = rng.uniform(0.9, 1.1), rng.uniform(0.9, 1.1)
+    b, c = rng.uniform(-0.05, 0.05), rng.uniform(-0.05, 0.05)
+    e, f = rng.uniform(-100, 100), rng.uniform(-100, 100)
+    return f"matrix({' '.join(_number(v) for v in (a, b, c, d, e, f))})"
+
+
+def _path_chunks(rng, segments):
+    """
+    Path data for a wobbly bubble with a tail: `segments` commands mixing
+    absolute and relative cubics, quadratics, lines and the odd arc, so
+    parsing, arc expansion and simplification all get exercised.
+    """
+    cx = cy = CANVAS / 2
+    rx = rng.uniform(0.3, 0.45) * CANVAS
+    ry = rng.uniform(0.25, 0.4) * CANVAS
+    wobble = rng.uniform(0.01, 0.04)
+    steps = max(segments - 3, 1)
+
+    def point(i):
+        angle = 2 * math.pi * i / steps
+        r = 1 + wobble * math.sin(7 * angle + rng.random() * 0.2)
+        return cx + rx * r * math.cos(angle), cy + ry * r * math.sin(angle)
+
+    x, y = point(0)
+    parts = [f"M{_number(x)} {_number(y)}"]
+    for i in range(1, steps + 1):
+        nx, ny = point(i)
+        kind = rng.random()
+        if kind < 0.55:
+            # Cubic with control points near the chord
+            c1 = (x + (nx - x) / 3 + rng.uniform(-4, 4), y + (ny - y) / 3 + rng.uniform(-4, 4))
+            c2 = (x + 2 * (nx - x) / 3 + rng.uniform(-4, 4), y + 2 * (ny - y) / 3 + rng.uniform(-4, 4))
+            if kind < 0.3:
+                parts.append("C" + " ".join(_number(v) for v in (*c1, *c2, nx, ny)))
+            else:
+                parts.append("c" + " ".join(_number(v) for v in (c1[0] - x, c1[1] - y, c2[0] - x,
+                                                                  c2[1] - y, nx - x, ny - y)))
+        elif kind < 0.75:
+            parts.append(f"Q{_number((x + nx) / 2 + rng.uniform(-3, 3))} {_number((y + ny) / 2)}"
+                         f" {_number(nx)} {_number(ny)}")
+        elif kind < 0.97:
+            parts.append(f"l{_number(nx - x)} {_number(ny - y)}")
+        else:
+            radius = math.hypot(nx - x, ny - y)
+            parts.append(f"A{_number(radius)} {_number(radius)} 0 0 1 {_number(nx)} {_number(ny)}")
+        x, y = nx, ny
+        if len(parts) >= SEGMENT_CHUNK:
+            yield " ".join(parts)
+            parts = [""]
+    # The tail, then back to the outline
+    parts.append(f"L{_number(cx - rx * 0.9)} {_number(cy + ry * 1.3)}")
+    parts.append(f"L{_number(cx - rx * 0.4)} {_number(cy + ry * 0.9)}Z")
+    yield " ".join(parts)
+
+
+def _image_chunks(rng, size):
+    """Base64 of `size` pseudo-random bytes behind a PNG signature."""
+    remaining = size
+    header = PNG_HEADER[:size]
+    while remaining > 0:
+        n = min(IMAGE_CHUNK, remaining)
+        raw = header + rng.randbytes(n - len(header))
+        header = b''
+        remaining -= n
+        yield base64.b64encode(raw).decode('ascii')
+
+
+def write_callout(filepath, index, options):
+    """Writes synthetic source number `index` for `options` (see DEFAULTS); returns its size."""
+    rng = random.Random(f"{options['seed']}:{index}")
+    with open(filepath, 'w', encoding='ascii', newline='\n') as f:
+        f.write(f"# Synthetic callout {index}\n\n```svg\n")
+        size = int(CANVAS)
+        f.write(f'<svg width="{size}" height="{size}" xmlns="http://www.w3.org/2000/svg"'
+                f' xmlns:xlink="http://www.w3.org/1999/xlink" overflow="hidden">')
+        if options['image_bytes']:
+            f.write(f'<image width="{size}" height="{size}" xlink:href="data:image/png;base64,')
+            for chunk in _image_chunks(rng, options['image_bytes']):
+                f.write(chunk)
+            f.write('"/>')
+        for _ in range(options['paths']):
+            for _ in range(options['depth']):
+                f.write(f'<g transform="{_transform(rng)}">' if options['transforms'] else '<g>')
+            f.write('<path d="')
+            for chunk in _path_chunks(rng, options['segments']):
+                f.write(chunk)
+            f.write('" fill="#FFFFFF" stroke="#000000" stroke-width="8"/>')
+            f.write('</g>' * options['depth'])
+        f.write("</svg>\n```\n")
+        return f.tell()
+
+
+def generate_corpus(directory, **options):
+    """
+    Fills `directory` with a synthetic corpus for `options` (missing keys
+    take DEFAULTS) unless it already holds one generated with the same
+    options. Returns the corpus description: the options plus the total
+    'bytes' and the sorted 'filenames'.
+    """
+    unknown = set(options) - set(DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown corpus options: {', '.join(sorted(unknown))}")
+    options = dict(DEFAULTS, **options)
+    manifest_path = os.path.join(directory, CORPUS_MANIFEST)
+    try:
+        with open(manifest_path, 'r') as f:
+            existing = json.load(f)
+        if existing.get('version') == CORPUS_VERSION and existing.get('options') == options and all(
+                os.path.exists(os.path.join(directory, name)) for name in existing['filenames']):
+            return dict(options, bytes=existing['bytes'], filenames=existing['filenames'])
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+
+    os.makedirs(directory, exist_ok=True)
+    for filename in os.listdir(directory):
+        if filename.endswith('.md'):
+            os.remove(os.path.join(directory, filename))
+    width = len(str(options['files']))
+    filenames = [f"synthetic_{i:0{width}d}.md" for i in range(options['files'])]
+    total = sum(write_callout(os.path.join(directory, name), i, options)
+                for i, name in enumerate(filenames))
+    with open(manifest_path, 'w') as f:
+        json.dump({'version': CORPUS_VERSION, 'options': options, 'bytes': total,
+                   'filenames': filenames}, f, indent=1)
+    return dict(options, bytes=total, filenames=filenames)
@@ -0,0 +1,278 @@
+import re
+import xml.etree.ElementTree as ET
+
+from callouts.pathdata import IDENTITY, multiply, parse_transform
+from callouts.rasters import RasterSink
+
+# Bytes pulled from disk per read. The extractor never holds more than one
+# chunk (plus a short carry-over) of raw source at a time.
+CHUNK_SIZE = 64 * 1024
+
+SVG_OPEN = b'<svg'
+
+# Matches the start of an inline data URI, e.g. xlink:href="data:image/png;base64,
+DATA_HREF = re.compile(rb'href\s*=\s*(["\'])data:')
+# Longest tail we keep back when a chunk might end halfway through DATA_HREF
+HREF_CARRY = 32
+
+# Containers whose children are never painted directly
+NON_RENDERED = {'defs', 'clipPath', 'mask', 'symbol', 'pattern', 'marker'}
+
+XLINK_HREF = '{http://www.w3.org/1999/xlink}href'
+LENGTH_RE = re.compile(r'\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)(?:px)?\s*$')
+
+
+def local_name(tag):
+    """Strips the '{namespace}' prefix ElementTree puts on tag names."""
+    return tag.rsplit('}', 1)[-1]
+
+
+class DataHrefFilter:
+    """
+    Passes SVG bytes through unchanged, except for inline `href="data:..."`
+    payloads, which are dropped on the floor as they stream past. The parser
+    downstream only ever sees `href="data:"`, so multi-megabyte base64 images
+    are never materialized as Python strings. A `sink` (see RasterSink)
+    gets each payload piece by piece through start() / data() / end().
+    """
+
+    def __init__(self, sink=None):
+        self.sink = sink
+        self.carry = b''
+        self.quote = None  # closing quote byte while inside a payload
+        self.payloads = 0
+        self.payload_bytes = 0
+
+    def feed(self, chunk):
+        data = self.carry + chunk
+        self.carry = b''
+        out = []
+        pos = 0
+        while pos < len(data):
+            if self.quote is not None:
+                end = data.find(self.quote, pos)
+                if end == -1:
+                    self.payload_bytes += len(data) - pos
+                    if self.sink is not None:
+                        self.sink.data(data[pos:])
+                    return b''.join(out)
+                self.payload_bytes += end - pos
+                if self.sink is not None:
+                    self.sink.data(data[pos:end])
+                    self.sink.end()
+                self.quote = None
+                pos = end
+                continue
+
+            match = DATA_HREF.search(data, pos)
+            if match is None:
+                # Hold back a short tail in case the marker straddles chunks
+                keep = max(pos, len(data) - HREF_CARRY)
+                out.append(data[pos:keep])
+                self.carry = data[keep:]
+                return b''.join(out)
+
+            out.append(data[pos:match.end()])
+            self.quote = match.group(1)
+            self.payloads += 1
+            if self.sink is not None:
+                self.sink.start()
+            pos = match.end()
+        return b''.join(out)
+
+    def close(self):
+        tail, self.carry = self.carry, b''
+        return tail
+
+
+def iter_svg_bytes(f, chunk_size=CHUNK_SIZE):
+    """Yields raw chunks of `f` starting at the first `<svg` tag."""
+    carry = b''
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        data = carry + chunk
+        start = data.find(SVG_OPEN)
+        if start != -1:
+            yield data[start:]
+            break
+        carry = data[-(len(SVG_OPEN) - 1):]
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def extract_svg(filepath, stop_at_image=False, chunk_size=CHUNK_SIZE, image_dir=None):
+    """
+    Incrementally extracts the first <svg> block of a callout source.
+
+    Returns None when the file has no <svg> tag, otherwise a dict with the
+    root 'width', 'height' and 'viewBox' attributes (strings or None), every
+    rendered <path d> in document order under 'paths', the composed ancestor
+    transform of each path under 'transforms' (an affine 6-tuple), and
+    'has_image' / 'image_bytes' describing any embedded raster payloads.
+    Paths inside <defs>, <clipPath> and similar containers are not rendered
+    and are left out.
+
+    'images' lists every painted raster, drawn directly or through <use>,
+    in document order: a dict with its 'width', 'height' and placement
+    'matrix' (mapping the image's own 0..width, 0..height box to user
+    space), and either the external 'href' or, for inline payloads, the
+    'file' it was decoded to in `image_dir`. Without an `image_dir` inline
+    payloads are skipped and their 'file' is None; a payload that failed to
+    decode carries an 'error' instead.
+
+    With stop_at_image=True, reading stops at the first embedded image, since
+    the caller is going to discard the file anyway.
+
+    Raises ET.ParseError if the SVG is malformed.
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    sink = RasterSink(image_dir) if image_dir else None
+    href_filter = DataHrefFilter(sink)
+    result = {
+        'width': None, 'height': None, 'viewBox': None,
+        'paths': [], 'transforms': [], 'has_image': False, 'image_bytes': 0,
+        'images': [],
+    }
+    # Parallel to the element stack: (composed transform, inside NON_RENDERED)
+    stack = []
+    # <image> elements by id and the <use> elements that may point at them
+    rasters = {'defs': {}, 'uses': [], 'payloads': 0}
+    found = False
+    done = False
+
+    try:
+        with open(filepath, 'rb') as f:
+            for chunk in iter_svg_bytes(f, chunk_size):
+                found = True
+                parser.feed(href_filter.feed(chunk))
+                done = _drain(parser, stack, result, rasters)
+                if href_filter.payloads:
+                    result['has_image'] = True
+                    done = done or stop_at_image
+                if done:
+                    break
+
+        if not found:
+            return None
+        if not done:
+            parser.feed(href_filter.close())
+            if not _drain(parser, stack, result, rasters):
+                # Truncated document: let the parser raise the usual error
+                parser.close()
+    finally:
+        if sink is not None:
+            sink.discard()
+
+    result['image_bytes'] = href_filter.payload_bytes
+    _resolve_images(result, rasters, sink.payloads if sink is not None else [])
+    return result
+
+
+def _length(value):
+    match = LENGTH_RE.match(value or '')
+    return float(match.group(1)) if match else None
+
+
+def _translate(matrix, x, y):
+    return multiply(matrix, (1.0, 0.0, 0.0, 1.0, _length(x) or 0.0, _length(y) or 0.0))
+
+
+def _resolve_images(result, rasters, payloads):
+    """Turns the collected <image> and <use> elements into result['images']."""
+    placements = []
+    for use in rasters['uses']:
+        image = use['image'] if 'image' in use else rasters['defs'].get(use['ref'])
+        if image is None:
+            continue
+        if 'image' in use:
+            matrix = use['matrix']
+        else:
+            # <use> adds its own x/y, then the image is drawn in its own frame
+            matrix = multiply(_translate(use['matrix'], use['x'], use['y']), image['own'])
+        placements.append((image, _translate(matrix, image['x'], image['y'])))
+
+    for image, matrix in placements:
+        width, height = _length(image['width']), _length(image['height'])
+        if not width or not height:
+            continue
+        placement = {'width': width, 'height': height, 'matrix': matrix}
+        if image['payload'] is None:
+            placement['href'] = image['href']
+        elif image['payload'] < len(payloads):
+            payload = payloads[image['payload']]
+            if 'error' in payload:
+                placement['error'] = payload['error']
+            else:
+                placement['file'] = payload['file']
+        else:
+            placement['file'] = None
+        result['images'].append(placement)
+
+
+def _drain(parser, stack, result, rasters):
+    """Consumes pending parser events. Returns True once the root <svg> closes."""
+    for event, elem in parser.read_events():
+        tag = local_name(elem.tag)
+        if event == 'start':
+            if stack:
+                _, parent_matrix, hidden = stack[-1]
+            else:
+                parent_matrix, hidden = IDENTITY, False
+                result['width'] = elem.get('width')
+                result['height'] = elem.get('height')
+                result['viewBox'] = elem.get('viewBox')
+
+            # The root's own transform is applied on top of the viewBox mapping,
+            # so it belongs to user space like any other ancestor's.
+            matrix = parent_matrix
+            own = elem.get('transform')
+            if own:
+                matrix = multiply(parent_matrix, parse_transform(own))
+            hidden = hidden or tag in NON_RENDERED
+
+            if tag == 'path' and not hidden:
+                d = elem.get('d')
+                if d:
+                    result['paths'].append(d)
+                    result['transforms'].append(matrix)
+            elif tag == 'image':
+                result['has_image'] = True
+            _collect_raster(elem, tag, matrix, hidden, own, rasters)
+            stack.append((elem, matrix, hidden))
+        else:
+            stack.pop()
+            if not stack:
+                # Anything after the closing </svg> is never read
+                return True
+            # Detach finished elements so the tree never grows with the file
+            stack[-1][0].remove(elem)
+    return False
+
+
+def _collect_raster(elem, tag, matrix, hidden, own, rasters):
+    """Records <image> elements and <use> references for _resolve_images()."""
+    href = elem.get(XLINK_HREF) or elem.get('href')
+    payload = None
+    if href and href.startswith('data:'):
+        # Payloads are numbered in document order, as DataHrefFilter sees them
+        payload = rasters['payloads']
+        rasters['payloads'] += 1
+
+    if tag == 'image':
+        image = {
+            'x': elem.get('x'), 'y': elem.get('y'),
+            'width': elem.get('width'), 'height': elem.get('height'),
+            'payload': payload, 'href': href,
+            'own': parse_transform(own) if own else IDENTITY,
+        }
+        if elem.get('id'):
+            rasters['defs'][elem.get('id')] = image
+        if not hidden:
+            rasters['uses'].append({'image': image, 'matrix': matrix})
+    elif tag == 'use' and not hidden and href and href.startswith('#'):
+        rasters['uses'].append({'ref': href[1:], 'matrix': matrix, 'x': elem.get('x'), 'y': elem.get('y')})
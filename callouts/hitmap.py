@@ -0,0 +1,236 @@
+import math
+import struct
+
+import numpy as np
+
+from callouts.bounds import exact_bounds
+from callouts.pathdata import douglas_peucker
+from callouts.polylines import flatten, winding_numbers
+
+# Hit-test maps: each callout's outline flattened into closed polylines at a
+# few levels of detail (LODs), each with a uniform grid bucketing its edges.
+# The editor answers point-in-shape and nearest-edge queries from one cell
+# (or a few rings of cells) instead of re-flattening the SVG path; the
+# decoder and queries are in src/modes/comic/data/CalloutHitMap.ts.
+# All values are little-endian:
+#
+#   0   magic       b'CLH1'
+#   4   u8          LOD count, coarsest first
+#   5   3 bytes     reserved (zero)
+#   8   f32[4]      grid origin and far corner: min x, min y, max x, max y
+#   24  LOD table, 32 bytes per LOD:
+#         f32   largest distance from the path, in callout units
+#         u32   ring count
+#         u32   point count
+#         u16   grid columns
+#         u16   grid rows
+#         f32   cell width
+#         f32   cell height
+#         u32   cell entry count
+#         u32   byte offset of the LOD's data
+#
+# Each LOD's data starts on a multiple of 4:
+#
+#   u32[rings]          end (exclusive) of every ring in the point array
+#   f32[points * 2]     x, y of every point; ring edge i runs from point i to
+#                       the next point of its ring
+#   u32[cells + 1]      start of every cell's run of edges, row-major
+#   u16/u32[entries]    edges touching each cell: u16 while the LOD has at
+#                       most 65536 points, u32 above that
+#   ...                 zero padding up to a multiple of 4
+#   i16[cells]          winding number at the reference point of every cell
+#   ...                 zero padding up to a multiple of 4
+#
+# The winding number of any point in a cell is the reference point's plus
+# one signed crossing for every edge of that cell the segment from the
+# reference point to the point crosses, so containment under either fill
+# rule costs one cell.
+
+MAGIC = b'CLH1'
+HEADER = struct.Struct('<4sB3x4f')
+LOD_ENTRY = struct.Struct('<fIIHHffII')
+
+# Outline tolerances as fractions of the callout's largest side, coarsest
+# first: about 3, 0.75 and 0.15 pixels for a bubble drawn 300 pixels wide.
+LOD_TOLERANCES = (0.01, 0.0025, 0.0005)
+# Grid density: roughly this many edges per cell, at most MAX_GRID cells a side
+EDGES_PER_CELL = 2
+MAX_GRID = 128
+U16_POINTS = 65536
+# Where in its cell the stored winding number is measured, as fractions of
+# the cell size: just off the centre, so the axis-aligned edges of
+# hand-drawn shapes (which often run through cell centres) never touch it
+REFERENCE = (0.4973, 0.5031)
+
+
+def _f32(value):
+    return float(np.float32(value))
+
+
+def _grid_size(edges, width, height):
+    cells = max(1, edges / EDGES_PER_CELL)
+    aspect = width / height if width > 0 and height > 0 else 1.0
+    columns = min(MAX_GRID, max(1, math.ceil(math.sqrt(cells * aspect))))
+    rows = min(MAX_GRID, max(1, math.ceil(cells / columns)))
+    return columns, rows
+
+
+def bucket_edges(starts, ends, origin, cell_size, columns, rows):
+    """
+    (cell_starts, cell_edges) of a CSR grid: the edges from `starts` to
+    `ends` whose segment touches each cell, cells in row-major order. An
+    edge is tried against every cell its bounding box covers and kept where
+    the cell's corners are not all on one side of it, so long diagonal
+    edges do not fill their whole bounding box.
+    """
+    cells = columns * rows
+    if not len(starts):
+        return np.zeros(cells + 1, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    ox, oy = origin
+    cw, ch = cell_size
+    lo = np.minimum(starts, ends)
+    hi = np.maximum(starts, ends)
+    col0 = np.clip(np.floor((lo[:, 0] - ox) / cw), 0, columns - 1).astype(np.int64)
+    col1 = np.clip(np.floor((hi[:, 0] - ox) / cw), 0, columns - 1).astype(np.int64)
+    row0 = np.clip(np.floor((lo[:, 1] - oy) / ch), 0, rows - 1).astype(np.int64)
+    row1 = np.clip(np.floor((hi[:, 1] - oy) / ch), 0, rows - 1).astype(np.int64)
+    spans = col1 - col0 + 1
+    counts = spans * (row1 - row0 + 1)
+
+    edge = np.repeat(np.arange(len(starts)), counts)
+    local = np.arange(int(counts.sum())) - (np.cumsum(counts) - counts)[edge]
+    col = col0[edge] + local % spans[edge]
+    row = row0[edge] + local // spans[edge]
+
+    # Side of the edge's line each corner of the candidate cell is on
+    direction = ends[edge] - starts[edge]
+    sides = []
+    for dx, dy in ((0, 0), (1, 0), (0, 1), (1, 1)):
+        cx = ox + (col + dx) * cw - starts[edge, 0]
+        cy = oy + (row + dy) * ch - starts[edge, 1]
+        sides.append(direction[:, 0] * cy - direction[:, 1] * cx)
+    sides = np.stack(sides)
+    # Edges along a cell border stay in, despite f32 rounding of the grid
+    slack = 1e-4 * (np.abs(direction).sum(axis=1) * (cw + ch) + 1.0)
+    keep = (sides.min(axis=0) <= slack) & (sides.max(axis=0) >= -slack)
+
+    cell = (row * columns + col)[keep]
+    order = np.argsort(cell, kind='stable')
+    cell_edges = edge[keep][order]
+    cell_starts = np.concatenate([[0], np.cumsum(np.bincount(cell, minlength=cells))])
+    return cell_starts, cell_edges
+
+
+def build_lod(segments, bounds, tolerance):
+    """
+    One level of detail: the outline within `tolerance` of the path and its
+    edge grid. Half the tolerance goes to flattening curves, the other half
+    to dropping points from long runs of short lines.
+    """
+    min_x, min_y, max_x, max_y = bounds
+    rings = []
+    for line in flatten(segments, flatness=tolerance / 2):
+        kept, _ = douglas_peucker(line.tolist(), tolerance / 2)
+        # Everything is derived from the f32 values the decoder will see
+        rings.append(line[kept].astype(np.float32).astype(float))
+    points = np.concatenate(rings) if rings else np.zeros((0, 2))
+    ends = np.cumsum([len(line) for line in rings]).astype(np.int64)
+    width, height = max_x - min_x, max_y - min_y
+    columns, rows = _grid_size(len(points), width, height)
+    cell_size = (_f32(max(width, 1e-6) / columns), _f32(max(height, 1e-6) / rows))
+
+    following = np.arange(1, len(points) + 1)
+    following[ends - 1] = ends - np.array([len(line) for line in rings], dtype=np.int64)
+    cell_starts, cell_edges = bucket_edges(points, points[following] if len(points) else points,
+                                           (min_x, min_y), cell_size, columns, rows)
+    # winding_numbers() samples (col + 0.5, row + 0.5) in cell units
+    shift = (0.5 - REFERENCE[0], 0.5 - REFERENCE[1])
+    scaled = [(line - (min_x, min_y)) / cell_size + shift for line in rings]
+    winding = winding_numbers(scaled, columns, rows)
+    return {
+        'tolerance': tolerance,
+        'ring_ends': ends,
+        'points': points,
+        'columns': columns,
+        'rows': rows,
+        'cell_size': cell_size,
+        'cell_starts': cell_starts,
+        'cell_edges': cell_edges,
+        'winding': winding.ravel(),
+    }
+
+
+def build_hitmap(segments, tolerances=LOD_TOLERANCES):
+    """
+    Hit-test map of arc-free absolute segments: the grid bounds and one LOD
+    per entry of `tolerances` (fractions of the largest side). None for a
+    path with no extent.
+    """
+    bounds = exact_bounds(segments)
+    if bounds is None:
+        return None
+    # Rounded outwards to f32 so the grid still covers every point
+    bounds = tuple(float(np.nextafter(np.float32(v), np.float32(math.inf * sign)))
+                   if _f32(v) * sign < v * sign else _f32(v)
+                   for v, sign in zip(bounds, (-1, -1, 1, 1)))
+    extent = max(bounds[2] - bounds[0], bounds[3] - bounds[1])
+    if extent <= 0:
+        return None
+    return {'bounds': bounds, 'lods': [build_lod(segments, bounds, t * extent) for t in tolerances]}
+
+
+def _padded(data):
+    return data + b'\0' * (-len(data) % 4)
+
+
+def pack_hitmap(hitmap):
+    """Serializes a build_hitmap() result in the CLH1 layout above."""
+    lods = hitmap['lods']
+    offset = HEADER.size + LOD_ENTRY.size * len(lods)
+    table = []
+    bodies = []
+    for lod in lods:
+        point_count = len(lod['points'])
+        index_type = '<u2' if point_count <= U16_POINTS else '<u4'
+        body = (lod['ring_ends'].astype('<u4').tobytes()
+                + lod['points'].astype('<f4').tobytes()
+                + lod['cell_starts'].astype('<u4').tobytes()
+                + _padded(lod['cell_edges'].astype(index_type).tobytes())
+                + _padded(np.clip(lod['winding'], -32768, 32767).astype('<i2').tobytes()))
+        table.append(LOD_ENTRY.pack(lod['tolerance'], len(lod['ring_ends']), point_count, lod['columns'],
+                                    lod['rows'], *lod['cell_size'], len(lod['cell_edges']), offset))
+        bodies.append(body)
+        offset += len(body)
+    return HEADER.pack(MAGIC, len(lods), *hitmap['bounds']) + b''.join(table) + b''.join(bodies)
+
+
+def unpack_hitmap(data):
+    """Inverse of pack_hitmap(), with every array as read from the buffer."""
+    magic, count, *bounds = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a packed callout hit map")
+    lods = []
+    for n in range(count):
+        (tolerance, ring_count, point_count, columns, rows, cell_width, cell_height, entries,
+         offset) = LOD_ENTRY.unpack_from(data, HEADER.size + n * LOD_ENTRY.size)
+        cells = columns * rows
+
+        def take(dtype, length):
+            nonlocal offset
+            array = np.frombuffer(data, dtype=dtype, count=length, offset=offset)
+            offset += array.nbytes
+            offset += -offset % 4
+            return array
+
+        lods.append({
+            'tolerance': tolerance,
+            'ring_ends': take('<u4', ring_count),
+            'points': take('<f4', point_count * 2).reshape(-1, 2),
+            'columns': columns,
+            'rows': rows,
+            'cell_size': (cell_width, cell_height),
+            'cell_starts': take('<u4', cells + 1),
+            'cell_edges': take('<u2' if point_count <= U16_POINTS else '<u4', entries),
+            'winding': take('<i2', cells),
+        })
+    return {'bounds': tuple(bounds), 'lods': lods}
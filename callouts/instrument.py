@@ -0,0 +1,198 @@
+import cProfile
+import json
+import os
+import pstats
+import time
+
+# Optional per-stage instrumentation for the generators. A StageRecorder
+# times the stages of one subject (a source file, or the build as a whole)
+# and collects counters such as bytes in and out; NULL_RECORDER has the same
+# interface and does nothing, so code can be instrumented unconditionally at
+# the cost of a method call per stage when reporting is off.
+
+REPORT_VERSION = 1
+# Functions listed after a --profile run
+PROFILE_TOP = 20
+
+
+class _Timer:
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.stage['seconds'] += time.perf_counter() - self.start
+
+
+class StageRecorder:
+    """
+    Wall time and counters per stage for one subject, in first-use order:
+
+        with recorder.stage('extract'):
+            ...
+        recorder.note('extract', bytes_in=size, paths=3)
+
+    A stage entered several times accumulates. as_dict() gives a JSON-safe
+    record: {'name', 'seconds', 'stages': {stage: {'seconds', counters...}}}
+    plus 'skipped' (a short reason code) and 'detail' for subjects that
+    were left out.
+    """
+
+    enabled = True
+
+    def __init__(self, name):
+        self.name = name
+        self.stages = {}
+        self.skipped = None
+        self.detail = None
+
+    def _stage(self, stage):
+        entry = self.stages.get(stage)
+        if entry is None:
+            entry = self.stages[stage] = {'seconds': 0.0}
+        return entry
+
+    def stage(self, stage):
+        return _Timer(self._stage(stage))
+
+    def note(self, stage, **counters):
+        """Adds `counters` to the stage's totals."""
+        entry = self._stage(stage)
+        for key, value in counters.items():
+            entry[key] = entry.get(key, 0) + value
+
+    def skip(self, reason, detail=None):
+        self.skipped = reason
+        self.detail = detail
+
+    def as_dict(self):
+        record = {
+            'name': self.name,
+            'seconds': sum(entry['seconds'] for entry in self.stages.values()),
+            'stages': self.stages,
+        }
+        if self.skipped is not None:
+            record['skipped'] = self.skipped
+            if self.detail:
+                record['detail'] = self.detail
+        return record
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+class NullRecorder:
+    """StageRecorder stand-in for runs without instrumentation."""
+
+    enabled = False
+    _timer = _NullTimer()
+
+    def stage(self, stage):
+        return self._timer
+
+    def note(self, stage, **counters):
+        pass
+
+    def skip(self, reason, detail=None):
+        pass
+
+    def as_dict(self):
+        return None
+
+
+NULL_RECORDER = NullRecorder()
+
+
+def recorder_for(name, enabled):
+    return StageRecorder(name) if enabled else NULL_RECORDER
+
+
+def stage_totals(records):
+    """Sums the seconds and counters of every stage over `records`."""
+    totals = {}
+    for record in records:
+        for stage, entry in record.get('stages', {}).items():
+            total = totals.setdefault(stage, {})
+            for key, value in entry.items():
+                total[key] = total.get(key, 0) + value
+    return totals
+
+
+def _counter(record, key):
+    return sum(entry.get(key, 0) for entry in record.get('stages', {}).values())
+
+
+def write_report(path, build, files):
+    """
+    Writes the build report. A .ndjson or .jsonl path gets one JSON object
+    per line: every file record ('type': 'file'), then the build record
+    ('type': 'build'). Any other path gets a single JSON document with
+    'build', 'totals' (per stage, over all files) and 'files'.
+    """
+    totals = stage_totals(files)
+    build = dict(build, type='build', version=REPORT_VERSION, totals=totals)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        if os.path.splitext(path)[1].lower() in ('.ndjson', '.jsonl'):
+            for record in files:
+                f.write(json.dumps(dict(record, type='file')) + "\n")
+            f.write(json.dumps(build) + "\n")
+        else:
+            json.dump({'build': build, 'files': files}, f, indent=1)
+            f.write("\n")
+
+
+def print_summary(build, files, top=5):
+    """Prints the build's stage times and the `top` slowest and largest sources."""
+    stages = ", ".join(f"{stage} {entry['seconds'] * 1000:.0f} ms" for stage, entry in build['stages'].items())
+    print(f"Build: {build['seconds'] * 1000:.0f} ms ({stages})")
+    parsed = [r for r in files if r.get('stages') and not r.get('cached')]
+    if parsed:
+        print(f"Slowest {min(top, len(parsed))} of {len(parsed)} parsed sources:")
+        for record in sorted(parsed, key=lambda r: r['seconds'], reverse=True)[:top]:
+            slowest = max(record['stages'].items(), key=lambda item: item[1]['seconds'])
+            print(f"  {record['name']}: {record['seconds'] * 1000:.1f} ms"
+                  f" (most in {slowest[0]}, {slowest[1]['seconds'] * 1000:.1f} ms)")
+    sized = [r for r in files if _counter(r, 'bytes_out')]
+    if sized:
+        print(f"Largest {min(top, len(sized))} outputs:")
+        for record in sorted(sized, key=lambda r: _counter(r, 'bytes_out'), reverse=True)[:top]:
+            print(f"  {record['name']}: {_counter(record, 'bytes_out')} bytes out"
+                  f" of {_counter(record, 'bytes_in')} bytes in")
+    skipped = [r for r in files if 'skipped' in r]
+    if skipped:
+        reasons = {}
+        for record in skipped:
+            reasons[record['skipped']] = reasons.get(record['skipped'], 0) + 1
+        print(f"Skipped {len(skipped)}: " + ", ".join(f"{n} x {reason}" for reason, n in sorted(reasons.items())))
+
+
+def profile_call(path, func, *args, **kwargs):
+    """
+    Runs func(*args, **kwargs) under cProfile, saves the stats to `path`
+    (readable with pstats or snakeviz) and prints the functions with the
+    most cumulative time. Returns what `func` returned.
+    """
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        profiler.dump_stats(path)
+        print(f"Profile written to {path}; top {PROFILE_TOP} by cumulative time:")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(PROFILE_TOP)
@@ -0,0 +1,164 @@
+import collections
+import re
+
+import numpy as np
+
+from callouts.bounds import exact_bounds
+from callouts.packed import ARG_COUNTS, COMMANDS, OPCODES
+from callouts.pathdata import expand_arcs, parse_path
+
+# The registry's in-memory callout model. Every source is parsed once into
+# a record, and every output (the TS module, JSON, packed geometry, the
+# atlas, hit maps, text areas) is derived from the records rather than by
+# parsing path strings again. A record is a dict:
+#
+#   'id', 'name'    registry key and display name
+#   'path'          SVG path data, as written to the registry
+#   'ops'           uint8 opcode per segment (callouts.packed.OPCODES)
+#   'coords'        float64 x, y pairs of those segments, absolute, arc-free
+#   'bounds'        exact (min_x, min_y, max_x, max_y) of the outline, or None
+#   'viewBox'       {'width', 'height', 'offsetX', 'offsetY'}
+#   'images'        raster layers drawn under the path (see generate_registry)
+#   'source'        provenance: {'kind': 'hand_written', 'line': n, 'group': g}
+#                   for entries of the generator's EXISTING_ENTRIES block
+#                   (g is the `// --- G ---` section they sit in, or None),
+#                   {'kind': 'import', 'file': name} for parsed sources
+#   'signature'     outline signature (callouts.signature), None if not computed
+#   'parts'         signatures of the subpaths of multi-part outlines
+#
+# Records of imported sources round-trip through the build cache, which
+# holds JSON: path_fields() gives the geometry in JSON form ('ops' as a
+# string of commands, 'coords' as a list) and record_from_result() turns it
+# back into arrays.
+
+# One hand-written entry: `'id': { id: '...', name: '...', path: "...", viewBox: { ... } }`
+HAND_WRITTEN_RE = re.compile(
+    r"'(\w+)':\s*\{\s*id: '[^']*', name: '([^']*)',\s*path: \"([^\"]*)\",\s*"
+    r"viewBox: \{ width: ([-\d.]+), height: ([-\d.]+), offsetX: ([-\d.]+), offsetY: ([-\d.]+) \}")
+# Section comment of the hand-written entries, e.g. `// --- BOXES (Robotic / Stern) ---`
+GROUP_RE = re.compile(r"^[ \t]*// --- (.+?) ---[ \t]*$", re.MULTILINE)
+
+# Products derived from one outline, kept between builds of one process
+DERIVED_ENTRIES = 4096
+
+
+def path_arrays(segments):
+    """(ops, coords) arrays of absolute segments; arcs are expanded to cubics."""
+    ops = bytearray()
+    coords = []
+    for cmd, args in expand_arcs(segments):
+        ops.append(OPCODES[cmd])
+        coords.extend(args)
+    return np.frombuffer(bytes(ops), dtype=np.uint8), np.array(coords, dtype=float)
+
+
+def segments_of(record):
+    """A record's geometry as absolute (command, args) segments."""
+    coords = record['coords'].tolist()
+    segments = []
+    pos = 0
+    for op in record['ops'].tolist():
+        cmd = COMMANDS[op]
+        count = ARG_COUNTS[cmd]
+        segments.append((cmd, coords[pos:pos + count]))
+        pos += count
+    return segments
+
+
+def path_fields(segments):
+    """JSON-safe geometry of absolute segments for a cached result: 'ops', 'coords' and 'bounds'."""
+    ops, coords = path_arrays(segments)
+    bounds = exact_bounds(segments)
+    return {
+        'ops': ''.join(COMMANDS[op] for op in ops.tolist()),
+        'coords': coords.tolist(),
+        'bounds': list(bounds) if bounds is not None else None,
+    }
+
+
+def make_record(callout_id, name, path, segments, view_box, source, images=(), signature=None, parts=()):
+    """A model record for already parsed `segments` (see the layout above)."""
+    ops, coords = path_arrays(segments)
+    return {
+        'id': callout_id, 'name': name, 'path': path,
+        'ops': ops, 'coords': coords, 'bounds': exact_bounds(segments),
+        'viewBox': view_box, 'images': list(images), 'source': source,
+        'signature': signature, 'parts': list(parts),
+    }
+
+
+def record_from_result(result):
+    """Model record of a cached or fresh process_file() result."""
+    record = dict(result)
+    record['ops'] = np.array([OPCODES[cmd] for cmd in result['ops']], dtype=np.uint8)
+    record['coords'] = np.array(result['coords'], dtype=float)
+    record['bounds'] = tuple(result['bounds']) if result['bounds'] is not None else None
+    return record
+
+
+def _number(text):
+    """A TS number literal as an int when it has no fraction, else a float."""
+    value = float(text)
+    return int(value) if value.is_integer() and '.' not in text else value
+
+
+def load_hand_written(entries):
+    """
+    Records of the hand-written entries in `entries`, TS object-literal
+    source like the generator's EXISTING_ENTRIES block, in source order.
+    viewBox numbers keep the type they are written with.
+    """
+    records = []
+    group = None
+    previous_end = 0
+    for match in HAND_WRITTEN_RE.finditer(entries):
+        headers = GROUP_RE.findall(entries, previous_end, match.start())
+        if headers:
+            group = headers[-1]
+        previous_end = match.end()
+        callout_id, name, path = match.group(1, 2, 3)
+        width, height, offset_x, offset_y = (_number(v) for v in match.group(4, 5, 6, 7))
+        view_box = {'width': width, 'height': height, 'offsetX': offset_x, 'offsetY': offset_y}
+        source = {'kind': 'hand_written', 'line': entries.count('\n', 0, match.start()) + 1, 'group': group}
+        records.append(make_record(callout_id, name, path, parse_path(path), view_box, source))
+    return records
+
+
+def json_record(record, **extra):
+    """JSON-safe form of a record for the JSON registry, plus `extra` fields."""
+    data = {
+        'id': record['id'], 'name': record['name'], 'path': record['path'],
+        'viewBox': record['viewBox'],
+        'bounds': list(record['bounds']) if record['bounds'] is not None else None,
+        'source': record['source'],
+    }
+    if record.get('images'):
+        data['images'] = record['images']
+    data.update((key, value) for key, value in extra.items() if value is not None)
+    return data
+
+
+class Derived:
+    """
+    Memo for products derived from an outline (packed bytes, hit maps,
+    signatures, ...), keyed by the product and the path data, so watch-mode
+    rebuilds only redo the callouts that changed. Least recently used
+    entries go first once `size` is reached.
+    """
+
+    def __init__(self, size=DERIVED_ENTRIES):
+        self.size = size
+        self.entries = collections.OrderedDict()
+
+    def get(self, kind, record, compute, *args):
+        """compute(record, *args), or the value it gave for the same kind, path and args."""
+        key = (kind, record['path'], args)
+        try:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        except KeyError:
+            pass
+        value = self.entries[key] = compute(record, *args)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+        return value
@@ -0,0 +1,88 @@
+import struct
+
+import numpy as np
+
+# Binary callout geometry, decoded in the app by src/modes/comic/data/CalloutGeometry.ts.
+# All values are little-endian:
+#
+#   0   magic       b'CLG1'
+#   4   u8          coordinate format (FORMAT_F32 or FORMAT_I16)
+#   5   3 bytes     reserved (zero)
+#   8   u32         opcode count
+#   12  u32         coordinate count
+#   16  f32         scale (i16 only: coordinate = value * scale)
+#   20  u8[ops]     one opcode per segment, see OPCODES
+#       ...         zero padding up to a multiple of 4
+#       f32/i16[coords]  x, y pairs in segment order
+#
+# Coordinates are absolute and arcs must already be expanded to cubics.
+
+MAGIC = b'CLG1'
+HEADER = struct.Struct('<4sB3xIIf')
+
+FORMAT_F32 = 0
+FORMAT_I16 = 1
+FORMATS = {'f32': FORMAT_F32, 'i16': FORMAT_I16}
+
+OPCODES = {'M': 0, 'L': 1, 'C': 2, 'Q': 3, 'Z': 4}
+COMMANDS = {op: cmd for cmd, op in OPCODES.items()}
+ARG_COUNTS = {'M': 2, 'L': 2, 'C': 6, 'Q': 4, 'Z': 0}
+
+I16_MAX = 32767
+
+
+def pack_geometry(segments, coord_format='i16'):
+    """
+    Packs absolute M/L/C/Q/Z segments. With 'i16' coordinates are scaled to
+    the full signed 16-bit range of the shape's largest |coordinate|, which
+    for an origin-anchored callout is a step of about extent / 32767.
+    """
+    ops = bytearray()
+    coords = []
+    for cmd, args in segments:
+        if cmd not in OPCODES:
+            raise ValueError(f"Cannot pack segment '{cmd}' (expand arcs first)")
+        ops.append(OPCODES[cmd])
+        coords.extend(args)
+    return pack_arrays(np.frombuffer(bytes(ops), dtype=np.uint8), np.array(coords, dtype=float), coord_format)
+
+
+def pack_arrays(ops, coords, coord_format='i16'):
+    """pack_geometry() of segments already held as uint8 opcodes and float64 coordinates."""
+    fmt = FORMATS[coord_format]
+    scale = 1.0
+    if fmt == FORMAT_I16:
+        largest = float(np.abs(coords).max()) if len(coords) else 0.0
+        scale = largest / I16_MAX if largest else 1.0
+        # Round-trip through f32 so encoder and decoder agree on the step
+        scale = struct.unpack('<f', struct.pack('<f', scale))[0]
+        body = np.clip(np.rint(coords / scale), -I16_MAX, I16_MAX).astype('<i2').tobytes()
+    else:
+        body = coords.astype('<f4').tobytes()
+
+    padding = b'\0' * (-(HEADER.size + len(ops)) % 4)
+    header = HEADER.pack(MAGIC, fmt, len(ops), len(coords), scale)
+    return header + ops.tobytes() + padding + body
+
+
+def unpack_geometry(data):
+    """Inverse of pack_geometry(); returns absolute segments."""
+    magic, fmt, op_count, coord_count, scale = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a packed callout geometry buffer")
+    ops = data[HEADER.size:HEADER.size + op_count]
+    offset = HEADER.size + op_count
+    offset += -offset % 4
+    if fmt == FORMAT_I16:
+        coords = [v * scale for v in struct.unpack_from(f'<{coord_count}h', data, offset)]
+    else:
+        coords = list(struct.unpack_from(f'<{coord_count}f', data, offset))
+
+    segments = []
+    pos = 0
+    for op in ops:
+        cmd = COMMANDS[op]
+        count = ARG_COUNTS[cmd]
+        segments.append((cmd, coords[pos:pos + count]))
+        pos += count
+    return segments
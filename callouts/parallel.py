@@ -0,0 +1,67 @@
+import collections
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+def default_jobs():
+    return os.cpu_count() or 1
+
+
+def run_per_file(func, items, jobs=1):
+    """
+    Runs `func(item)` for every item and yields (index, result, error) as each
+    one finishes. `error` is the exception raised by `func`, or None.
+
+    With jobs <= 1 everything runs in-process, in order. Otherwise the work is
+    spread over a process pool and results arrive in completion order; callers
+    that need a stable output should slot them back in by index. `func` must
+    be a module-level function so it can be pickled.
+    """
+    items = list(items)
+    if jobs <= 1 or len(items) <= 1:
+        for index, item in enumerate(items):
+            try:
+                yield index, func(item), None
+            except Exception as e:
+                yield index, None, e
+        return
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(items))) as pool:
+        futures = {pool.submit(func, item): index for index, item in enumerate(items)}
+        for future in as_completed(futures):
+            error = future.exception()
+            result = None if error else future.result()
+            yield futures[future], result, error
+
+
+def run_in_order(func, items, jobs=1, window=None):
+    """
+    Like run_per_file(), but for long or endless iterables: items are drawn
+    lazily, at most `window` (default 2 * jobs) are in flight at a time, and
+    results are yielded in input order. Memory stays flat however many items
+    there are, and the caller may stop consuming at any point.
+    """
+    if jobs <= 1:
+        for index, item in enumerate(items):
+            try:
+                yield index, func(item), None
+            except Exception as e:
+                yield index, None, e
+        return
+
+    def finished(index, future):
+        error = future.exception()
+        return index, None if error else future.result(), error
+
+    window = window or 2 * jobs
+    pool = ProcessPoolExecutor(max_workers=jobs)
+    pending = collections.deque()
+    try:
+        for index, item in enumerate(items):
+            pending.append((index, pool.submit(func, item)))
+            if len(pending) >= window:
+                yield finished(*pending.popleft())
+        while pending:
+            yield finished(*pending.popleft())
+    finally:
+        pool.shutdown(cancel_futures=True)
@@ -0,0 +1,638 @@
+import math
+import re
+
+# Path data is modelled as a list of absolute segments: (command, [numbers])
+#   'M' [x, y]            'L' [x, y]
+#   'C' [x1, y1, x2, y2, x, y]
+#   'Q' [x1, y1, x, y]
+#   'A' [rx, ry, rotation, large_arc, sweep, x, y]
+#   'Z' []
+# Relative commands, H/V and the S/T shorthands are expanded while parsing.
+
+PARAM_COUNTS = {'M': 2, 'L': 2, 'H': 1, 'V': 1, 'C': 6, 'S': 4, 'Q': 4, 'T': 2, 'A': 7, 'Z': 0}
+
+COMMAND_RE = re.compile(r'[\s,]*([MmZzLlHhVvCcSsQqTtAa])')
+NUMBER_RE = re.compile(r'[\s,]*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)')
+FLAG_RE = re.compile(r'[\s,]*([01])')
+TRAILING_RE = re.compile(r'[\s,]*')
+
+# Samples per segment when measuring how far a merged curve drifts
+MERGE_SAMPLES = 8
+
+# Affine transforms are SVG matrix() 6-tuples: (a, b, c, d, e, f) maps
+# (x, y) to (a*x + c*y + e, b*x + d*y + f).
+IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+TRANSFORM_RE = re.compile(r'(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)')
+
+
+class PathSyntaxError(ValueError):
+    pass
+
+
+def tokenize(d):
+    """
+    Splits path data into (command, [numbers]) groups, one per implicit
+    repetition, keeping the original command letter (and so its relativity).
+    """
+    pos = 0
+    end = len(d)
+    groups = []
+    cmd = None
+    while True:
+        m = COMMAND_RE.match(d, pos)
+        if m:
+            cmd = m.group(1)
+            pos = m.end()
+        else:
+            if TRAILING_RE.match(d, pos).end() == end:
+                return groups
+            if cmd is None or cmd in 'Zz':
+                raise PathSyntaxError(f"Expected a command at offset {pos}")
+
+        count = PARAM_COUNTS[cmd.upper()]
+        if count == 0:
+            groups.append((cmd, []))
+            continue
+
+        args = []
+        for i in range(count):
+            # Arc flags may be written without separators ("a5 5 0 015 5")
+            regex = FLAG_RE if cmd in 'Aa' and i in (3, 4) else NUMBER_RE
+            m = regex.match(d, pos)
+            if not m:
+                raise PathSyntaxError(f"Expected a number for '{cmd}' at offset {pos}")
+            args.append(float(m.group(1)))
+            pos = m.end()
+        groups.append((cmd, args))
+        # A moveto followed by extra pairs continues as lineto
+        if cmd == 'M':
+            cmd = 'L'
+        elif cmd == 'm':
+            cmd = 'l'
+
+
+def parse_path(d):
+    """Parses path data into absolute segments (see module comment)."""
+    segments = []
+    x = y = 0.0
+    start_x = start_y = 0.0
+    # Reflection sources for S/T
+    last_ctrl = None
+    last_cmd = None
+
+    for cmd, args in tokenize(d):
+        upper = cmd.upper()
+        rel = cmd != upper
+        ox, oy = (x, y) if rel else (0.0, 0.0)
+
+        if upper == 'M':
+            x, y = args[0] + ox, args[1] + oy
+            start_x, start_y = x, y
+            segments.append(('M', [x, y]))
+        elif upper == 'Z':
+            x, y = start_x, start_y
+            segments.append(('Z', []))
+        elif upper == 'L':
+            x, y = args[0] + ox, args[1] + oy
+            segments.append(('L', [x, y]))
+        elif upper == 'H':
+            x = args[0] + ox
+            segments.append(('L', [x, y]))
+        elif upper == 'V':
+            y = args[0] + (y if rel else 0.0)
+            segments.append(('L', [x, y]))
+        elif upper in 'CS':
+            if upper == 'C':
+                x1, y1 = args[0] + ox, args[1] + oy
+                rest = args[2:]
+            else:
+                if last_cmd == 'C':
+                    x1, y1 = 2 * x - last_ctrl[0], 2 * y - last_ctrl[1]
+                else:
+                    x1, y1 = x, y
+                rest = args
+            x2, y2 = rest[0] + ox, rest[1] + oy
+            x, y = rest[2] + ox, rest[3] + oy
+            segments.append(('C', [x1, y1, x2, y2, x, y]))
+            last_ctrl = (x2, y2)
+        elif upper in 'QT':
+            if upper == 'Q':
+                x1, y1 = args[0] + ox, args[1] + oy
+                rest = args[2:]
+            else:
+                if last_cmd == 'Q':
+                    x1, y1 = 2 * x - last_ctrl[0], 2 * y - last_ctrl[1]
+                else:
+                    x1, y1 = x, y
+                rest = args
+            x, y = rest[0] + ox, rest[1] + oy
+            segments.append(('Q', [x1, y1, x, y]))
+            last_ctrl = (x1, y1)
+        elif upper == 'A':
+            x, y = args[5] + ox, args[6] + oy
+            segments.append(('A', args[:5] + [x, y]))
+
+        last_cmd = segments[-1][0]
+
+    return segments
+
+
+def multiply(m, n):
+    """Composes two transforms: the result applies `n` first, then `m`."""
+    a1, b1, c1, d1, e1, f1 = m
+    a2, b2, c2, d2, e2, f2 = n
+    return (
+        a1 * a2 + c1 * b2,
+        b1 * a2 + d1 * b2,
+        a1 * c2 + c1 * d2,
+        b1 * c2 + d1 * d2,
+        a1 * e2 + c1 * f2 + e1,
+        b1 * e2 + d1 * f2 + f1,
+    )
+
+
+def parse_transform(text):
+    """Parses an SVG transform attribute into a single affine 6-tuple."""
+    matrix = IDENTITY
+    for name, raw_args in TRANSFORM_RE.findall(text):
+        args = [float(v) for v in NUMBER_RE.findall(raw_args)]
+        if name == 'matrix' and len(args) == 6:
+            step = tuple(args)
+        elif name == 'translate' and args:
+            step = (1.0, 0.0, 0.0, 1.0, args[0], args[1] if len(args) > 1 else 0.0)
+        elif name == 'scale' and args:
+            step = (args[0], 0.0, 0.0, args[1] if len(args) > 1 else args[0], 0.0, 0.0)
+        elif name == 'rotate' and args:
+            angle = math.radians(args[0])
+            cos, sin = math.cos(angle), math.sin(angle)
+            step = (cos, sin, -sin, cos, 0.0, 0.0)
+            if len(args) == 3:
+                cx, cy = args[1], args[2]
+                step = multiply(multiply((1.0, 0.0, 0.0, 1.0, cx, cy), step), (1.0, 0.0, 0.0, 1.0, -cx, -cy))
+        elif name == 'skewX' and args:
+            step = (1.0, 0.0, math.tan(math.radians(args[0])), 1.0, 0.0, 0.0)
+        elif name == 'skewY' and args:
+            step = (1.0, math.tan(math.radians(args[0])), 0.0, 1.0, 0.0, 0.0)
+        else:
+            raise PathSyntaxError(f"Invalid transform: {name}({raw_args})")
+        matrix = multiply(matrix, step)
+    return matrix
+
+
+def arc_to_cubics(x1, y1, rx, ry, rotation, large_arc, sweep, x2, y2):
+    """
+    Converts an elliptical arc into cubic segment args, following the
+    endpoint-to-center conversion in the SVG spec (F.6.5) and splitting the
+    sweep into pieces of at most 90 degrees.
+    """
+    if (x1, y1) == (x2, y2):
+        return []
+    rx, ry = abs(rx), abs(ry)
+    if rx == 0 or ry == 0:
+        return [[x1, y1, x2, y2, x2, y2]]
+
+    phi = math.radians(rotation)
+    cos_phi, sin_phi = math.cos(phi), math.sin(phi)
+    dx, dy = (x1 - x2) / 2, (y1 - y2) / 2
+    x1p = cos_phi * dx + sin_phi * dy
+    y1p = -sin_phi * dx + cos_phi * dy
+
+    # Out-of-range radii are scaled up just enough to reach the end point
+    scale = (x1p * x1p) / (rx * rx) + (y1p * y1p) / (ry * ry)
+    if scale > 1:
+        rx *= math.sqrt(scale)
+        ry *= math.sqrt(scale)
+
+    num = rx * rx * ry * ry - rx * rx * y1p * y1p - ry * ry * x1p * x1p
+    den = rx * rx * y1p * y1p + ry * ry * x1p * x1p
+    coef = math.sqrt(max(num, 0.0) / den) if den else 0.0
+    if bool(large_arc) == bool(sweep):
+        coef = -coef
+    cxp = coef * rx * y1p / ry
+    cyp = -coef * ry * x1p / rx
+    cx = cos_phi * cxp - sin_phi * cyp + (x1 + x2) / 2
+    cy = sin_phi * cxp + cos_phi * cyp + (y1 + y2) / 2
+
+    def angle(ux, uy, vx, vy):
+        return math.atan2(ux * vy - uy * vx, ux * vx + uy * vy)
+
+    theta = angle(1, 0, (x1p - cxp) / rx, (y1p - cyp) / ry)
+    delta = angle((x1p - cxp) / rx, (y1p - cyp) / ry, (-x1p - cxp) / rx, (-y1p - cyp) / ry)
+    if not sweep and delta > 0:
+        delta -= 2 * math.pi
+    elif sweep and delta < 0:
+        delta += 2 * math.pi
+
+    pieces = max(1, math.ceil(abs(delta) / (math.pi / 2) - 1e-9))
+    step = delta / pieces
+    k = 4 / 3 * math.tan(step / 4)
+
+    def point(t):
+        ex, ey = rx * math.cos(t), ry * math.sin(t)
+        return cos_phi * ex - sin_phi * ey + cx, sin_phi * ex + cos_phi * ey + cy
+
+    def tangent(t):
+        ex, ey = -rx * math.sin(t), ry * math.cos(t)
+        return cos_phi * ex - sin_phi * ey, sin_phi * ex + cos_phi * ey
+
+    cubics = []
+    for i in range(pieces):
+        t0 = theta + i * step
+        t1 = t0 + step
+        p0x, p0y = point(t0)
+        p3x, p3y = (x2, y2) if i == pieces - 1 else point(t1)
+        d0x, d0y = tangent(t0)
+        d1x, d1y = tangent(t1)
+        cubics.append([p0x + k * d0x, p0y + k * d0y, p3x - k * d1x, p3y - k * d1y, p3x, p3y])
+    return cubics
+
+
+def expand_arcs(segments):
+    """Returns the segments with every arc replaced by equivalent cubics."""
+    out = []
+    x = y = 0.0
+    start_x = start_y = 0.0
+    for cmd, args in segments:
+        if cmd == 'A':
+            out.extend(('C', cubic) for cubic in arc_to_cubics(x, y, *args))
+        else:
+            out.append((cmd, args))
+        if cmd == 'Z':
+            x, y = start_x, start_y
+        else:
+            x, y = args[-2], args[-1]
+            if cmd == 'M':
+                start_x, start_y = x, y
+    return out
+
+
+def transform_segments(segments, matrix):
+    """
+    Applies an affine transform to absolute segments. Arcs are converted to
+    cubics first, since a general affine map does not keep them arcs.
+    """
+    a, b, c, d, e, f = matrix
+    out = []
+    for cmd, args in expand_arcs(segments):
+        mapped = []
+        for i in range(0, len(args), 2):
+            px, py = args[i], args[i + 1]
+            mapped.append(a * px + c * py + e)
+            mapped.append(b * px + d * py + f)
+        out.append((cmd, mapped))
+    return out
+
+
+def iter_points(segments):
+    """Yields every coordinate pair (end points and control points)."""
+    for cmd, args in segments:
+        if cmd == 'A':
+            yield args[5], args[6]
+        else:
+            for i in range(0, len(args), 2):
+                yield args[i], args[i + 1]
+
+
+def extent(segments):
+    """Largest side of the control-point bounding box (0 for an empty path)."""
+    xs = []
+    ys = []
+    for x, y in iter_points(segments):
+        xs.append(x)
+        ys.append(y)
+    if not xs:
+        return 0.0
+    return max(max(xs) - min(xs), max(ys) - min(ys))
+
+
+def _segment_distance(px, py, ax, ay, bx, by):
+    dx = bx - ax
+    dy = by - ay
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return math.hypot(px - ax, py - ay)
+    t = ((px - ax) * dx + (py - ay) * dy) / length_sq
+    t = max(0.0, min(1.0, t))
+    return math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def douglas_peucker(points, tolerance):
+    """
+    Returns (kept_indices, max_deviation) for a polyline, always keeping
+    both end points. Iterative so very long runs cannot hit the recursion limit.
+    """
+    n = len(points)
+    if n < 3:
+        return list(range(n)), 0.0
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    deviation = 0.0
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        ax, ay = points[first]
+        bx, by = points[last]
+        worst = 0.0
+        worst_index = -1
+        for i in range(first + 1, last):
+            dist = _segment_distance(points[i][0], points[i][1], ax, ay, bx, by)
+            if dist > worst:
+                worst = dist
+                worst_index = i
+        if worst > tolerance:
+            keep[worst_index] = True
+            stack.append((first, worst_index))
+            stack.append((worst_index, last))
+        else:
+            deviation = max(deviation, worst)
+    return [i for i in range(n) if keep[i]], deviation
+
+
+def _cubic_point(p, t):
+    mt = 1 - t
+    a = mt * mt * mt
+    b = 3 * mt * mt * t
+    c = 3 * mt * t * t
+    e = t * t * t
+    return (a * p[0] + b * p[2] + c * p[4] + e * p[6],
+            a * p[1] + b * p[3] + c * p[5] + e * p[7])
+
+
+def _flat_curve_deviation(start, args):
+    """
+    Distance from a Bézier's control points to its chord. The curve lies in
+    the control hull, so this bounds how far replacing it with a line moves it.
+    """
+    ex, ey = args[-2], args[-1]
+    return max(_segment_distance(args[i], args[i + 1], start[0], start[1], ex, ey)
+               for i in range(0, len(args) - 2, 2))
+
+
+def _try_merge_cubics(start, first, second, tolerance):
+    """
+    Attempts to replace two consecutive cubics with one by undoing a de
+    Casteljau split. Returns (merged_args, deviation) or None.
+    """
+    p0 = start
+    a1 = first[0:2]
+    a2 = first[2:4]
+    p3 = first[4:6]
+    b1 = second[0:2]
+    b2 = second[2:4]
+    p6 = second[4:6]
+
+    # The join must be smooth: both handles on one line through p3
+    ux, uy = p3[0] - a2[0], p3[1] - a2[1]
+    vx, vy = b1[0] - p3[0], b1[1] - p3[1]
+    lu = math.hypot(ux, uy)
+    lv = math.hypot(vx, vy)
+    if lu == 0 or lv == 0:
+        return None
+    if (ux * vx + uy * vy) / (lu * lv) < 0.999:
+        return None
+
+    len1 = math.hypot(p3[0] - p0[0], p3[1] - p0[1])
+    len2 = math.hypot(p6[0] - p3[0], p6[1] - p3[1])
+    if len1 + len2 == 0:
+        return None
+    t = len1 / (len1 + len2)
+    if t <= 0 or t >= 1:
+        return None
+
+    q1 = (p0[0] + (a1[0] - p0[0]) / t, p0[1] + (a1[1] - p0[1]) / t)
+    q2 = (p6[0] + (b2[0] - p6[0]) / (1 - t), p6[1] + (b2[1] - p6[1]) / (1 - t))
+    merged = [q1[0], q1[1], q2[0], q2[1], p6[0], p6[1]]
+
+    whole = [p0[0], p0[1]] + merged
+    left = [p0[0], p0[1]] + list(first)
+    right = [p3[0], p3[1]] + list(second)
+    deviation = 0.0
+    for i in range(1, MERGE_SAMPLES):
+        s = i / MERGE_SAMPLES
+        for part, u in ((left, t * s), (right, t + (1 - t) * s)):
+            mx, my = _cubic_point(whole, u)
+            px, py = _cubic_point(part, s)
+            deviation = max(deviation, math.hypot(mx - px, my - py))
+            if deviation > tolerance:
+                return None
+    return merged, deviation
+
+
+def simplify(segments, tolerance):
+    """
+    Tolerance-based simplification of absolute segments:
+      * Béziers whose control points sit within `tolerance` of their chord
+        become straight lines,
+      * smooth runs of cubics are merged while the merged curve stays within
+        `tolerance` of the original,
+      * runs of lines are thinned with Douglas-Peucker.
+    Each segment carries the error already spent on it, so later passes only
+    use what is left of the budget. Returns (segments, max_deviation) where
+    the deviation is estimated from samples of the input geometry
+    (MERGE_SAMPLES per merged curve), not a strict bound.
+    """
+    deviation = 0.0
+
+    # Pass 1: flatten near-straight curves
+    flattened = []
+    current = (0.0, 0.0)
+    start = current
+    for cmd, args in segments:
+        error = 0.0
+        if cmd in ('C', 'Q'):
+            dev = _flat_curve_deviation(current, args)
+            if dev <= tolerance:
+                cmd, args, error = 'L', args[-2:], dev
+        flattened.append((cmd, args, error))
+        if cmd == 'M':
+            start = (args[0], args[1])
+        current = start if cmd == 'Z' else (args[-2], args[-1])
+
+    # Pass 2: merge smooth cubic runs
+    merged = []
+    current = (0.0, 0.0)
+    start = current
+    curve_start = None
+    for cmd, args, error in flattened:
+        if cmd == 'C' and curve_start is not None and merged[-1][0] == 'C':
+            _, previous, curve_error = merged[-1]
+            attempt = _try_merge_cubics(curve_start, previous, args, tolerance - curve_error)
+            if attempt is not None:
+                merged_args, dev = attempt
+                merged[-1] = ('C', merged_args, curve_error + dev)
+                current = (args[4], args[5])
+                continue
+        curve_start = current if cmd == 'C' else None
+        merged.append((cmd, args, error))
+        if cmd == 'M':
+            start = (args[0], args[1])
+        current = start if cmd == 'Z' else (args[-2], args[-1])
+
+    # Pass 3: Douglas-Peucker over each run of consecutive lines
+    result = []
+    run = []
+    run_error = 0.0
+    run_start = current = (0.0, 0.0)
+    start = current
+
+    def flush_run():
+        nonlocal deviation
+        if not run:
+            return
+        points = [run_start] + run
+        kept, dev = douglas_peucker(points, tolerance - run_error)
+        deviation = max(deviation, dev + run_error)
+        for i in kept[1:]:
+            result.append(('L', list(points[i])))
+        run.clear()
+
+    for cmd, args, error in merged:
+        if cmd == 'L':
+            if not run:
+                run_start = current
+                run_error = 0.0
+            run.append((args[0], args[1]))
+            run_error = max(run_error, error)
+        else:
+            flush_run()
+            deviation = max(deviation, error)
+            result.append((cmd, args))
+        if cmd == 'M':
+            start = (args[0], args[1])
+        current = start if cmd == 'Z' else (args[-2], args[-1])
+    flush_run()
+
+    return result, deviation
+
+
+def precision_for(tolerance):
+    """Fewest decimal places whose rounding step does not exceed `tolerance`."""
+    if tolerance <= 0:
+        return 3
+    return max(0, math.ceil(-math.log10(tolerance)))
+
+
+def _format_number(value, precision):
+    text = f"{value:.{precision}f}"
+    if '.' in text:
+        text = text.rstrip('0').rstrip('.')
+    if text.startswith('0.'):
+        text = text[1:]
+    elif text.startswith('-0.'):
+        text = '-' + text[2:]
+    if text in ('-0', '', '-'):
+        text = '0'
+    return text
+
+
+def _join_numbers(numbers):
+    out = []
+    previous = ''
+    for text in numbers:
+        # Separators are only needed where the parser could not tell the
+        # numbers apart: "-" always starts a new one, and so does a second
+        # "." after a number that already has one.
+        if out and not (text[0] == '-' or (text[0] == '.' and '.' in previous)):
+            out.append(' ')
+        out.append(text)
+        previous = text
+    return ''.join(out)
+
+
+def quantize(segments, precision):
+    """Rounds every coordinate to `precision` decimal places (arc flags are left alone)."""
+    quantized = []
+    for cmd, args in segments:
+        if cmd == 'A':
+            args = [round(v, precision) for v in args[:3]] + args[3:5] + [round(v, precision) for v in args[5:]]
+        else:
+            args = [round(v, precision) for v in args]
+        quantized.append((cmd, args))
+    return quantized
+
+
+def serialize(segments, precision):
+    """
+    Writes segments back out as compact path data. Each segment uses
+    whichever of its absolute or relative form is shorter, and repeated
+    command letters are omitted.
+    """
+    out = []
+    previous_letter = None
+    x = y = 0.0
+    start_x = start_y = 0.0
+    for cmd, args in segments:
+        if cmd == 'Z':
+            out.append('Z')
+            previous_letter = 'Z'
+            x, y = start_x, start_y
+            continue
+
+        if cmd == 'A':
+            absolute = list(args)
+            relative = args[:5] + [args[5] - x, args[6] - y]
+            fmt = lambda values: [
+                _format_number(v, precision) if i not in (3, 4) else str(int(v))
+                for i, v in enumerate(values)
+            ]
+        else:
+            absolute = list(args)
+            relative = [v - (x if i % 2 == 0 else y) for i, v in enumerate(args)]
+            fmt = lambda values: [_format_number(v, precision) for v in values]
+
+        abs_text = _join_numbers(fmt(absolute))
+        rel_text = _join_numbers(fmt(relative))
+        if len(rel_text) < len(abs_text):
+            letter, text = cmd.lower(), rel_text
+        else:
+            letter, text = cmd, abs_text
+
+        # An implicit repeat after M means L, so never elide after a moveto
+        if letter == previous_letter and letter not in 'Mm':
+            if text[0] != '-':
+                out.append(' ')
+            out.append(text)
+        else:
+            out.append(letter + text)
+        previous_letter = letter
+
+        x, y = args[-2], args[-1]
+        if cmd == 'M':
+            start_x, start_y = x, y
+
+    return ''.join(out)
+
+
+def optimize_segments(segments, rel_tolerance, precision=None):
+    """
+    Simplifies, quantizes and serializes absolute segments.
+
+    `rel_tolerance` is the allowed deviation as a fraction of the path's
+    largest side; `precision` is the number of decimals to keep (derived from
+    the tolerance when None). Rounding and simplification share the tolerance,
+    so the reported deviation stays within it unless `precision` is too coarse
+    on its own. Returns (path, stats) where stats carries the output size,
+    segment counts and the sampled maximum deviation in path units.
+    """
+    tolerance = rel_tolerance * extent(segments)
+    if precision is None:
+        precision = precision_for(tolerance / 2)
+
+    # Rounding a point by half a step per axis moves it at most this far,
+    # and curves move no further than their control points. Whatever is left
+    # of the tolerance is the budget for simplification.
+    rounding = 0.5 * 10 ** -precision * math.sqrt(2)
+    simplified, deviation = simplify(segments, max(tolerance - rounding, 0.0))
+    quantized = quantize(simplified, precision)
+    path = serialize(quantized, precision)
+
+    stats = {
+        'bytes_after': len(path.encode('utf-8')),
+        'segments_before': len(segments),
+        'segments_after': len(quantized),
+        'max_deviation': deviation + rounding,
+        'tolerance': tolerance,
+        'precision': precision,
+    }
+    return path, stats
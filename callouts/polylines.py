@@ -0,0 +1,104 @@
+import math
+
+import numpy as np
+
+# Curve flattening and scanline winding numbers shared by the thumbnail
+# renderer and the hit-test maps. Polylines are (n, 2) NumPy arrays, one per
+# subpath, and are treated as closed.
+
+# Largest distance between a curve and its flattened polyline, in output units
+FLATNESS = 0.2
+
+
+def _curve_steps(points, degree, flatness):
+    # Wang's formula: enough steps that no chord strays further than `flatness`
+    diffs = points[:-2] - 2 * points[1:-1] + points[2:]
+    largest = float(np.max(np.hypot(diffs[:, 0], diffs[:, 1]))) if len(diffs) else 0.0
+    return max(1, math.ceil(math.sqrt(degree * (degree - 1) / 8 * largest / flatness)))
+
+
+def flatten(segments, scale=1.0, offset=(0.0, 0.0), flatness=FLATNESS):
+    """
+    Flattens arc-free absolute segments into one (n, 2) array per subpath,
+    after mapping each point to (p - offset) * scale. Curves are subdivided
+    finely enough for `flatness` in the scaled units.
+    """
+    ox, oy = offset
+    polylines = []
+    current = []
+    x = y = 0.0
+    start_x = start_y = 0.0
+    for cmd, args in segments:
+        if cmd == 'M':
+            if len(current) > 1:
+                polylines.append(np.array(current))
+            x, y = args
+            start_x, start_y = x, y
+            current = [((x - ox) * scale, (y - oy) * scale)]
+        elif cmd == 'Z':
+            # The fill closes every subpath anyway; only the pen moves back
+            x, y = start_x, start_y
+        elif cmd == 'L':
+            x, y = args
+            current.append(((x - ox) * scale, (y - oy) * scale))
+        elif cmd in ('Q', 'C'):
+            control = np.array([(x, y)] + list(zip(args[0::2], args[1::2])), dtype=float)
+            control = (control - (ox, oy)) * scale
+            degree = len(control) - 1
+            t = np.linspace(0.0, 1.0, _curve_steps(control, degree, flatness) + 1)[1:, None]
+            mt = 1 - t
+            if degree == 2:
+                pts = mt * mt * control[0] + 2 * mt * t * control[1] + t * t * control[2]
+            else:
+                pts = (mt ** 3 * control[0] + 3 * mt * mt * t * control[1]
+                       + 3 * mt * t * t * control[2] + t ** 3 * control[3])
+            current.extend(map(tuple, pts))
+            x, y = args[-2], args[-1]
+        else:
+            raise ValueError(f"Unsupported segment '{cmd}' (expand arcs first)")
+    if len(current) > 1:
+        polylines.append(np.array(current))
+    return polylines
+
+
+def winding_numbers(polylines, width, height):
+    """
+    Integer (height, width) winding numbers of the points (col + 0.5,
+    row + 0.5) with respect to the closed `polylines`.
+
+    Every edge is intersected with every scanline it spans at once. A
+    crossing changes the winding number of all points to its right by +1
+    or -1 (by edge direction), so summing crossings per (row, first point
+    right of the crossing) and taking a running sum along each row gives
+    the winding number directly, without sorting intersections.
+    """
+    if not polylines:
+        return np.zeros((height, width), dtype=np.int64)
+    starts = np.concatenate(polylines)
+    ends = np.concatenate([np.roll(p, -1, axis=0) for p in polylines])
+    x0, y0 = starts[:, 0], starts[:, 1]
+    x1, y1 = ends[:, 0], ends[:, 1]
+
+    # Scanlines run through row + 0.5; an edge covers the rows whose centre
+    # lies in [y_min, y_max), so shared vertices count once.
+    low = np.ceil(np.minimum(y0, y1) - 0.5).astype(np.int64)
+    high = np.ceil(np.maximum(y0, y1) - 0.5).astype(np.int64)
+    low = np.clip(low, 0, height)
+    high = np.clip(high, 0, height)
+    counts = np.maximum(high - low, 0)
+    total = int(counts.sum())
+    acc_width = width + 1
+    if not total:
+        return np.zeros((height, width), dtype=np.int64)
+
+    edge = np.repeat(np.arange(len(counts)), counts)
+    first = np.cumsum(counts) - counts
+    rows = low[edge] + (np.arange(total) - first[edge])
+    t = (rows + 0.5 - y0[edge]) / (y1[edge] - y0[edge])
+    xs = x0[edge] + t * (x1[edge] - x0[edge])
+    cols = np.clip(np.ceil(xs - 0.5), 0, width).astype(np.int64)
+    direction = np.where(y1[edge] > y0[edge], 1.0, -1.0)
+
+    crossings = np.bincount(rows * acc_width + cols, weights=direction, minlength=height * acc_width)
+    winding = np.cumsum(crossings.reshape(height, acc_width)[:, :width], axis=1)
+    return np.rint(winding).astype(np.int64)
@@ -0,0 +1,141 @@
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+from urllib.parse import unquote_to_bytes
+
+# Decodes inline `data:` image payloads to files as they stream past
+# (see DataHrefFilter in callouts.extract). Base64 is decoded a block at a
+# time and hashed on the way to disk, so neither the encoded nor the decoded
+# image is ever held in memory whole. Files are named after their content
+# hash: an image embedded in several callouts is written once.
+
+DIGEST_SIZE = 20
+# Longest `data:` header we wait for, e.g. "image/svg+xml;charset=utf-8;base64,"
+MAX_HEADER = 256
+
+EXTENSIONS = {
+    'image/png': 'png',
+    'image/jpeg': 'jpg',
+    'image/jpg': 'jpg',
+    'image/gif': 'gif',
+    'image/webp': 'webp',
+    'image/svg+xml': 'svg',
+}
+
+WHITESPACE_RE = re.compile(rb'\s+')
+
+
+class RasterSink:
+    """
+    Receives one payload at a time through start() / data() / end() and
+    writes it to `image_dir` as <blake2b digest>.<ext>. Each finished
+    payload is appended to `payloads` as a dict with the 'file' name,
+    'mime' type and decoded 'bytes', or with an 'error' if it could not
+    be decoded.
+    """
+
+    def __init__(self, image_dir):
+        self.image_dir = image_dir
+        self.payloads = []
+        self._reset()
+
+    def _reset(self):
+        self.header = b''
+        self.mime = None
+        self.base64 = False
+        self.carry = b''
+        self.hasher = None
+        self.file = None
+        self.temp_path = None
+        self.size = 0
+        self.error = None
+
+    def start(self):
+        self._reset()
+
+    def data(self, chunk):
+        if self.error:
+            return
+        if self.mime is None:
+            self.header += chunk
+            comma = self.header.find(b',')
+            if comma == -1:
+                if len(self.header) > MAX_HEADER:
+                    self.error = "Unterminated data: header"
+                return
+            self._open(self.header[:comma].decode('ascii', 'replace'))
+            chunk, self.header = self.header[comma + 1:], b''
+            if self.error:
+                return
+
+        if not self.base64:
+            # Percent-encoded payloads are rare and small (inline SVG); they
+            # are collected and unquoted at the end.
+            self.carry += chunk
+            return
+
+        data = self.carry + WHITESPACE_RE.sub(b'', chunk)
+        usable = len(data) - len(data) % 4
+        self.carry = data[usable:]
+        if usable:
+            try:
+                self._write(binascii.a2b_base64(data[:usable]))
+            except binascii.Error as e:
+                self.error = f"Invalid base64: {e}"
+
+    def end(self):
+        try:
+            if not self.error and self.mime is None:
+                self.error = "Missing data: header"
+            if not self.error:
+                try:
+                    tail = binascii.a2b_base64(self.carry) if self.base64 else unquote_to_bytes(self.carry)
+                    self._write(tail)
+                except binascii.Error as e:
+                    self.error = f"Invalid base64: {e}"
+            if self.error:
+                self.payloads.append({'error': self.error})
+                return
+
+            self.file.close()
+            name = f"{self.hasher.hexdigest()}.{EXTENSIONS[self.mime]}"
+            # Same name means same bytes, so replacing a copy written by
+            # another worker (or an earlier build) is harmless.
+            os.replace(self.temp_path, os.path.join(self.image_dir, name))
+            self.temp_path = None
+            self.payloads.append({'file': name, 'mime': self.mime, 'bytes': self.size})
+        finally:
+            self.discard()
+
+    def discard(self):
+        """Drops a half-written payload (also used when parsing fails)."""
+        if self.file is not None and not self.file.closed:
+            self.file.close()
+        if self.temp_path is not None:
+            os.remove(self.temp_path)
+        self._reset()
+
+    def _open(self, header):
+        parts = header.split(';')
+        mime = parts[0].strip().lower()
+        if mime not in EXTENSIONS:
+            self.error = f"Unsupported image type '{mime or 'text/plain'}'"
+            return
+        self.mime = mime
+        self.base64 = 'base64' in (p.strip().lower() for p in parts[1:])
+        self.hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+        os.makedirs(self.image_dir, exist_ok=True)
+        fd, self.temp_path = tempfile.mkstemp(dir=self.image_dir, prefix='.tmp-')
+        self.file = os.fdopen(fd, 'wb')
+        # mkstemp files are private; published assets should not be
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(self.temp_path, 0o666 & ~umask)
+
+    def _write(self, data):
+        if data:
+            self.hasher.update(data)
+            self.file.write(data)
+            self.size += len(data)
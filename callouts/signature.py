@@ -0,0 +1,222 @@
+import hashlib
+
+import numpy as np
+
+from callouts.bounds import exact_bounds
+
+# Shape signatures for spotting duplicate callouts. Each outline is sampled
+# into a fixed number of points spaced evenly along its length and
+# stretched onto the unit square, which removes translation and scale
+# (independently per axis). Two callouts whose signatures agree are the
+# same geometry up to an axis-aligned affine transform, optionally with a
+# mirror, so one can be stored once and the other drawn through a matrix.
+#
+# Outlines are compared point for point, so matches assume both shapes
+# start at the same corner and run the same way round, which holds for
+# exported copies and mirrored variants of one drawing.
+
+SAMPLES = 64
+CURVE_STEPS = 16
+# Grid of the exact hash, in unit-square coordinates
+HASH_GRID = 1024
+EPSILON = 1e-9
+
+# Mirrors as (flip x, flip y); tried in this order
+MIRRORS = {
+    'none': (False, False),
+    'x': (True, False),
+    'y': (False, True),
+    'xy': (True, True),
+}
+
+
+def _polyline(segments):
+    """Densely samples arc-free absolute segments into (points, breaks)."""
+    points = []
+    breaks = []
+    x = y = 0.0
+    start_x = start_y = 0.0
+    steps = np.linspace(0.0, 1.0, CURVE_STEPS + 1)[1:]
+    for cmd, args in segments:
+        if cmd == 'M':
+            x, y = args
+            start_x, start_y = x, y
+            breaks.append(len(points))
+            points.append((x, y))
+        elif cmd == 'Z':
+            x, y = start_x, start_y
+            points.append((x, y))
+        elif cmd == 'L':
+            x, y = args
+            points.append((x, y))
+        elif cmd == 'Q':
+            x1, y1, x2, y2 = args
+            mt = 1 - steps
+            points.extend(zip(mt * mt * x + 2 * mt * steps * x1 + steps * steps * x2,
+                              mt * mt * y + 2 * mt * steps * y1 + steps * steps * y2))
+            x, y = x2, y2
+        elif cmd == 'C':
+            x1, y1, x2, y2, x3, y3 = args
+            mt = 1 - steps
+            a, b, c, d = mt ** 3, 3 * mt * mt * steps, 3 * mt * steps * steps, steps ** 3
+            points.extend(zip(a * x + b * x1 + c * x2 + d * x3,
+                              a * y + b * y1 + c * y2 + d * y3))
+            x, y = x3, y3
+        else:
+            raise ValueError(f"Unsupported segment '{cmd}' (expand arcs first)")
+    return np.array(points, dtype=float).reshape(-1, 2), breaks
+
+
+def split_subpaths(segments):
+    """Splits absolute segments into one list per subpath (each starting with M)."""
+    subpaths = []
+    for cmd, args in segments:
+        if cmd == 'M' or not subpaths:
+            subpaths.append([])
+        subpaths[-1].append((cmd, args))
+    return subpaths
+
+
+def outline_signature(segments, samples=SAMPLES):
+    """
+    Signature of an arc-free absolute path: a dict with 'points', the
+    outline resampled to `samples` points on the unit square (flattened
+    x, y pairs), and the path's exact 'bounds' (min_x, min_y, width,
+    height) in its own coordinates. None for an empty path.
+    """
+    points, breaks = _polyline(segments)
+    if len(points) < 2:
+        return None
+
+    # Stretch onto the unit square before measuring length, so that arc
+    # length, and with it the sample positions, survive per-axis scaling.
+    lo = points.min(axis=0)
+    size = points.max(axis=0) - lo
+    # A straight horizontal or vertical outline keeps its zero extent
+    unit = (points - lo) / np.where(size > EPSILON, size, 1.0)
+
+    # The pen-up jump between subpaths counts as zero length so it never
+    # receives samples.
+    steps = np.hypot(*np.diff(unit, axis=0).T)
+    for index in breaks[1:]:
+        steps[index - 1] = 0.0
+    cumulative = np.concatenate([[0.0], np.cumsum(steps)])
+    total = cumulative[-1]
+    if total <= EPSILON:
+        return None
+
+    targets = np.linspace(0.0, total, samples)
+    index = np.clip(np.searchsorted(cumulative, targets, side='right') - 1, 0, len(steps) - 1)
+    length = steps[index]
+    frac = np.where(length > EPSILON, (targets - cumulative[index]) / np.where(length > EPSILON, length, 1.0), 0.0)
+    resampled = unit[index] + (unit[index + 1] - unit[index]) * frac[:, None]
+    min_x, min_y, max_x, max_y = exact_bounds(segments)
+    return {
+        'points': [round(float(v), 6) for v in resampled.ravel()],
+        'bounds': [min_x, min_y, max_x - min_x, max_y - min_y],
+    }
+
+
+def mirrored(points, mirror):
+    """Unit-square signature points under one of MIRRORS."""
+    flip_x, flip_y = MIRRORS[mirror]
+    pts = np.asarray(points, dtype=float).reshape(-1, 2).copy()
+    if flip_x:
+        pts[:, 0] = 1.0 - pts[:, 0]
+    if flip_y:
+        pts[:, 1] = 1.0 - pts[:, 1]
+    return pts.ravel()
+
+
+def exact_hash(points):
+    """Digest of signature points snapped to a 1 / HASH_GRID grid."""
+    grid = np.round(np.asarray(points, dtype=float) * HASH_GRID).astype('<i4')
+    return hashlib.blake2b(grid.tobytes(), digest_size=16).hexdigest()
+
+
+def match_transform(source, target, mirror):
+    """
+    Affine matrix (a, b, c, d, e, f) mapping the `source` shape's
+    coordinates onto `target`, given their signature bounds and the mirror
+    under which the signatures match.
+    """
+    flip_x, flip_y = MIRRORS[mirror]
+    sx0, sy0, sw, sh = source['bounds']
+    tx0, ty0, tw, th = target['bounds']
+
+    def axis(s0, ssize, t0, tsize, flip):
+        scale = tsize / ssize if ssize > EPSILON else 1.0
+        if flip:
+            return -scale, t0 + tsize + scale * s0
+        return scale, t0 - scale * s0
+
+    a, e = axis(sx0, sw, tx0, tw, flip_x)
+    d, f = axis(sy0, sh, ty0, th, flip_y)
+    return (a, 0.0, 0.0, d, e, f)
+
+
+class ShapeIndex:
+    """
+    Finds earlier shapes whose signatures match a new one. Exact matches
+    come from a hash lookup; near matches from locality-sensitive hashing
+    (random projections bucketed at a width tied to the tolerance), so a
+    query only measures the few shapes sharing a bucket instead of the
+    whole library. `tolerance` is the largest RMS distance between
+    matching signature points, as a fraction of the unit square.
+    """
+
+    def __init__(self, tolerance=0.01, mirror=False, samples=SAMPLES, tables=8, projections=4, seed=0):
+        self.tolerance = tolerance
+        self.mirrors = list(MIRRORS) if mirror else ['none']
+        self.samples = samples
+        rng = np.random.default_rng(seed)
+        dims = samples * 2
+        # Euclidean radius equivalent to the RMS tolerance
+        radius = max(tolerance, EPSILON) * np.sqrt(samples)
+        self.width = 4 * radius
+        self.planes = rng.standard_normal((tables, projections, dims))
+        self.offsets = rng.uniform(0, self.width, (tables, projections))
+        self.tables = [dict() for _ in range(tables)]
+        self.exact = {}
+        self.keys = []
+        self.vectors = []
+
+    def _buckets(self, vector):
+        codes = np.floor((self.planes @ vector + self.offsets) / self.width).astype(int)
+        return [tuple(row) for row in codes.tolist()]
+
+    def add(self, key, signature):
+        vector = np.asarray(signature['points'], dtype=float)
+        slot = len(self.keys)
+        self.keys.append(key)
+        self.vectors.append(vector)
+        self.exact.setdefault(exact_hash(vector), slot)
+        for table, bucket in zip(self.tables, self._buckets(vector)):
+            table.setdefault(bucket, []).append(slot)
+
+    def _rms(self, slot, vector):
+        # Distance per point, x and y together
+        return float(np.sqrt(np.mean((self.vectors[slot] - vector) ** 2) * 2))
+
+    def find(self, signature, exclude=None):
+        """
+        Best earlier match as (key, mirror, rms, exact), or None. Exact
+        matches win; otherwise the closest candidate within tolerance.
+        Shapes stored under `exclude` are ignored.
+        """
+        best = None
+        for mirror in self.mirrors:
+            vector = mirrored(signature['points'], mirror)
+            slot = self.exact.get(exact_hash(vector))
+            if slot is not None and self.keys[slot] != exclude:
+                return self.keys[slot], mirror, self._rms(slot, vector), True
+            candidates = set()
+            for table, bucket in zip(self.tables, self._buckets(vector)):
+                candidates.update(table.get(bucket, ()))
+            for slot in candidates:
+                if self.keys[slot] == exclude:
+                    continue
+                rms = self._rms(slot, vector)
+                if rms <= self.tolerance and (best is None or rms < best[2]):
+                    best = (self.keys[slot], mirror, rms, False)
+        return best
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import math
+import os
+
+import numpy as np
+
+from callouts.bounds import exact_bounds
+from callouts.cache import write_if_changed
+from callouts.parallel import run_per_file
+from callouts.polylines import flatten, winding_numbers
+
+# Text-safe areas: the largest axis-aligned rectangle and ellipse that fit
+# inside a callout's outline, so text can be laid out from a lookup rather
+# than measured against the shape. The outline is rasterized into a mask
+# (nonzero fill, like the registry paths are drawn, with enclosed holes
+# filled in); the rectangle comes from a row-by-row histogram search over
+# the mask and the ellipse from a distance transform, one per candidate
+# aspect ratio.
+
+# Mask resolution along the callout's longer side
+RESOLUTION = 96
+# Width / height ratios tried for the ellipse, 1:3 to 3:1
+ASPECTS = tuple(3 ** (i / 6) for i in range(-6, 7))
+# Largest distance between a curve and its flattened polyline, in mask pixels
+FLATNESS = 0.25
+
+
+def rasterize(segments):
+    """
+    Nonzero-fill mask of arc-free absolute segments with a background
+    border of one pixel, plus the path position of its top-left corner and
+    the pixel size. None for a path with no extent.
+    """
+    bounds = exact_bounds(segments)
+    if bounds is None:
+        return None
+    min_x, min_y, max_x, max_y = bounds
+    extent = max(max_x - min_x, max_y - min_y)
+    if extent <= 0:
+        return None
+    pixel = extent / RESOLUTION
+    width = max(1, math.ceil((max_x - min_x) / pixel)) + 2
+    height = max(1, math.ceil((max_y - min_y) / pixel)) + 2
+    origin = (min_x - pixel, min_y - pixel)
+    polylines = flatten(segments, 1 / pixel, origin, FLATNESS)
+    return winding_numbers(polylines, width, height) != 0, origin, pixel
+
+
+def _enclosed(mask):
+    """
+    `mask` plus every hole it encloses: the pixels the border cannot reach
+    through unset pixels, four-connected so a diagonal step in a thin
+    outline does not count as a gap.
+    """
+    outside = np.zeros_like(mask)
+    outside[0] = outside[-1] = True
+    outside[:, 0] = outside[:, -1] = True
+    outside &= ~mask
+    while True:
+        grown = outside.copy()
+        grown[1:] |= outside[:-1]
+        grown[:-1] |= outside[1:]
+        grown[:, 1:] |= outside[:, :-1]
+        grown[:, :-1] |= outside[:, 1:]
+        grown &= ~mask
+        if np.array_equal(grown, outside):
+            return ~outside
+        outside = grown
+
+
+def _erode(mask):
+    """Keeps the pixels whose eight neighbours are all set, so every kept pixel lies wholly inside."""
+    out = mask.copy()
+    out[1:] &= mask[:-1]
+    out[:-1] &= mask[1:]
+    grown = out.copy()
+    grown[:, 1:] &= out[:, :-1]
+    grown[:, :-1] &= out[:, 1:]
+    grown[0] = grown[-1] = False
+    grown[:, 0] = grown[:, -1] = False
+    return grown
+
+
+def largest_rectangle(mask):
+    """
+    (top, left, height, width) in pixels of the largest all-True rectangle
+    in `mask`. Each row extends per-column run heights and finds the best
+    rectangle under that histogram with a stack, in O(rows * columns).
+    """
+    best = (0, 0, 0, 0, 0)
+    heights = np.zeros(mask.shape[1], dtype=np.int64)
+    for row, line in enumerate(mask):
+        heights = np.where(line, heights + 1, 0)
+        stack = []
+        for col, height in enumerate(heights.tolist() + [0]):
+            start = col
+            while stack and stack[-1][1] >= height:
+                start, top = stack.pop()
+                area = top * (col - start)
+                if area > best[0]:
+                    best = (area, row - top + 1, start, top, col - start)
+            stack.append((start, height))
+    return best[1:]
+
+
+def _column_distances(mask):
+    """Distance in pixels from every pixel to the nearest unset pixel in its column."""
+    rows = np.arange(mask.shape[0], dtype=float)[:, None]
+    above = np.where(mask, -np.inf, rows)
+    above = np.maximum.accumulate(above, axis=0)
+    below = np.where(mask, np.inf, rows)
+    below = np.minimum.accumulate(below[::-1], axis=0)[::-1]
+    return np.minimum(rows - above, below - rows)
+
+
+def largest_ellipse(mask):
+    """
+    (cx, cy, rx, ry) in pixels of the largest axis-aligned ellipse inside
+    the set pixels of `mask`. Stretching x by 1 / aspect turns an ellipse of
+    that aspect into a circle, whose largest inscribed radius is the peak
+    of the Euclidean distance transform in the stretched grid; the
+    transform is exact and separable: per-column distances first, then the
+    lower envelope across each row, all rows at once.
+    """
+    # The background border keeps every column distance finite
+    squared = _column_distances(mask) ** 2
+    offsets = np.arange(mask.shape[1], dtype=float)
+    gaps = (offsets[:, None] - offsets[None, :]) ** 2
+    best = (0.0, 0.0, 0.0, 0.0, 0.0)
+    for aspect in ASPECTS:
+        # distances[row, x] = min over x' of columns[row, x']^2 + ((x - x') / aspect)^2
+        distances = (squared[:, None, :] + gaps[None] / (aspect * aspect)).min(axis=2)
+        row, col = np.unravel_index(np.argmax(distances), distances.shape)
+        # Measured between pixel centres; the outline may be up to half a pixel diagonal nearer
+        radius = math.sqrt(distances[row, col]) - 0.5 * math.hypot(1.0, 1.0 / aspect)
+        if radius > 0 and aspect * radius * radius > best[0]:
+            best = (aspect * radius * radius, float(col) + 0.5, float(row) + 0.5, aspect * radius, radius)
+    return best[1:]
+
+
+def text_area(segments):
+    """
+    Text-safe area of arc-free absolute segments in path units:
+    {'rect': [x, y, width, height], 'ellipse': [cx, cy, rx, ry]}, or None
+    for a path that encloses nothing.
+    """
+    raster = rasterize(segments)
+    if raster is None:
+        return None
+    mask, (ox, oy), pixel = raster
+    # Outlines drawn as a ring of ink (a stroke expanded into a filled path)
+    # leave the inside as a hole, which is where their text goes
+    enclosed = _enclosed(mask)
+    holes = enclosed & ~mask
+    region = holes if holes.sum() > mask.sum() else enclosed
+    top, left, height, width = largest_rectangle(_erode(region))
+    cx, cy, rx, ry = largest_ellipse(region)
+    if not width or not rx:
+        return None
+    return {
+        'rect': [ox + left * pixel, oy + top * pixel, width * pixel, height * pixel],
+        'ellipse': [ox + cx * pixel, oy + cy * pixel, rx * pixel, ry * pixel],
+    }
+
+
+def text_area_key(path, version):
+    """Cache key of one text area: its path data, the settings and `version`."""
+    settings = json.dumps([RESOLUTION, ASPECTS, FLATNESS, version])
+    return hashlib.blake2b(f"{settings}\n{path}".encode('utf-8'), digest_size=20).hexdigest()
+
+
+def compute_text_areas(shapes, cache_file, version, jobs=1):
+    """
+    Text areas of `shapes`, a list of (id, SVG path data, arc-free absolute
+    segments of that path), as {id: area} (see text_area(); shapes
+    enclosing nothing are left out). Areas of unchanged paths come from `cache_file`; the others are computed in one
+    batch over `jobs` processes and the cache is rewritten with only the
+    current paths. Returns (areas, computed count).
+    """
+    try:
+        with open(cache_file, 'r') as f:
+            cached = json.load(f)
+    except (FileNotFoundError, ValueError):
+        cached = {}
+    keys = [text_area_key(path, version) for _, path, _ in shapes]
+    stale = []
+    for index, key in enumerate(keys):
+        # Identical outlines (mirrored tails often share one) are computed once
+        if key not in cached and all(keys[i] != key for i in stale):
+            stale.append(index)
+
+    for n, area, error in run_per_file(text_area, [shapes[i][2] for i in stale], jobs):
+        index = stale[n]
+        if error is not None:
+            print(f"Error computing the text area of {shapes[index][0]}: {error}")
+            continue
+        cached[keys[index]] = area
+
+    kept = {key: cached[key] for key in keys if key in cached}
+    os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+    write_if_changed(cache_file, json.dumps(kept, sort_keys=True) + "\n")
+    areas = {callout_id: kept[key] for (callout_id, _, _), key in zip(shapes, keys) if kept.get(key)}
+    return areas, len(stale)
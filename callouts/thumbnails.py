@@ -0,0 +1,221 @@
+import functools
+import hashlib
+import json
+import math
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from callouts.bounds import exact_bounds
+from callouts.parallel import run_per_file
+from callouts.polylines import flatten, winding_numbers
+
+# Callout thumbnails rendered with NumPy alone: curves are flattened into
+# polylines, filled scanline by scanline (nonzero or even-odd) on a
+# supersampled grid and averaged down for antialiasing, then packed into
+# one sprite atlas PNG (written with zlib, no imaging library involved).
+
+THUMB_SIZE = 96
+PADDING = 3
+SUPERSAMPLE = 4
+# Largest distance between a curve and its flattened polyline, in thumbnail pixels
+FLATNESS = 0.2
+FILL = (255, 255, 255)
+STROKE = (17, 17, 17)
+STROKE_WIDTH = 1.5
+# 'nonzero' is how SVG and canvas fill the registry paths by default; some
+# sources repeat every subpath, which 'evenodd' would cancel out entirely
+FILL_RULE = 'nonzero'
+
+ATLAS_WIDTH = 1024
+ATLAS_GAP = 1
+# zlib's default level: level 9 saves about a tenth of the bytes but takes ~9x as long
+PNG_LEVEL = 6
+# Decoded thumbnails kept in memory between builds of one process (watch mode)
+LOADED_THUMBNAILS = 4096
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def fill_polygons(polylines, width, height, rule=FILL_RULE):
+    """
+    Boolean (height, width) mask of the pixel centres inside `polylines`
+    under the 'nonzero' or 'evenodd' fill rule; each polyline is
+    implicitly closed.
+    """
+    winding = winding_numbers(polylines, width, height)
+    if rule == 'evenodd':
+        return (winding & 1).astype(bool)
+    return winding != 0
+
+
+def stroke_polylines(polylines, width, height, radius):
+    """
+    Boolean (height, width) mask of the pixels within about `radius` of
+    any edge of the closed `polylines`: points are laid along every edge at
+    most half a pixel apart and each is grown into a square of that radius.
+    """
+    mask = np.zeros((height, width), dtype=bool)
+    for line in polylines:
+        starts = line
+        ends = np.roll(line, -1, axis=0)
+        lengths = np.hypot(*(ends - starts).T)
+        steps = np.maximum(1, np.ceil(lengths * 2)).astype(np.int64)
+        edge = np.repeat(np.arange(len(line)), steps)
+        t = (np.arange(int(steps.sum())) - (np.cumsum(steps) - steps)[edge]) / steps[edge]
+        points = starts[edge] + t[:, None] * (ends[edge] - starts[edge])
+        cols = np.floor(points[:, 0]).astype(np.int64)
+        rows = np.floor(points[:, 1]).astype(np.int64)
+        keep = (cols >= 0) & (cols < width) & (rows >= 0) & (rows < height)
+        mask[rows[keep], cols[keep]] = True
+    return _grow(mask, radius)
+
+
+def _grow(mask, radius):
+    """Dilates a boolean mask by a (2 * radius + 1) square."""
+    out = mask.copy()
+    for axis in (0, 1):
+        grown = out.copy()
+        for step in range(1, radius + 1):
+            shifted = np.roll(out, step, axis=axis)
+            if axis == 0:
+                shifted[:step] = False
+            else:
+                shifted[:, :step] = False
+            grown |= shifted
+            shifted = np.roll(out, -step, axis=axis)
+            if axis == 0:
+                shifted[-step:] = False
+            else:
+                shifted[:, -step:] = False
+            grown |= shifted
+        out = grown
+    return out
+
+
+def render_thumbnail(segments):
+    """
+    RGBA uint8 thumbnail of arc-free absolute segments: the filled shape
+    with a thin outline, fitted into THUMB_SIZE with PADDING on each side
+    and antialiased by SUPERSAMPLE x SUPERSAMPLE coverage.
+    """
+    bounds = exact_bounds(segments)
+    if bounds is None:
+        return np.zeros((1, 1, 4), dtype=np.uint8)
+    min_x, min_y, max_x, max_y = bounds
+    extent = max(max_x - min_x, max_y - min_y, 1e-9)
+    scale = (THUMB_SIZE - 2 * PADDING) / extent
+    width = max(1, math.ceil((max_x - min_x) * scale) + 2 * PADDING)
+    height = max(1, math.ceil((max_y - min_y) * scale) + 2 * PADDING)
+
+    ss = SUPERSAMPLE
+    offset = (min_x - PADDING / scale, min_y - PADDING / scale)
+    polylines = flatten(segments, scale * ss, offset, FLATNESS)
+    inside = fill_polygons(polylines, width * ss, height * ss)
+    # The stroke follows the outlines themselves rather than the edge of the
+    # fill, so open or self-cancelling subpaths still show
+    band = stroke_polylines(polylines, width * ss, height * ss, max(1, round(STROKE_WIDTH * ss / 2)))
+
+    def coverage(mask):
+        return mask.reshape(height, ss, width, ss).mean(axis=(1, 3))
+
+    stroke = coverage(band)
+    fill = coverage(inside & ~band)
+    alpha = stroke + fill
+    safe = np.where(alpha > 0, alpha, 1.0)
+    rgb = (stroke[..., None] * STROKE + fill[..., None] * FILL) / safe[..., None]
+    rgba = np.concatenate([rgb, alpha[..., None] * 255], axis=2)
+    return np.round(rgba).astype(np.uint8)
+
+
+def encode_png(rgba):
+    """Encodes an (h, w, 4) uint8 array as a PNG, using the 'Up' filter on every row."""
+    height, width, _ = rgba.shape
+    rows = rgba.reshape(height, width * 4)
+    up = rows.copy()
+    up[1:] = rows[1:] - rows[:-1]  # uint8 arithmetic wraps, as the filter expects
+    raw = np.concatenate([np.full((height, 1), 2, dtype=np.uint8), up], axis=1).tobytes()
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return PNG_SIGNATURE + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(raw, PNG_LEVEL)) + chunk(b'IEND', b'')
+
+
+def thumbnail_key(path, version):
+    """Cache key of one thumbnail: its path data, the render settings and `version`."""
+    settings = json.dumps([THUMB_SIZE, PADDING, SUPERSAMPLE, FLATNESS, FILL, STROKE, STROKE_WIDTH,
+                           FILL_RULE, version])
+    return hashlib.blake2b(f"{settings}\n{path}".encode('utf-8'), digest_size=20).hexdigest()
+
+
+@functools.lru_cache(maxsize=LOADED_THUMBNAILS)
+def _load_thumbnail(filepath):
+    # Files are named by content key, so a loaded copy never goes stale
+    return np.load(filepath)
+
+
+def pack_shelves(sizes, atlas_width=ATLAS_WIDTH, gap=ATLAS_GAP):
+    """
+    Shelf-packs (width, height) boxes, tallest first; returns one (x, y) per
+    box in input order plus the atlas height.
+    """
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], i))
+    positions = [None] * len(sizes)
+    x = y = shelf = 0
+    for i in order:
+        w, h = sizes[i]
+        if x and x + w > atlas_width:
+            x, y, shelf = 0, y + shelf + gap, 0
+        positions[i] = (x, y)
+        x += w + gap
+        shelf = max(shelf, h)
+    return positions, y + shelf
+
+
+def build_atlas(shapes, cache_dir, version, jobs=1):
+    """
+    Renders `shapes`, a list of (id, SVG path data, arc-free absolute
+    segments of that path), into one atlas. Thumbnails whose geometry is
+    unchanged are loaded from `cache_dir` instead of being
+    rendered again; missing ones are rendered in `jobs` processes.
+    Returns (png bytes, {id: [x, y, width, height]}, rendered count).
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    keys = [thumbnail_key(path, version) for _, path, _ in shapes]
+    thumbs = [None] * len(shapes)
+    stale = []
+    for index, key in enumerate(keys):
+        try:
+            thumbs[index] = _load_thumbnail(os.path.join(cache_dir, f"{key}.npy"))
+        except (FileNotFoundError, ValueError):
+            stale.append(index)
+
+    for n, thumb, error in run_per_file(render_thumbnail, [shapes[i][2] for i in stale], jobs):
+        index = stale[n]
+        if error is not None:
+            print(f"Error rendering thumbnail for {shapes[index][0]}: {error}")
+            thumb = np.zeros((1, 1, 4), dtype=np.uint8)
+        else:
+            np.save(os.path.join(cache_dir, f"{keys[index]}.npy"), thumb)
+        thumbs[index] = thumb
+
+    # Thumbnails of callouts that are gone (or were re-rendered) are dropped
+    wanted = {f"{key}.npy" for key in keys}
+    for filename in os.listdir(cache_dir):
+        if filename.endswith('.npy') and filename not in wanted:
+            os.remove(os.path.join(cache_dir, filename))
+
+    sizes = [(t.shape[1], t.shape[0]) for t in thumbs]
+    positions, atlas_height = pack_shelves(sizes)
+    atlas_width = max((x + w for (x, _), (w, _) in zip(positions, sizes)), default=1)
+    atlas = np.zeros((max(atlas_height, 1), atlas_width, 4), dtype=np.uint8)
+    rects = {}
+    for (callout_id, _, _), thumb, (x, y) in zip(shapes, thumbs, positions):
+        h, w = thumb.shape[:2]
+        atlas[y:y + h, x:x + w] = thumb
+        rects[callout_id] = [x, y, w, h]
+    return encode_png(atlas), rects, len(stale)
@@ -0,0 +1,131 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+# Wakes the generators' --watch mode when files in a source directory change.
+# On Linux the kernel reports changes through inotify (called via ctypes, no
+# extra dependency); elsewhere, or where inotify is unavailable (e.g. some
+# network and container mounts), the directory is polled with stat().
+# Bursts of events, such as an editor saving a multi-MB export in many
+# writes, are debounced into one wake-up.
+
+POLL_INTERVAL = 0.25
+# Quiet time after the last event before a batch of changes is handed over
+DEBOUNCE = 0.1
+
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE)
+
+EVENT = struct.Struct('iIII')
+READ_SIZE = 64 * 1024
+
+
+def _open_inotify(directory):
+    """inotify descriptor watching `directory`; raises OSError if unavailable."""
+    libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    if not hasattr(libc, 'inotify_init1'):
+        raise OSError("inotify is not available on this platform")
+    fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    if fd < 0:
+        raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+    if libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK) < 0:
+        errno = ctypes.get_errno()
+        os.close(fd)
+        raise OSError(errno, f"Cannot watch {directory}")
+    return fd
+
+
+def _snapshot(directory):
+    stamps = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            stamps[entry.name] = (st.st_size, st.st_mtime_ns)
+    return stamps
+
+
+class DirectoryWatcher:
+    """
+    Watches the entries of one directory (not recursively). wait() blocks
+    until something changes and returns the names involved; `mode` is
+    'inotify' or 'polling'. The names are a hint only: callers should
+    still compare stamps, since a queue overflow reports no names at all.
+    """
+
+    def __init__(self, directory, poll=False, poll_interval=POLL_INTERVAL, debounce=DEBOUNCE):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.fd = None
+        if not poll:
+            try:
+                self.fd = _open_inotify(directory)
+            except (OSError, AttributeError, TypeError) as e:
+                print(f"inotify unavailable ({e}), polling {directory} instead")
+        self.mode = 'polling' if self.fd is None else 'inotify'
+        self.stamps = _snapshot(directory) if self.fd is None else None
+
+    def wait(self):
+        """Returns the set of changed names once events have stopped for `debounce` seconds."""
+        if self.fd is None:
+            return self._wait_polling()
+        names = set()
+        timeout = None
+        while True:
+            ready, _, _ = select.select([self.fd], [], [], timeout)
+            if not ready:
+                return names
+            names |= self._read_events()
+            timeout = self.debounce
+
+    def _read_events(self):
+        names = set()
+        try:
+            data = os.read(self.fd, READ_SIZE)
+        except BlockingIOError:
+            return names
+        offset = 0
+        while offset + EVENT.size <= len(data):
+            _, mask, _, length = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name and not mask & IN_Q_OVERFLOW:
+                names.add(os.fsdecode(name))
+        return names
+
+    def _wait_polling(self):
+        names = set()
+        interval = self.poll_interval
+        while True:
+            time.sleep(interval)
+            stamps = _snapshot(self.directory)
+            changed = {name for name in stamps.keys() | self.stamps.keys()
+                       if stamps.get(name) != self.stamps.get(name)}
+            self.stamps = stamps
+            if not changed and names:
+                return names
+            names |= changed
+            # Once something moved, keep checking at the debounce rate until it settles
+            interval = self.debounce if names else self.poll_interval
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
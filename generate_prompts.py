@@ -0,0 +1,405 @@
+import argparse
+import gzip
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+import re
+import sys
+import time
+
+from callouts.parallel import default_jobs, run_in_order
+
+# Batch character prompts for dataset and preview runs: every tag category of
+# the selected library tiers, plus the genre, is one axis of a combination
+# space. Combinations are numbered like itertools.product (last axis
+# fastest), so both modes only ever handle indices: 'product' walks them in
+# order, 'sample' draws them at random. Each one is compiled into a prompt
+# with the rules of src/utils/PromptCompiler.ts and streamed to JSONL.
+
+LIBRARY_FILE = "src/data/character_tag_library.json"
+GENRE_FILE = "src/data/GenreRegistry.json"
+OUTPUT_FILE = ".cache/prompts/character_prompts.jsonl"
+TIERS = ("tier_1_global", "tier_2_architecture", "tier_3_details")
+POLARITIES = ("positive", "negative", "neutral")
+# Constraint and record key of the genre axis
+GENRE_AXIS = "genre"
+
+# Combinations per worker task
+CHUNK_SIZE = 2000
+# Duplicate filter: prompts it is sized for (unless --count or the space is
+# smaller) and the rate of new prompts it wrongly drops at that size
+DEDUPE_CAPACITY = 10_000_000
+DEDUPE_ERROR_RATE = 0.0001
+# Sampling gives up after drawing this many times --count combinations
+MAX_DRAWS_PER_PROMPT = 20
+
+
+def hyphenate(text):
+    """PromptCompiler.hyphenate(): "warm brown eyes" -> "warm-brown-eyes"."""
+    if not text:
+        return ''
+    return re.sub(r'\s+', '-', text.strip()).lower()
+
+
+def compile_prompt(chips, manual_input=''):
+    """
+    PromptCompiler.compile(): the text of every chip that is not neutral
+    (positive and negative alike), then the comma-separated parts of
+    `manual_input` hyphenated, joined with ', '. Chips are (text, polarity).
+    """
+    texts = [text for text, polarity in chips if polarity != 'neutral']
+    manual = [hyphenate(part) for part in (p.strip() for p in manual_input.split(',')) if part]
+    return ', '.join(texts + manual)
+
+
+def load_genres(path):
+    """
+    Genres of GenreRegistry.json in file order. The file holds more than one
+    `"genres": [...]` list (a second registry was appended to the first
+    without merging), so each list is decoded on its own; a later genre
+    with an id already seen is dropped.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    decoder = json.JSONDecoder()
+    genres = {}
+    for match in re.finditer(r'"genres"\s*:\s*', text):
+        values, _ = decoder.raw_decode(text, match.end())
+        for genre in values:
+            genres.setdefault(genre['id'], genre)
+    return list(genres.values())
+
+
+def as_list(values):
+    """A constraint's values as a list; a bare string is one value, not its characters."""
+    if values is None:
+        return None
+    return [values] if isinstance(values, str) else list(values)
+
+
+def polarity_of(polarities, category, value):
+    """Polarity of one tag: set per 'category:Value', else per category, else positive."""
+    polarity = polarities.get(f"{category}:{value}", polarities.get(category, 'positive'))
+    if polarity not in POLARITIES:
+        raise ValueError(f"Unknown polarity '{polarity}' for {category}")
+    return polarity
+
+
+def build_space(library, genres, constraints=None):
+    """
+    The combination space of a tag library and genre list under
+    `constraints`, a dict that may hold:
+
+      'tiers'       tiers to draw categories from (default: all of TIERS)
+      'categories'  only these categories
+      'values'      {category or 'genre': [allowed values]}
+      'genres'      only these genre ids
+      'exclude'     partial combinations to skip, e.g.
+                    [{"gender": "Masculine", "lips": ["Bee-stung", "Pouty"]}]
+      'polarity'    {category or 'category:Value': 'positive' | 'negative' |
+                    'neutral'}; neutral tags are left out of the prompt like
+                    neutral chips, negative ones stay in it and are also
+                    listed in the record's 'negative' field
+
+    Any list may also be given as a single string. Unknown tiers,
+    categories and excluded values raise ValueError.
+
+    Returns a dict with the 'axes' [(name, values)], the compiled 'chips'
+    per axis and value, each genre's aiBias as its prompts' manual input
+    ('bias'), the
+    'exclude' rules as [(axis, {value index})], the 'radices' and the
+    'total' number of combinations.
+    """
+    constraints = constraints or {}
+    polarities = constraints.get('polarity', {})
+    only = as_list(constraints.get('categories'))
+    allowed = {name: as_list(values) for name, values in constraints.get('values', {}).items()}
+    tags = library['tag_library']
+
+    axes = []
+    chips = []
+    for tier in as_list(constraints.get('tiers', TIERS)):
+        if tier not in tags:
+            raise ValueError(f"Unknown tier '{tier}' (have {', '.join(tags)})")
+        for category, values in tags[tier].items():
+            if only is not None and category not in only:
+                continue
+            # A category that is neutral as a whole never reaches the prompt
+            if polarities.get(category) == 'neutral':
+                continue
+            values = [v for v in values if v in allowed.get(category, values)]
+            if not values:
+                raise ValueError(f"No values left for '{category}'")
+            axes.append((category, values))
+            chips.append([(hyphenate(v), polarity_of(polarities, category, v)) for v in values])
+
+    wanted = as_list(constraints.get('genres', allowed.get(GENRE_AXIS)))
+    genres = [g for g in genres if wanted is None or g['id'] in wanted]
+    if not genres:
+        raise ValueError("No genres left")
+    axes.insert(0, (GENRE_AXIS, [g['id'] for g in genres]))
+    chips.insert(0, [None] * len(genres))
+    bias = [g.get('aiBias', '') for g in genres]
+
+    names = [name for name, _ in axes]
+    known = {category for tier in tags.values() for category in tier} | {GENRE_AXIS}
+    unknown = (set(only or ()) | set(allowed)) - known
+    if unknown:
+        raise ValueError(f"Unknown categories: {', '.join(sorted(unknown))}")
+    exclude = []
+    for rule in constraints.get('exclude', ()):
+        matches = []
+        for name, values in rule.items():
+            if name not in names:
+                raise ValueError(f"Excluded category '{name}' is not an axis")
+            options = axes[names.index(name)][1]
+            missing = [v for v in as_list(values) if v not in options]
+            if missing:
+                raise ValueError(f"Excluded values not among the '{name}' options: {', '.join(missing)}")
+            matches.append((names.index(name), {options.index(v) for v in as_list(values)}))
+        exclude.append(matches)
+
+    radices = [len(values) for _, values in axes]
+    return {
+        'axes': axes, 'chips': chips, 'bias': bias, 'exclude': exclude,
+        'radices': radices, 'total': math.prod(radices),
+    }
+
+
+def decode(space, index):
+    """Value index per axis of combination `index`."""
+    choice = [0] * len(space['radices'])
+    for axis in range(len(choice) - 1, -1, -1):
+        index, choice[axis] = divmod(index, space['radices'][axis])
+    return choice
+
+
+def excluded(space, choice):
+    return any(all(choice[axis] in values for axis, values in rule) for rule in space['exclude'])
+
+
+def render(space, index, choice):
+    """(digest of the prompt, JSONL line) of one combination."""
+    chips = [space['chips'][axis][value] for axis, value in enumerate(choice) if axis]
+    prompt = compile_prompt(chips, space['bias'][choice[0]])
+    record = {
+        'index': index,
+        GENRE_AXIS: space['axes'][0][1][choice[0]],
+        'tags': {space['axes'][axis][0]: space['axes'][axis][1][value] for axis, value in enumerate(choice) if axis},
+        'prompt': prompt,
+        'negative': [text for text, polarity in chips if polarity == 'negative'],
+    }
+    digest = hashlib.blake2b(prompt.encode('utf-8'), digest_size=16).digest()
+    return digest, json.dumps(record, ensure_ascii=False)
+
+
+def run_chunk(task):
+    """
+    One worker task: ('product', space, start, stop) renders the combinations
+    start..stop-1, ('sample', space, seed, count) draws `count` of them with
+    a generator seeded by `seed`. Returns ([(digest, line)], excluded count).
+    """
+    mode, space, a, b = task
+    if mode == 'product':
+        indices = range(a, b)
+    else:
+        rng = random.Random(a)
+        indices = (rng.randrange(space['total']) for _ in range(b))
+    rendered = []
+    skipped = 0
+    for index in indices:
+        choice = decode(space, index)
+        if excluded(space, choice):
+            skipped += 1
+            continue
+        rendered.append(render(space, index, choice))
+    return rendered, skipped
+
+
+def tasks(space, mode, seed, chunk_size):
+    """Endless (for 'sample') or space-covering (for 'product') worker tasks."""
+    if mode == 'product':
+        for start in range(0, space['total'], chunk_size):
+            yield mode, space, start, min(start + chunk_size, space['total'])
+    else:
+        # Seeded per chunk, so the output does not depend on --jobs
+        for chunk in itertools.count():
+            yield mode, space, f"{seed}:{chunk}", chunk_size
+
+
+class BloomFilter:
+    """
+    Approximate set of 16-byte digests in a fixed number of bits, sized for
+    `capacity` items at a false positive rate of `error_rate`. A false
+    positive drops a prompt that was in fact new; a repeat never gets
+    through. Memory does not grow as items are added.
+    """
+
+    def __init__(self, capacity, error_rate=DEDUPE_ERROR_RATE):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def add(self, digest):
+        """Adds `digest`; False if it was (probably) in the set already."""
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        bits = self.bits
+        new = False
+        for i in range(self.hashes):
+            bit = (h1 + i * h2) % self.size
+            mask = 1 << (bit & 7)
+            if not bits[bit >> 3] & mask:
+                bits[bit >> 3] |= mask
+                new = True
+        self.count += new
+        return new
+
+    def false_positive_rate(self):
+        """Chance that a new digest is taken for a repeat, at the current fill."""
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+
+def open_output(path):
+    if path == '-':
+        return sys.stdout
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wt', encoding='utf-8')
+    return open(path, 'w', encoding='utf-8')
+
+
+def generate_prompts(mode="product", count=None, seed=0, constraints=None, output_file=OUTPUT_FILE,
+                     library_file=LIBRARY_FILE, genre_file=GENRE_FILE, jobs=1, chunk_size=CHUNK_SIZE,
+                     dedupe=True, dedupe_capacity=None):
+    """
+    Streams prompts to `output_file` (JSONL, gzipped for .gz, '-' for
+    stdout): in 'product' mode the whole space in order, in 'sample' mode
+    random combinations drawn with `seed`. Either stops after `count`
+    prompts (required for 'sample'). Chunks of `chunk_size` combinations
+    are compiled in `jobs` processes; the output is the same for any
+    `jobs`. With `dedupe`, repeated prompts are dropped through a
+    BloomFilter of `dedupe_capacity` prompts. Sampling draws combinations
+    again, and in either mode combinations that differ only in neutral
+    tags compile to the same prompt.
+    """
+    if mode == 'sample' and not count:
+        raise ValueError("Sampling needs a prompt count")
+    # Progress goes to stderr while the prompts themselves go to stdout
+    log = sys.stderr if output_file == '-' else sys.stdout
+    with open(library_file, 'r', encoding='utf-8') as f:
+        library = json.load(f)
+    space = build_space(library, load_genres(genre_file), constraints)
+    print(f"Space: {space['total']:,} combinations over {len(space['axes'])} axes"
+          f" ({', '.join(f'{name} {len(values)}' for name, values in space['axes'])})", file=log)
+
+    wanted = count if count else space['total']
+    seen = BloomFilter(dedupe_capacity or min(wanted, DEDUPE_CAPACITY)) if dedupe else None
+    max_draws = (count or 0) * MAX_DRAWS_PER_PROMPT
+    written = duplicates = skipped = drawn = 0
+    started = time.perf_counter()
+    out = open_output(output_file)
+    try:
+        for _, result, error in run_in_order(run_chunk, tasks(space, mode, seed, chunk_size), jobs):
+            if error is not None:
+                raise error
+            rendered, chunk_skipped = result
+            skipped += chunk_skipped
+            drawn += len(rendered) + chunk_skipped
+            for digest, line in rendered:
+                if seen is not None:
+                    if not seen.add(digest):
+                        duplicates += 1
+                        continue
+                    # Past its capacity the filter drops more and more new prompts
+                    if seen.count == seen.capacity + 1:
+                        print(f"Warning: more than {seen.capacity:,} prompts passed the duplicate filter, which"
+                              " is sized for that many; new prompts may be dropped from here on"
+                              " (raise --dedupe-capacity)", file=log)
+                out.write(line)
+                out.write('\n')
+                written += 1
+                if written == wanted:
+                    break
+            if written == wanted:
+                break
+            if mode == 'sample' and drawn >= max_draws:
+                print(f"Stopped after {drawn:,} draws: the space holds too few distinct prompts", file=log)
+                break
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    seconds = time.perf_counter() - started
+    # The filter cannot tell a repeat from a false positive, so its count is approximate
+    if seen is None:
+        dropped = "duplicates kept"
+    else:
+        dropped = (f"~{duplicates:,} duplicates dropped (Bloom filter, false positive rate"
+                   f" ~{seen.false_positive_rate():.1g})")
+    print(f"Prompts: {written:,} written, {dropped}, {skipped:,} excluded"
+          f" ({written / max(seconds, 1e-9):,.0f}/s) to {output_file}", file=log)
+    if seen is not None and seen.count > seen.capacity:
+        print(f"Warning: {seen.count:,} prompts passed a duplicate filter sized for {seen.capacity:,};"
+              " some new prompts were probably dropped", file=log)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream character prompts built from the tag library and"
+                                                 " genres to JSONL.")
+    parser.add_argument("--mode", choices=("product", "sample"), default="product",
+                        help="product: every combination in order; sample: seeded random combinations"
+                             " (default: %(default)s)")
+    parser.add_argument("--count", "-n", type=int,
+                        help="Stop after N prompts (required with --mode sample)")
+    parser.add_argument("--seed", default="0",
+                        help="Sampling seed (default: %(default)s)")
+    parser.add_argument("--constraints", metavar="FILE",
+                        help="JSON with tiers, categories, values, genres, exclude and polarity rules"
+                             " (see build_space())")
+    parser.add_argument("--tiers", nargs="+", choices=TIERS,
+                        help="Tiers to draw categories from (default: all; overrides --constraints)")
+    parser.add_argument("--categories", nargs="+",
+                        help="Only these categories (overrides --constraints)")
+    parser.add_argument("--genres", nargs="+",
+                        help="Only these genre ids (overrides --constraints)")
+    parser.add_argument("--output", default=OUTPUT_FILE,
+                        help="JSONL file to write, gzipped for .gz, '-' for stdout (default: %(default)s)")
+    parser.add_argument("--library", default=LIBRARY_FILE,
+                        help="Tag library (default: %(default)s)")
+    parser.add_argument("--genre-file", default=GENRE_FILE,
+                        help="Genre registry (default: %(default)s)")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help=f"Compile prompts in N worker processes (0 = one per CPU, {default_jobs()} here)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="Combinations per worker task (default: %(default)s)")
+    parser.add_argument("--dedupe", action=argparse.BooleanOptionalAction, default=True,
+                        help="Drop repeated prompts through a Bloom filter (default: on)")
+    parser.add_argument("--dedupe-capacity", type=int,
+                        help=f"Prompts the duplicate filter is sized for, at {DEDUPE_ERROR_RATE} false positives"
+                             f" (default: --count or the space size, at most {DEDUPE_CAPACITY:,})")
+    args = parser.parse_args()
+
+    constraints = {}
+    if args.constraints:
+        with open(args.constraints, 'r', encoding='utf-8') as f:
+            constraints = json.load(f)
+    for key in ('tiers', 'categories', 'genres'):
+        if getattr(args, key):
+            constraints[key] = getattr(args, key)
+    if args.mode == 'sample' and not args.count:
+        parser.error("--mode sample needs --count")
+    try:
+        generate_prompts(mode=args.mode, count=args.count, seed=args.seed, constraints=constraints,
+                         output_file=args.output, library_file=args.library, genre_file=args.genre_file,
+                         jobs=args.jobs or default_jobs(), chunk_size=args.chunk_size,
+                         dedupe=args.dedupe, dedupe_capacity=args.dedupe_capacity)
+    except ValueError as e:
+        parser.error(str(e))
@@ -1,12 +1,76 @@
+import argparse
+import functools
+import json
 import os
 import re
+import time
+import traceback
 import xml.etree.ElementTree as ET
 
+from callouts.cache import BuildCache, generator_version, write_if_changed
+from callouts.extract import extract_svg
+from callouts.hitmap import LOD_TOLERANCES, build_hitmap, pack_hitmap
+from callouts.model import Derived, json_record, load_hand_written, path_fields, record_from_result, segments_of
+from callouts.packed import FORMATS, pack_arrays
+from callouts.parallel import default_jobs, run_per_file
+from callouts.bounds import normalize_to_origin
+from callouts.instrument import NULL_RECORDER, print_summary, profile_call, recorder_for, write_report
+from callouts.pathdata import (PathSyntaxError, optimize_segments, parse_path, quantize, serialize,
+                               transform_segments)
+from callouts.signature import ShapeIndex, match_transform, outline_signature, split_subpaths
+from callouts.textarea import compute_text_areas
+from callouts.thumbnails import build_atlas
+from callouts.watch import DirectoryWatcher
+
 # Configuration
 SVG_DIR = "reference/Callouts Codes"
 OUTPUT_FILE = "src/modes/comic/data/CalloutRegistry.ts"
 
-# Existing manual entries (Copied from current file to preserve them)
+# Packed output mode: binary geometry files and the URL they are served from
+GEOMETRY_DIR = "public/assets/callouts"
+GEOMETRY_URL = "/assets/callouts"
+# Embedded raster images, extracted with --extract-images
+IMAGE_DIR = "public/assets/callouts/images"
+IMAGE_URL = "/assets/callouts/images"
+IMAGE_FILE_RE = re.compile(r'^[0-9a-f]{40}\.\w+$')
+# Picker thumbnails, built with --atlas: one sprite sheet plus the rectangle
+# of every callout in it
+ATLAS_FILE = "public/assets/callouts/atlas.png"
+ATLAS_URL = "/assets/callouts/atlas.png"
+ATLAS_MAP_FILE = "src/modes/comic/data/CalloutAtlas.json"
+THUMBNAIL_CACHE_DIR = ".cache/callouts/thumbnails"
+# Hit-test maps, built with --hit-maps: one packed file per callout plus the
+# id -> URL index the editor looks them up in
+HITMAP_DIR = "public/assets/callouts/hit"
+HITMAP_URL = "/assets/callouts/hit"
+HITMAP_INDEX_FILE = "src/modes/comic/data/CalloutHitMaps.json"
+# Every callout of the model as JSON, written with --json
+JSON_FILE = "src/modes/comic/data/CalloutRegistry.json"
+# Text-safe areas, added to every entry with --text-areas, cached by path
+TEXT_AREA_CACHE_FILE = ".cache/callouts/text_areas.json"
+TEXT_AREA_PRECISION = 4
+# cProfile stats saved by --profile without a file name
+PROFILE_FILE = ".cache/callouts/generate_registry.prof"
+
+# Cached entries are only reused while the code that produced them is unchanged
+GENERATOR_VERSION = generator_version(__file__)
+
+# Path simplification: allowed deviation as a fraction of each callout's
+# largest side, and decimals kept (None = derived from the tolerance).
+# 0.1% of a bubble drawn a few hundred pixels wide is well under a pixel.
+DEFAULT_TOLERANCE = 0.001
+DEFAULT_PRECISION = None
+# Decimals kept for sizes, and for coordinates when paths are not simplified
+RAW_PRECISION = 3
+
+# Duplicate detection: largest RMS distance between two shape signatures
+# (on the unit square) for them to count as the same outline, and decimals
+# kept in the transform of a deduplicated callout.
+DEFAULT_NEAR_TOLERANCE = 0.01
+TRANSFORM_PRECISION = 6
+
+# Hand-written entries (copied from the original registry). Loaded into model
+# records by hand_written(); every output is written from those records.
 EXISTING_ENTRIES = """    // --- OVALS (Standard Speech) ---
     // Professional Smooth Bezier
     'speech_oval_bl': {
@@ -110,138 +174,1001 @@ EXISTING_ENTRIES = """    // --- OVALS (Standard Speech) ---
         // Rendered with thick stroke likely
     }"""
 
-def process_files():
-    new_entries = []
+def process_file(filepath, simplify=None, image_dir=None, instrument=False):
+    """
+    Builds the registry entry for a single callout source.
+    `simplify` is None to only flatten and normalize the geometry, or a
+    dict with 'tolerance' and 'precision' for optimize_segments().
+    Embedded raster images are decoded into `image_dir`; without one,
+    sources containing images are skipped.
+    Returns a dict with the callout's 'id', 'name', 'path', its geometry
+    ('ops', 'coords' and 'bounds', see callouts.model.path_fields()),
+    'viewBox', raster 'images', shape 'signature' and subpath signatures
+    ('parts', only for multi-part outlines), a log 'message', and 'stats'
+    (None unless the path was simplified). Skipped files only get a
+    'message' and a short 'skipped' reason code.
+    With `instrument`, the result also carries a 'report': time and
+    counters per stage, or why the file was skipped (see
+    callouts.instrument).
+    """
+    filename = os.path.basename(filepath)
+    recorder = recorder_for(filename, instrument)
+
+    def skipped(reason, message):
+        recorder.skip(reason, message)
+        result = {'message': f"Skipping {filename}: {message}", 'skipped': reason}
+        if instrument:
+            result['report'] = recorder.as_dict()
+        return result
+
+    # Stream the SVG out of the markdown wrapper. Embedded raster payloads
+    # are either decoded straight to image files or skipped without being
+    # read into memory, in which case we stop at the first one since the
+    # file is discarded anyway.
+    try:
+        with recorder.stage('extract'):
+            svg = extract_svg(filepath, stop_at_image=image_dir is None, image_dir=image_dir)
+    except ET.ParseError as e:
+        return skipped('xml_error', f"XML Parse Error: {e}")
+    if instrument:
+        recorder.note('extract', bytes_in=os.path.getsize(filepath))
+
+    if svg is None:
+        return skipped('no_svg', "No SVG tag found")
+
+    # Check for raster image
+    if svg['has_image'] and image_dir is None:
+        return skipped('raster_image', "Contains raster image")
+
+    paths = svg['paths']
+    recorder.note('extract', paths=len(paths), images=len(svg['images']), image_bytes=svg['image_bytes'])
     
-    if not os.path.exists(SVG_DIR):
-        print(f"Directory not found: {SVG_DIR}")
-        return
+    if not paths:
+        return skipped('no_paths', "No paths found")
+
+    # Bake every ancestor transform into the coordinates and move the shape
+    # so its exact (curve-aware) bounding box starts at the origin. The
+    # viewBox below is then the real size of the callout.
+    try:
+        with recorder.stage('parse'):
+            parsed = [parse_path(d) for d in paths]
+    except PathSyntaxError as e:
+        return skipped('invalid_path', f"Invalid path data: {e}")
+    recorder.note('parse', segments=sum(len(p) for p in parsed))
+    with recorder.stage('transform'):
+        segments = []
+        for path_segments, matrix in zip(parsed, svg['transforms']):
+            segments.extend(transform_segments(path_segments, matrix))
+        geometry = normalize_to_origin(segments)
+    if geometry is None:
+        return skipped('no_paths', "No paths found")
+    segments, vb_width, vb_height, (origin_x, origin_y) = geometry
+
+    # Rasters keep their place relative to the outline: same shift to the origin
+    images = []
+    for image in svg['images']:
+        if 'error' in image:
+            return skipped('invalid_image', f"Invalid embedded image: {image['error']}")
+        a, b, c, d, e, f = image['matrix']
+        placement = {
+            'src': f"{IMAGE_URL}/{image['file']}" if 'file' in image else image['href'],
+            'width': image['width'], 'height': image['height'],
+            'transform': [round(v, TRANSFORM_PRECISION) + 0.0 for v in (a, b, c, d, e - origin_x, f - origin_y)],
+        }
+        # The same image is often drawn several times under different clip
+        # paths; clips are not carried over, so the copies are identical.
+        if placement not in images:
+            images.append(placement)
+
+    stats = None
+    with recorder.stage('serialize'):
+        if simplify is not None:
+            full_path, stats = optimize_segments(segments, simplify['tolerance'], simplify['precision'])
+            stats['bytes_before'] = sum(len(d.encode('utf-8')) for d in paths) + len(paths) - 1
+        else:
+            full_path = serialize(quantize(segments, RAW_PRECISION), RAW_PRECISION)
+        # Packed output stores exactly what the path string says
+        segments = parse_path(full_path)
+    recorder.note('serialize', segments=len(segments), bytes_out=len(full_path))
+    with recorder.stage('signature'):
+        subpaths = split_subpaths(segments)
+        parts = [outline_signature(sub) for sub in subpaths] if len(subpaths) > 1 else []
+        signature = outline_signature(segments)
+    recorder.note('signature', subpaths=len(subpaths))
+    
+    # Create ID and Name
+    base_name = os.path.splitext(filename)[0]
+    # normalize id: svg16 -> svg_16 or just svg16
+    callout_id = base_name.replace(' ', '_').lower()
+    callout_name = f"Imported {base_name}"
+    
+    # The registry anchors callouts on their center
+    vb_width = round(vb_width, RAW_PRECISION)
+    vb_height = round(vb_height, RAW_PRECISION)
+    view_box = {
+        'width': vb_width, 'height': vb_height,
+        'offsetX': round(vb_width / 2, RAW_PRECISION), 'offsetY': round(vb_height / 2, RAW_PRECISION),
+    }
+
+    message = f"Processed {filename}: {callout_id}"
+    if images:
+        message += f" (+{len(images)} image{'s' if len(images) > 1 else ''})"
+    if stats is not None:
+        message += (f" ({stats['bytes_before']} -> {stats['bytes_after']} bytes,"
+                    f" sampled max deviation {stats['max_deviation']:.3g})")
+    result = {
+        'id': callout_id, 'name': callout_name, 'path': full_path,
+        **path_fields(segments), 'viewBox': view_box, 'images': images,
+        'source': {'kind': 'import', 'file': filename},
+        'signature': signature, 'parts': [p for p in parts if p],
+        'message': message, 'stats': stats,
+    }
+    if instrument:
+        result['report'] = recorder.as_dict()
+    return result
+
+
+def format_view_box(view_box):
+    return (f"{{ width: {view_box['width']}, height: {view_box['height']},"
+            f" offsetX: {view_box['offsetX']}, offsetY: {view_box['offsetY']} }}")
 
-    files = sorted(os.listdir(SVG_DIR))
-    for filename in files:
-        if not filename.endswith(".md"):
+
+def format_transform(callout, references):
+    """The `transform:` line of a deduplicated callout, or ''."""
+    reference = references.get(callout['id'])
+    if not reference or reference['transform'] is None:
+        return ""
+    values = ", ".join(str(v) for v in reference['transform'])
+    return f"\n        transform: [{values}],"
+
+
+def format_text_area(area):
+    rect = ", ".join(str(v) for v in area['rect'])
+    ellipse = ", ".join(str(v) for v in area['ellipse'])
+    return f"{{ rect: [{rect}], ellipse: [{ellipse}] }}"
+
+
+def format_callout_text_area(callout, text_areas):
+    """The `textArea:` line of a callout with a text area, or ''."""
+    area = text_areas.get(callout['id'])
+    if area is None:
+        return ""
+    return f"\n        textArea: {format_text_area(area)},"
+
+
+def format_images(callout):
+    """The `images:` line of a callout with raster layers, or ''."""
+    if not callout.get('images'):
+        return ""
+    layers = ", ".join(
+        f"{{ src: '{image['src']}', width: {image['width']}, height: {image['height']},"
+        f" transform: [{', '.join(str(v) for v in image['transform'])}] }}"
+        for image in callout['images'])
+    return f"\n        images: [{layers}],"
+
+
+@functools.lru_cache(maxsize=1)
+def hand_written():
+    """
+    Model records of the EXISTING_ENTRIES block (see callouts.model), with
+    their outline signatures. Parsed once per process.
+    """
+    records = load_hand_written(EXISTING_ENTRIES)
+    for record in records:
+        record['signature'] = outline_signature(segments_of(record))
+    return records
+
+
+def every_callout(callouts):
+    """
+    Every callout the registry ends up with, once: the hand-written records
+    no imported callout replaces, then the imported `callouts`.
+    """
+    imported = {c['id'] for c in callouts}
+    return [c for c in hand_written() if c['id'] not in imported] + list(callouts)
+
+
+def format_entry(callout, geometry, references, text_areas):
+    """
+    One CALLOUTS entry: id and name, the `geometry` field(s) (`path: ...`
+    or `geometry: ..., thumbnail: ...`), the optional transform, images and
+    textArea lines, then the viewBox.
+    """
+    return f"""    '{callout['id']}': {{
+        id: '{callout['id']}', name: '{callout['name']}',
+        {geometry},{format_transform(callout, references)}{format_images(callout)}{format_callout_text_area(callout, text_areas)}
+        viewBox: {format_view_box(callout['viewBox'])}
+    }}"""
+
+
+def hand_written_entries(callouts, text_areas):
+    """
+    The CALLOUTS entries of the hand-written records (see every_callout()),
+    inline paths under their `// --- GROUP ---` section comments.
+    """
+    imported = {c['id'] for c in callouts}
+    entries = []
+    group = None
+    for callout in hand_written():
+        if callout['id'] in imported:
             continue
-            
-        filepath = os.path.join(SVG_DIR, filename)
-        try:
-            with open(filepath, 'r') as f:
-                content = f.read()
-                
-            # Extract SVG content
-            svg_match = re.search(r'<svg.*?</svg>', content, re.DOTALL)
-            if not svg_match:
-                print(f"Skipping {filename}: No SVG tag found")
-                continue
-                
-            svg_content = svg_match.group(0)
-            
-            # Check for raster image
-            if "<image" in svg_content:
-                print(f"Skipping {filename}: Contains raster image")
-                continue
-                
-            # Parse SVG
-            # Remove namespace prefixes for easier parsing if necessary, 
-            # but ElementTree handles them with some friction. 
-            # We'll just strip xmlns for simplicity in this script
-            svg_content_clean = re.sub(r' xmlns="[^"]+"', '', svg_content)
-            svg_content_clean = re.sub(r' xmlns:xlink="[^"]+"', '', svg_content_clean)
-            
-            try:
-                root = ET.fromstring(svg_content_clean)
-            except ET.ParseError as e:
-                print(f"Skipping {filename}: XML Parse Error: {e}")
-                continue
+        entry = format_entry(callout, f'path: "{callout["path"]}"', {}, text_areas)
+        if callout['source']['group'] != group:
+            group = callout['source']['group']
+            entry = ("\n" if entries else "") + f"    // --- {group} ---\n" + entry
+        entries.append(entry)
+    return ",\n".join(entries)
+
+
+def find_duplicates(callouts, dedupe="off", tolerance=DEFAULT_NEAR_TOLERANCE, mirror=False):
+    """
+    Indexes every outline (hand-written entries first, then the imported
+    ones in order), prints a similarity report, and returns {id: reference}
+    for imported callouts that may reuse an earlier imported geometry:
+    exact matches with dedupe='exact', near ones too with 'near'. A
+    reference is a dict with the shared callout's 'ref' id and the
+    'transform' from its coordinates to this callout's (None for identity).
+    Only shapes that store their own geometry are indexed, so every match
+    points straight at the copy that is kept.
+    """
+    index = ShapeIndex(tolerance=tolerance, mirror=mirror)
+    imported = {c['id']: c for c in callouts}
+    lines = []
+    references = {}
+    repeats = 0
+
+    def describe(key, match, relation):
+        ref, mirror_used, rms, exact = match
+        line = f"  {key} {relation} {ref}" + ("" if exact else f" (rms {rms:.4f})")
+        if mirror_used != 'none':
+            line += f", mirrored {mirror_used}"
+        return line
+
+    for callout in hand_written():
+        key, signature = callout['id'], callout['signature']
+        if signature is None:
+            continue
+        match = index.find(signature)
+        if match is None:
+            index.add(key, signature)
+            continue
+        repeats += 1
+        lines.append(describe(key, match, '=' if match[3] else '~'))
 
-            # Extract Dimensions/ViewBox
-            viewBox = root.get('viewBox')
-            width = root.get('width')
-            height = root.get('height')
-            
-            vb_width = 0
-            vb_height = 0
-            vb_x = 0
-            vb_y = 0
-            
-            if viewBox:
-                parts = [float(x) for x in viewBox.replace(',', ' ').split() if x.strip()]
-                if len(parts) == 4:
-                    vb_x, vb_y, vb_width, vb_height = parts
-            
-            if vb_width == 0 and width:
-                vb_width = float(width.replace('px', ''))
-            if vb_height == 0 and height:
-                vb_height = float(height.replace('px', ''))
-                
-            # Extract Paths
-            paths = []
-            
-            # Helper to recursively find paths
-            def find_paths(element):
-                if element.tag.endswith('path'):
-                    d = element.get('d')
-                    if d:
-                        paths.append(d)
-                for child in element:
-                    find_paths(child)
-                    
-            find_paths(root)
-            
-            if not paths:
-                print(f"Skipping {filename}: No paths found")
+    for callout in callouts:
+        signature = callout.get('signature')
+        if signature is None:
+            continue
+        match = index.find(signature)
+        if match is not None:
+            repeats += 1
+            line = describe(callout['id'], match, '=' if match[3] else '~')
+            ref, mirror_used, _, exact = match
+            if ref in imported and (dedupe == 'near' or (dedupe == 'exact' and exact)):
+                transform = match_transform(imported[ref]['signature'], signature, mirror_used)
+                transform = [round(v, TRANSFORM_PRECISION) + 0.0 for v in transform]
+                if transform == [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]:
+                    transform = None
+                references[callout['id']] = {'ref': ref, 'transform': transform}
+                line += " [stored as reference]"
+            lines.append(line)
+            if callout['id'] in references:
                 continue
-                
-            # Combine paths
-            full_path = " ".join(paths)
-            
-            # Create ID and Name
-            base_name = os.path.splitext(filename)[0]
-            # normalize id: svg16 -> svg_16 or just svg16
-            callout_id = base_name.replace(' ', '_').lower()
-            callout_name = f"Imported {base_name}"
-            
-            # Calculate Center Offset (Approximation)
-            # Existing registry uses offset from top-left to "center" or "tail origin"?
-            # Actually, `offsetX` and `offsetY` in the registry seem to be the center point of the bubble relative to the viewBox
-            # effectively half width/height usually.
-            
-            offset_x = vb_width / 2
-            offset_y = vb_height / 2
-            
-            entry = f"""    '{callout_id}': {{
-        id: '{callout_id}', name: '{callout_name}',
-        path: "{full_path}",
-        viewBox: {{ width: {vb_width}, height: {vb_height}, offsetX: {offset_x}, offsetY: {offset_y} }}
-    }}"""
-            new_entries.append(entry)
-            print(f"Processed {filename}: {callout_id}")
-            
-        except Exception as e:
-            print(f"Error processing {filename}: {e}")
-
-    # Generate File Content
-    final_content = f"""
+        index.add(callout['id'], signature)
+
+    # Outlines reused inside a larger, multi-part callout
+    shared = 0
+    for callout in callouts:
+        contained = {}
+        for part in callout.get('parts') or ():
+            match = index.find(part, exclude=callout['id'])
+            if match is not None:
+                shared += 1
+                contained.setdefault(match[0], []).append(match)
+        for matches in contained.values():
+            match = min(matches, key=lambda m: m[2])
+            count = f" ({len(matches)} subpaths)" if len(matches) > 1 else ""
+            lines.append(describe(callout['id'], match, 'contains') + count)
+
+    print(f"Similarity: {repeats} outlines repeat an earlier one, {shared} shared as subpaths,"
+          f" {len(references)} stored as references")
+    for line in lines:
+        print(line)
+    return references
+
+
+def render_literal(callouts, references=None, text_areas=None):
+    """
+    CalloutRegistry.ts with every path inlined as a string literal. Paths
+    shared by deduplicated callouts are written once, in SHARED_PATHS.
+    `text_areas` ({id: area} from text_areas_for()) adds a textArea to
+    every callout that has one.
+    """
+    references = references or {}
+    text_areas = text_areas or {}
+    shared_ids = sorted({r['ref'] for r in references.values()})
+    path_ids = {c['id']: references.get(c['id'], {}).get('ref', c['id']) for c in callouts}
+    paths = {c['id']: c['path'] for c in callouts}
+
+    entries = []
+    for callout in callouts:
+        path_id = path_ids[callout['id']]
+        path = f"SHARED_PATHS['{path_id}']" if path_id in shared_ids else f'"{callout["path"]}"'
+        entries.append(format_entry(callout, f"path: {path}", references, text_areas))
+
+    imported_entries = ",\n".join(entries)
+    shared_paths = ""
+    if shared_ids:
+        shared_entries = "\n".join(f"    '{i}': \"{paths[i]}\"," for i in shared_ids)
+        shared_paths = f"""
+// Geometry reused by several imported callouts
+const SHARED_PATHS: Record<string, string> = {{
+{shared_entries}
+}};
+"""
+    return f"""
+export interface CalloutImage {{
+    src: string;
+    width: number;
+    height: number;
+    transform: [number, number, number, number, number, number];
+}}
+
+// In the path's own frame (before the viewBox offset), as fractions of the
+// viewBox: x values scale with its width, y values with its height
+export interface CalloutTextArea {{
+    // [x, y, width, height]
+    rect: [number, number, number, number];
+    // [cx, cy, rx, ry]
+    ellipse: [number, number, number, number];
+}}
+
 export interface CalloutDef {{
     id: string;
     name: string;
     path: string;
+    // Matrix [a, b, c, d, e, f] placing a shared path in this callout's viewBox
+    transform?: [number, number, number, number, number, number];
+    // Raster layers drawn under the path, each placed by its own matrix
+    images?: CalloutImage[];
+    // Largest rectangle and ellipse inside the outline, for laying out text
+    textArea?: CalloutTextArea;
     viewBox: {{ width: number; height: number; offsetX: number; offsetY: number }};
 }}
-
+{shared_paths}
 // Generated Registry
 export const CALLOUTS: Record<string, CalloutDef> = {{
-{EXISTING_ENTRIES},
+{hand_written_entries(callouts, text_areas)},
 
     // --- IMPORTED SVGS ---
-{",\\n".join(new_entries)}
+{imported_entries}
 }};
 
 export const DEFAULT_CALLOUT = CALLOUTS['speech_oval_bl'];
 """
 
-    with open(OUTPUT_FILE, 'w') as f:
-        f.write(final_content)
-    print(f"Successfully generated {OUTPUT_FILE}")
+
+def render_packed(callouts, geometry_urls, references=None, thumbnails=None, text_areas=None):
+    """
+    CalloutRegistry.ts as a small index: imported callouts carry a URL to
+    their packed geometry instead of the path, and are decoded on first use
+    through loadCalloutPath(). Deduplicated callouts point at the geometry
+    they share. With `thumbnails` ({id: rect} from the atlas), each entry
+    also records where its preview sits in the sprite sheet; `text_areas`
+    works as in render_literal().
+    """
+    references = references or {}
+    thumbnails = thumbnails or {}
+    text_areas = text_areas or {}
+    entries = []
+    for callout in callouts:
+        geometry_id = references.get(callout['id'], {}).get('ref', callout['id'])
+        rect = thumbnails.get(callout['id'])
+        thumbnail = f"[{', '.join(str(v) for v in rect)}]" if rect else "null"
+        entries.append(format_entry(callout, f"geometry: '{geometry_urls[geometry_id]}', thumbnail: {thumbnail}",
+                                    references, text_areas))
+
+    imported_entries = ",\n".join(entries)
+    return f"""
+export {{ loadCalloutPath }} from './CalloutGeometry';
+
+export interface CalloutImage {{
+    src: string;
+    width: number;
+    height: number;
+    transform: [number, number, number, number, number, number];
+}}
+
+// In the path's own frame (before the viewBox offset), as fractions of the
+// viewBox: x values scale with its width, y values with its height
+export interface CalloutTextArea {{
+    // [x, y, width, height]
+    rect: [number, number, number, number];
+    // [cx, cy, rx, ry]
+    ellipse: [number, number, number, number];
+}}
+
+export interface CalloutDef {{
+    id: string;
+    name: string;
+    // Inline path data (hand-drawn entries)
+    path?: string;
+    // URL of packed geometry, fetched and decoded by loadCalloutPath()
+    geometry?: string;
+    // Matrix [a, b, c, d, e, f] placing shared geometry in this callout's viewBox
+    transform?: [number, number, number, number, number, number];
+    // Raster layers drawn under the path, each placed by its own matrix
+    images?: CalloutImage[];
+    // Largest rectangle and ellipse inside the outline, for laying out text
+    textArea?: CalloutTextArea;
+    // Rect [x, y, width, height] of the preview in the atlas image named by CalloutAtlas.json
+    thumbnail?: [number, number, number, number] | null;
+    viewBox: {{ width: number; height: number; offsetX: number; offsetY: number }};
+}}
+
+// Generated Registry
+export const CALLOUTS: Record<string, CalloutDef> = {{
+{hand_written_entries(callouts, text_areas)},
+
+    // --- IMPORTED SVGS (lazy geometry) ---
+{imported_entries}
+}};
+
+export const DEFAULT_CALLOUT = CALLOUTS['speech_oval_bl'];
+"""
+
+
+def render_json(callouts, references=None, geometry_urls=None, thumbnails=None, text_areas=None):
+    """
+    CalloutRegistry.json: every callout of the model (see every_callout())
+    with its path, viewBox, exact bounds and provenance, plus what the other
+    outputs of the build add to it: the shared geometry of a deduplicated
+    callout ('ref', 'transform'), its packed 'geometry' URL, its atlas
+    'thumbnail' and its 'textArea'.
+    """
+    references = references or {}
+    geometry_urls = geometry_urls or {}
+    thumbnails = thumbnails or {}
+    text_areas = text_areas or {}
+    entries = []
+    for callout in every_callout(callouts):
+        reference = references.get(callout['id'], {})
+        entries.append(json_record(
+            callout, ref=reference.get('ref'), transform=reference.get('transform'),
+            geometry=geometry_urls.get(reference.get('ref', callout['id'])),
+            thumbnail=thumbnails.get(callout['id']), textArea=text_areas.get(callout['id'])))
+    return json.dumps({'callouts': entries}, indent=1, sort_keys=True) + "\n"
+
+
+# Packed geometry and hit maps of unchanged outlines, kept across watch-mode rebuilds
+DERIVED = Derived()
+
+
+def _pack_callout(callout, coord_format):
+    return pack_arrays(callout['ops'], callout['coords'], coord_format)
+
+
+def packed_path(callout, coord_format):
+    """
+    pack_arrays() of a callout's geometry. Memoized so a watch-mode rebuild
+    only packs the callouts that changed.
+    """
+    return DERIVED.get('geometry', callout, _pack_callout, coord_format)
+
+
+def write_packed_geometry(callouts, coord_format):
+    """
+    Writes one packed geometry file per callout into GEOMETRY_DIR, removes
+    files for callouts that no longer exist, and returns ({id: url}, bytes).
+    """
+    os.makedirs(GEOMETRY_DIR, exist_ok=True)
+    urls = {}
+    expected = set()
+    total = 0
+    for callout in callouts:
+        filename = f"{callout['id']}.bin"
+        data = packed_path(callout, coord_format)
+        write_if_changed(os.path.join(GEOMETRY_DIR, filename), data)
+        expected.add(filename)
+        urls[callout['id']] = f"{GEOMETRY_URL}/{filename}"
+        total += len(data)
+
+    for filename in os.listdir(GEOMETRY_DIR):
+        if filename.endswith('.bin') and filename not in expected:
+            os.remove(os.path.join(GEOMETRY_DIR, filename))
+    return urls, total
+
+
+def images_present(result, image_dir=None):
+    """False if a cached result points at extracted images deleted from `image_dir` (default IMAGE_DIR)."""
+    image_dir = image_dir or IMAGE_DIR
+    return all(os.path.exists(os.path.join(image_dir, os.path.basename(image['src'])))
+               for image in (result or {}).get('images', ()) if image['src'].startswith(IMAGE_URL))
+
+
+def clean_images(callouts, image_dir=None):
+    """
+    Removes extracted images no callout refers to from `image_dir` (default
+    IMAGE_DIR); returns (files, bytes) kept.
+    """
+    image_dir = image_dir or IMAGE_DIR
+    used = {os.path.basename(image['src']) for callout in callouts for image in callout['images']
+            if image['src'].startswith(IMAGE_URL)}
+    total = 0
+    if os.path.isdir(image_dir):
+        for filename in os.listdir(image_dir):
+            filepath = os.path.join(image_dir, filename)
+            if filename in used:
+                total += os.path.getsize(filepath)
+            elif IMAGE_FILE_RE.match(filename):
+                os.remove(filepath)
+    return len(used), total
+
+
+def write_atlas(callouts, jobs=1):
+    """
+    Renders a thumbnail of every callout (hand-written and imported) into
+    ATLAS_FILE and writes the id -> rectangle map to ATLAS_MAP_FILE.
+    Thumbnails of unchanged outlines come from THUMBNAIL_CACHE_DIR.
+    Returns {id: [x, y, width, height]}.
+    """
+    shapes = [(c['id'], c['path'], segments_of(c)) for c in every_callout(callouts)]
+    png, rects, rendered = build_atlas(shapes, THUMBNAIL_CACHE_DIR, GENERATOR_VERSION, jobs)
+    width = max(x + w for x, _, w, _ in rects.values())
+    height = max(y + h for _, y, _, h in rects.values())
+
+    os.makedirs(os.path.dirname(ATLAS_FILE), exist_ok=True)
+    write_if_changed(ATLAS_FILE, png)
+    atlas_map = {'image': ATLAS_URL, 'width': width, 'height': height, 'callouts': rects}
+    write_if_changed(ATLAS_MAP_FILE, json.dumps(atlas_map, indent=1, sort_keys=True) + "\n")
+    print(f"Atlas: {len(rects)} thumbnails ({rendered} rendered, {len(rects) - rendered} reused),"
+          f" {width}x{height}, {len(png)} bytes in {ATLAS_FILE}")
+    return rects
+
+
+def _hitmap_of(callout):
+    hitmap = build_hitmap(segments_of(callout))
+    return pack_hitmap(hitmap) if hitmap is not None else None
+
+
+def packed_hitmap(callout):
+    """
+    pack_hitmap() of a callout's outline, or None if it has no extent.
+    Memoized like packed_path().
+    """
+    return DERIVED.get('hit_map', callout, _hitmap_of)
+
+
+def write_hitmaps(callouts):
+    """
+    Writes the hit-test map of every callout (hand-written and imported)
+    into HITMAP_DIR, removes maps of callouts that no longer exist, and
+    writes the id -> URL index to HITMAP_INDEX_FILE. Returns (files, bytes).
+    """
+    os.makedirs(HITMAP_DIR, exist_ok=True)
+    urls = {}
+    total = 0
+    for callout in every_callout(callouts):
+        data = packed_hitmap(callout)
+        if data is None:
+            continue
+        filename = f"{callout['id']}.bin"
+        write_if_changed(os.path.join(HITMAP_DIR, filename), data)
+        urls[callout['id']] = f"{HITMAP_URL}/{filename}"
+        total += len(data)
+
+    expected = {os.path.basename(url) for url in urls.values()}
+    for filename in os.listdir(HITMAP_DIR):
+        if filename.endswith('.bin') and filename not in expected:
+            os.remove(os.path.join(HITMAP_DIR, filename))
+    index = {'lods': list(LOD_TOLERANCES), 'callouts': urls}
+    write_if_changed(HITMAP_INDEX_FILE, json.dumps(index, indent=1, sort_keys=True) + "\n")
+    print(f"Hit maps: {len(urls)} callouts, {len(LOD_TOLERANCES)} levels of detail, {total} bytes in {HITMAP_DIR}")
+    return len(urls), total
+
+
+def text_areas_for(callouts, jobs=1):
+    """
+    Text-safe area of every callout (hand-written and imported) as
+    fractions of its viewBox size: {id: {'rect', 'ellipse'}}. Areas of
+    unchanged outlines come from TEXT_AREA_CACHE_FILE.
+    """
+    everything = every_callout(callouts)
+    shapes = [(c['id'], c['path'], segments_of(c)) for c in everything]
+    sizes = {c['id']: (c['viewBox']['width'], c['viewBox']['height']) for c in everything}
+    areas, computed = compute_text_areas(shapes, TEXT_AREA_CACHE_FILE, GENERATOR_VERSION, jobs)
+
+    text_areas = {}
+    for callout_id, area in areas.items():
+        width, height = sizes[callout_id]
+        text_areas[callout_id] = {
+            key: [round(v / size, TEXT_AREA_PRECISION) + 0.0 for v, size in zip(values, (width, height) * 2)]
+            for key, values in area.items()
+        }
+    print(f"Text areas: {len(text_areas)} callouts ({computed} computed, the rest from {TEXT_AREA_CACHE_FILE})")
+    return text_areas
+
+
+def parse_sources(cache, source_dir, jobs=1, simplify=None, image_dir=None, records=None):
+    """
+    Results of every source in `source_dir`, in file order (None where
+    parsing failed). Embedded rasters are extracted into `image_dir`, or
+    their sources skipped without one. Sources `cache` already knows unchanged are not read
+    again; only new or edited files are parsed. With a `records` list, a
+    report record (see callouts.instrument) is appended for every source.
+    """
+    files = [f for f in sorted(os.listdir(source_dir)) if f.endswith(".md")]
+    filepaths = [os.path.join(source_dir, f) for f in files]
+    instrument = records is not None
+
+    results = [None] * len(files)
+    reports = [None] * len(files)
+    stale = []
+    for index, filepath in enumerate(filepaths):
+        recorder = recorder_for(files[index], instrument)
+        with recorder.stage('lookup'):
+            hit, result = cache.lookup(filepath, valid=functools.partial(images_present, image_dir=image_dir) if image_dir else None)
+        if hit:
+            results[index] = result
+            if instrument:
+                recorder.note('lookup', bytes_in=os.path.getsize(filepath), bytes_out=len(result.get('path', '')))
+                reports[index] = dict(recorder.as_dict(), cached=True)
+                if 'skipped' in result:
+                    reports[index]['skipped'] = result['skipped']
+        else:
+            stale.append(index)
+            reports[index] = recorder.as_dict()
+
+    # Results stream back in completion order when running in parallel;
+    # slot them by index so the output matches a serial run byte for byte.
+    stale_paths = [filepaths[i] for i in stale]
+    worker = functools.partial(process_file, simplify=simplify,
+                               image_dir=image_dir, instrument=instrument)
+    for n, result, error in run_per_file(worker, stale_paths, jobs):
+        index = stale[n]
+        if error is not None:
+            print(f"Error processing {files[index]}: {error}")
+            if instrument:
+                reports[index]['error'] = str(error)
+            continue
+        if instrument:
+            # Reports describe this run only; they are not cached
+            report = result.pop('report')
+            report['stages'] = dict(reports[index]['stages'], **report['stages'])
+            report['seconds'] += reports[index]['seconds']
+            reports[index] = report
+        cache.store(filepaths[index], result)
+        results[index] = result
+        print(result['message'])
+    if instrument:
+        records.extend(reports)
+    return results
+
+
+def emit_images(callouts, context):
+    """Drops extracted images no callout uses any more."""
+    recorder = context['recorder']
+    with recorder.stage('images'):
+        placements = sum(len(c['images']) for c in callouts)
+        stored, image_bytes = clean_images(callouts, context['image_dir'])
+    recorder.note('images', files=stored, bytes_out=image_bytes)
+    print(f"Images: {placements} placements in {sum(1 for c in callouts if c['images'])} callouts,"
+          f" {stored} files ({image_bytes} bytes) in {context['image_dir']}")
+
+
+def emit_atlas(callouts, context):
+    with context['recorder'].stage('atlas'):
+        context['thumbnails'] = write_atlas(callouts, context['jobs'])
+
+
+def emit_hit_maps(callouts, context):
+    recorder = context['recorder']
+    with recorder.stage('hit_maps'):
+        hitmap_files, hitmap_bytes = write_hitmaps(callouts)
+    recorder.note('hit_maps', files=hitmap_files, bytes_out=hitmap_bytes)
+
+
+def emit_text_areas(callouts, context):
+    with context['recorder'].stage('text_areas'):
+        context['text_areas'] = text_areas_for(callouts, context['jobs'])
+
+
+def emit_geometry(callouts, context):
+    """Packed geometry of every imported callout that stores its own."""
+    recorder = context['recorder']
+    stored = [c for c in callouts if c['id'] not in context['references']]
+    with recorder.stage('geometry'):
+        context['geometry_urls'], context['geometry_bytes'] = write_packed_geometry(stored, context['coord_format'])
+    context['geometry_files'] = len(stored)
+    recorder.note('geometry', files=len(stored), bytes_out=context['geometry_bytes'])
+
+
+def emit_json(callouts, context):
+    recorder = context['recorder']
+    json_file = context['json_file']
+    with recorder.stage('json'):
+        content = render_json(callouts, context['references'], context.get('geometry_urls'),
+                              context.get('thumbnails'), context.get('text_areas'))
+        os.makedirs(os.path.dirname(json_file) or '.', exist_ok=True)
+        written = write_if_changed(json_file, content)
+    recorder.note('json', bytes_out=len(content.encode('utf-8')), changed=int(written))
+    print(f"JSON: {len(every_callout(callouts))} callouts in {json_file}" + ("" if written else " (unchanged)"))
+
+
+def emit_module(callouts, context):
+    """The registry module itself, literal or packed (after emit_geometry())."""
+    recorder = context['recorder']
+    references = context['references']
+    areas = context.get('text_areas')
+    with recorder.stage('render'):
+        literal_content = render_literal(callouts, references, areas)
+    if context['output_mode'] == 'packed':
+        with recorder.stage('render'):
+            final_content = render_packed(callouts, context['geometry_urls'], references,
+                                          context.get('thumbnails'), areas)
+        literal_bytes = len(literal_content.encode('utf-8'))
+        index_bytes = len(final_content.encode('utf-8'))
+        print(f"Bundle: {index_bytes} bytes of index vs {literal_bytes} bytes as string literals"
+              f" ({literal_bytes / max(index_bytes, 1):.1f}x smaller);"
+              f" {context['geometry_bytes']} bytes of geometry in {context['geometry_files']} files,"
+              " fetched on demand")
+    else:
+        final_content = literal_content
+
+    output_file = context['output_file']
+    with recorder.stage('write'):
+        written = write_if_changed(output_file, final_content)
+    if recorder.enabled:
+        recorder.note('write', bytes_out=len(final_content.encode('utf-8')), changed=int(written))
+    if written:
+        print(f"Successfully generated {output_file}")
+    else:
+        print(f"Registry unchanged: {output_file}")
+
+
+# Outputs written from the callout model, in the order they run. Each takes
+# the imported callouts and the build context: the options, the similarity
+# references and the recorder, plus what earlier emitters left for later
+# ones ('thumbnails', 'text_areas', 'geometry_urls'). The hand-written
+# records come from hand_written() / every_callout().
+EMITTERS = {
+    'images': emit_images,
+    'atlas': emit_atlas,
+    'hit_maps': emit_hit_maps,
+    'text_areas': emit_text_areas,
+    'geometry': emit_geometry,
+    'json': emit_json,
+    'module': emit_module,
+}
+
+
+def emit_registry(results, output_file, jobs=1, output_mode="literal", coord_format="i16", dedupe="off",
+                  near_tolerance=DEFAULT_NEAR_TOLERANCE, mirror=False, extract_images=False, atlas=False,
+                  hit_maps=False, text_areas=False, json_file=None, image_dir=None, recorder=NULL_RECORDER):
+    """
+    Loads parsed `results` into the callout model and writes the registry
+    and every other requested output from it (see EMITTERS), timing each
+    step on `recorder`. No output parses path data again. Extracted images
+    live in `image_dir` (default IMAGE_DIR).
+    """
+    simplified = [r['stats'] for r in results if r and r.get('stats')]
+    if simplified:
+        before = sum(s['bytes_before'] for s in simplified)
+        after = sum(s['bytes_after'] for s in simplified)
+        worst = max(s['max_deviation'] / max(s['tolerance'], 1e-12) for s in simplified)
+        print(f"Path data: {before} -> {after} bytes ({before / max(after, 1):.1f}x smaller),"
+              f" worst sampled deviation {worst:.2f}x tolerance")
+
+    with recorder.stage('model'):
+        callouts = [record_from_result(r) for r in results if r and 'id' in r]
+        hand_written()
+    with recorder.stage('similarity'):
+        references = find_duplicates(callouts, dedupe, near_tolerance, mirror)
+
+    outputs = {
+        'images': extract_images, 'atlas': atlas, 'hit_maps': hit_maps, 'text_areas': text_areas,
+        'geometry': output_mode == 'packed', 'json': json_file is not None, 'module': True,
+    }
+    context = {
+        'output_file': output_file, 'json_file': json_file, 'jobs': jobs, 'output_mode': output_mode,
+        'coord_format': coord_format, 'references': references, 'recorder': recorder,
+        'image_dir': image_dir or IMAGE_DIR,
+    }
+    for name, emit in EMITTERS.items():
+        if outputs[name]:
+            emit(callouts, context)
+
+
+def finish_report(report, recorder, records, top):
+    """Writes the build report of one run to `report` and prints its summary."""
+    cached = sum(1 for record in records if record.get('cached'))
+    build = dict(recorder.as_dict(), created=time.strftime('%Y-%m-%dT%H:%M:%S'), sources=len(records),
+                 parsed=len(records) - cached, cached=cached)
+    write_report(report, build, records)
+    print_summary(build, records, top)
+    print(f"Report written to {report}")
+
+
+def registry_cache(use_cache, simplify, extract_images):
+    version = f"{GENERATOR_VERSION}:{sorted(simplify.items()) if simplify else None}:{extract_images}"
+    return BuildCache("generate_registry", version, enabled=use_cache)
+
+
+def process_files(jobs=1, use_cache=True, simplify=None, source_dir=None, output_file=None, report=None,
+                  report_top=5, image_dir=None, **options):
+    """
+    One build: parses the sources in `source_dir` (default SVG_DIR) and
+    writes `output_file` (default OUTPUT_FILE). With extract_images,
+    rasters are decoded into `image_dir` (default IMAGE_DIR). `options` are
+    passed on to emit_registry(). With a `report` path, every stage is timed per source
+    and for the build, and the build report is written there.
+    """
+    source_dir = source_dir or SVG_DIR
+    if not os.path.exists(source_dir):
+        print(f"Directory not found: {source_dir}")
+        return
+
+    # Unchanged sources are spliced in from the cache; only new or edited
+    # files are parsed.
+    extract_images = options.get('extract_images', False)
+    image_dir = image_dir or IMAGE_DIR
+    extract_to = image_dir if extract_images else None
+    cache = registry_cache(use_cache, simplify, extract_images)
+    recorder = recorder_for('build', report is not None)
+    records = [] if report is not None else None
+    with recorder.stage('parse'):
+        results = parse_sources(cache, source_dir, jobs, simplify, extract_to, records)
+    with recorder.stage('cache'):
+        cache.save()
+    if use_cache:
+        print(f"Cache: {cache.hits} unchanged, {cache.misses} reparsed")
+    emit_registry(results, output_file or OUTPUT_FILE, jobs, image_dir=image_dir, recorder=recorder, **options)
+    if report is not None:
+        finish_report(report, recorder, records, report_top)
+
+
+def rebuild(cache, source_dir, output_file, jobs, simplify, image_dir, report, report_top, options):
+    """One watch-mode rebuild: reparses what changed and re-emits, if anything did."""
+    started = time.perf_counter()
+    cache.restart()
+    recorder = recorder_for('build', report is not None)
+    records = [] if report is not None else None
+    extract_to = image_dir if options.get('extract_images') else None
+    with recorder.stage('parse'):
+        results = parse_sources(cache, source_dir, jobs, simplify, extract_to, records)
+    removed = set(cache.entries) - set(cache.seen)
+    if not cache.misses and not removed:
+        return
+    cache.save(write=False)
+    for name in sorted(removed):
+        print(f"Removed {name}")
+    emit_registry(results, output_file, jobs, image_dir=image_dir, recorder=recorder, **options)
+    if report is not None:
+        finish_report(report, recorder, records, report_top)
+    print(f"Rebuilt in {(time.perf_counter() - started) * 1000:.0f} ms"
+          f" ({cache.misses} reparsed, {len(removed)} removed, {cache.hits} unchanged)")
+
+
+def watch_files(jobs=1, use_cache=True, simplify=None, source_dir=None, output_file=None, poll=False,
+                report=None, report_top=5, image_dir=None, **options):
+    """
+    Builds once, then keeps every parsed callout in memory and rebuilds
+    whenever files in `source_dir` are added, edited or removed. Only those
+    files are parsed again; the registry is then re-emitted from memory.
+    Runs until interrupted; a rebuild that fails is reported and the
+    next change is picked up as usual. The on-disk cache is read at start-up (unless
+    `use_cache` is False) and written back on exit. With a `report` path,
+    the report of the latest build or rebuild is kept there. `image_dir`
+    works as in process_files().
+    """
+    source_dir = source_dir or SVG_DIR
+    output_file = output_file or OUTPUT_FILE
+    if not os.path.exists(source_dir):
+        print(f"Directory not found: {source_dir}")
+        return
+
+    extract_images = options.get('extract_images', False)
+    image_dir = image_dir or IMAGE_DIR
+    extract_to = image_dir if extract_images else None
+    # Watch mode always caches in memory; --no-cache only skips the manifest at start-up
+    cache = registry_cache(True, simplify, extract_images)
+    if not use_cache:
+        cache.clear()
+    watcher = DirectoryWatcher(source_dir, poll=poll)
+    try:
+        recorder = recorder_for('build', report is not None)
+        records = [] if report is not None else None
+        with recorder.stage('parse'):
+            results = parse_sources(cache, source_dir, jobs, simplify, extract_to, records)
+        cache.save()
+        print(f"Cache: {cache.hits} unchanged, {cache.misses} parsed")
+        emit_registry(results, output_file, jobs, image_dir=image_dir, recorder=recorder, **options)
+        if report is not None:
+            finish_report(report, recorder, records, report_top)
+        print(f"Watching {source_dir} ({watcher.mode}); press Ctrl+C to stop")
+        while True:
+            watcher.wait()
+            # A failed rebuild is reported and the next change tries again;
+            # only Ctrl+C stops watching
+            try:
+                rebuild(cache, source_dir, output_file, jobs, simplify, image_dir, report, report_top, options)
+            except Exception as e:
+                print(f"Rebuild failed: {type(e).__name__}: {e}")
+                traceback.print_exc()
+    except KeyboardInterrupt:
+        print("Stopped watching")
+    finally:
+        watcher.close()
+        cache.save()
 
 if __name__ == "__main__":
-    process_files()
+    parser = argparse.ArgumentParser(description="Generate CalloutRegistry.ts from the reference callouts.")
+    parser.add_argument("--source-dir", default=SVG_DIR,
+                        help="Directory of callout sources (default: %(default)s)")
+    parser.add_argument("--output", default=OUTPUT_FILE,
+                        help="Registry module to write (default: %(default)s)")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and rebuild whenever sources are added, edited or removed")
+    parser.add_argument("--poll", action="store_true",
+                        help="With --watch, poll the directory instead of using inotify")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help=f"Parse sources in N worker processes (0 = one per CPU, {default_jobs()} here)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore the incremental build cache and reparse every source")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Max path deviation as a fraction of each callout's size (default: %(default)s)")
+    parser.add_argument("--precision", type=int, default=DEFAULT_PRECISION,
+                        help="Decimal places kept in path coordinates (default: derived from --tolerance)")
+    parser.add_argument("--raw-paths", action="store_true",
+                        help="Keep full-precision path data instead of simplifying and quantizing it")
+    parser.add_argument("--output-mode", choices=("literal", "packed"), default="literal",
+                        help="literal: inline every path in the TS module; packed: small index plus"
+                             f" binary geometry files in {GEOMETRY_DIR} loaded on demand")
+    parser.add_argument("--coord-format", choices=sorted(FORMATS), default="i16",
+                        help="Coordinate encoding for packed geometry (default: %(default)s)")
+    parser.add_argument("--extract-images", action="store_true",
+                        help=f"Decode embedded raster images into {IMAGE_DIR} (stored once per content"
+                             " hash) instead of skipping sources that contain them")
+    parser.add_argument("--dedupe", choices=("off", "exact", "near"), default="off",
+                        help="Store exact (or also near) duplicate callouts once and emit the copies"
+                             " as references plus a transform (default: %(default)s)")
+    parser.add_argument("--near-tolerance", type=float, default=DEFAULT_NEAR_TOLERANCE,
+                        help="Max RMS distance between outlines scaled to a unit square for a near"
+                             " duplicate (default: %(default)s)")
+    parser.add_argument("--mirror", action="store_true",
+                        help="Also match outlines that are mirror images of each other")
+    parser.add_argument("--report", metavar="FILE",
+                        help="Time every stage per source and write a build report (NDJSON for .ndjson"
+                             " or .jsonl, otherwise JSON), then print the slowest and largest sources")
+    parser.add_argument("--report-top", type=int, default=5, metavar="N",
+                        help="Sources listed in the report summary (default: %(default)s)")
+    parser.add_argument("--profile", metavar="FILE", nargs="?", const=PROFILE_FILE,
+                        help="Run under cProfile, save the stats (default: %(const)s) and print the top"
+                             " functions; worker processes from --jobs are not profiled")
+    parser.add_argument("--atlas", action="store_true",
+                        help=f"Render a preview of every callout into one sprite sheet ({ATLAS_FILE})"
+                             f" with its id -> rectangle map in {ATLAS_MAP_FILE}")
+    parser.add_argument("--hit-maps", action="store_true",
+                        help=f"Write packed outlines at {len(LOD_TOLERANCES)} levels of detail with an edge"
+                             f" grid per callout ({HITMAP_DIR}, indexed in {HITMAP_INDEX_FILE}) for"
+                             " hit-testing and snapping in the editor")
+    parser.add_argument("--text-areas", action="store_true",
+                        help="Add the largest rectangle and ellipse inside each outline to its entry"
+                             " (textArea), so text is laid out without measuring the shape")
+    parser.add_argument("--json", metavar="FILE", nargs="?", const=JSON_FILE,
+                        help="Also write every callout (hand-written and imported) with its bounds and"
+                             " provenance as JSON (default: %(const)s)")
+    args = parser.parse_args()
+    simplify = None if args.raw_paths else {'tolerance': args.tolerance, 'precision': args.precision}
+    options = dict(jobs=args.jobs or default_jobs(), use_cache=not args.no_cache, simplify=simplify,
+                   source_dir=args.source_dir, output_file=args.output,
+                   report=args.report, report_top=args.report_top,
+                   output_mode=args.output_mode, coord_format=args.coord_format,
+                   dedupe=args.dedupe, near_tolerance=args.near_tolerance, mirror=args.mirror,
+                   extract_images=args.extract_images, atlas=args.atlas, hit_maps=args.hit_maps,
+                   text_areas=args.text_areas, json_file=args.json)
+    build = functools.partial(watch_files, poll=args.poll) if args.watch else process_files
+    if args.profile:
+        profile_call(args.profile, build, **options)
+    else:
+        build(**options)
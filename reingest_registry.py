@@ -1,133 +1,102 @@
 
+import argparse
+import functools
 import os
 import re
-import json
 
-# Configuration
-REFERENCE_DIR = '/Users/apoaaron/.gemini/antigravity/Nano Banana Expanded/reference/Callouts Codes'
-OUTPUT_FILE = '/Users/apoaaron/.gemini/antigravity/Nano Banana Expanded/src/modes/comic/data/CalloutRegistry.ts'
+from callouts.cache import BuildCache, generator_version
+from callouts.model import path_fields
+from callouts.parallel import default_jobs, run_per_file
+from callouts.pathdata import expand_arcs, parse_path
+from callouts.signature import outline_signature
+from generate_registry import GENERATOR_VERSION as REGISTRY_VERSION, emit_registry, process_file
 
-# Placeholder path (Standard Oval) for fallbacks
+# Configuration (relative to the repo root; override with --source-dir / --output)
+REFERENCE_DIR = 'reference/Callouts Codes'
+OUTPUT_FILE = 'src/modes/comic/data/CalloutRegistry.ts'
+
+# Placeholder path (Standard Oval) for sources that cannot be imported
 PLACEHOLDER_PATH = "M 50,10 Q 90,10 90,50 Q 90,90 50,90 Q 10,90 10,50 Q 10,10 50,10 Z M 20,80 Q 10,100 0,100 L 30,90"
 PLACEHOLDER_VIEWBOX = {"width": 100, "height": 110, "offsetX": 50, "offsetY": 50}
 
-def parse_md_file(filepath):
-    """
-    Parses a Markdown file to find the SVG path and viewBox.
-    Returns a dict with 'path' and 'viewBox' or None if invalid.
-    """
-    try:
-        with open(filepath, 'r') as f:
-            content = f.read()
-        
-        # Regex to find <path d="...">
-        path_match = re.search(r'<path[^>]*d="([^"]+)"', content)
-        if not path_match:
-            # Try single quotes
-            path_match = re.search(r"<path[^>]*d='([^']+)'", content)
-        
-        if path_match:
-            path_data = path_match.group(1).replace('\n', ' ').strip()
-            
-            # Try to find viewBox
-            viewbox_match = re.search(r'viewBox="([^"]+)"', content)
-            if not viewbox_match:
-                viewbox_match = re.search(r"viewBox='([^']+)'", content)
-            
-            viewBox = PLACEHOLDER_VIEWBOX.copy() # Default
-            
-            if viewbox_match:
-                vb_parts = [float(x) for x in viewbox_match.group(1).split()]
-                if len(vb_parts) == 4:
-                    # viewBox="min-x min-y width height"
-                    # We want { width, height, offsetX, offsetY }
-                    # Assuming offsetX/Y are essentially the center or origin offset.
-                    # For simplicty in this fallback logic, let's map:
-                    # width = vb[2], height = vb[3]
-                    # offsetX = vb[2] / 2, offsetY = vb[3] / 2 (Center origin assumption)
-                    viewBox = {
-                        "width": vb_parts[2],
-                        "height": vb_parts[3],
-                        "offsetX": vb_parts[2] / 2,
-                        "offsetY": vb_parts[3] / 2
-                    }
+# Cached entries are only reused while the code that produced them (this
+# script and generate_registry.process_file()) is unchanged
+GENERATOR_VERSION = f"{generator_version(__file__)}:{REGISTRY_VERSION}"
 
-            return {
-                "path": path_data,
-                "viewBox": viewBox
-            }
-            
-    except Exception as e:
-        print(f"Error parsing {filepath}: {e}")
-    
-    return None
+@functools.lru_cache(maxsize=1)
+def placeholder():
+    """process_file()-style result of the placeholder callout."""
+    segments = expand_arcs(parse_path(PLACEHOLDER_PATH))
+    return {"path": PLACEHOLDER_PATH, **path_fields(segments), "signature": outline_signature(segments),
+            "viewBox": PLACEHOLDER_VIEWBOX, "images": [], "parts": []}
 
-def generate_registry():
-    callouts = {}
+def generate_registry(jobs=1, use_cache=True, reference_dir=None, output_file=None):
+    reference_dir = reference_dir or REFERENCE_DIR
+    output_file = output_file or OUTPUT_FILE
     
-    files = sorted([f for f in os.listdir(REFERENCE_DIR) if f.startswith('svg') and f.endswith('.md')])
+    files = sorted([f for f in os.listdir(reference_dir) if f.startswith('svg') and f.endswith('.md')])
     
     # Sort numerically (svg1, svg2, ... svg10) instead of lexicographically (svg1, svg10...)
     files.sort(key=lambda f: int(re.search(r'\d+', f).group()))
 
     print(f"Found {len(files)} SVG files.")
 
-    for filename in files:
-        svg_id = filename.replace('.md', '')
-        filepath = os.path.join(REFERENCE_DIR, filename)
-        
-        data = parse_md_file(filepath)
-        
-        if data:
-            print(f"✅ Loaded {svg_id}")
-            callouts[svg_id] = {
-                "id": svg_id,
-                "name": f"Imported {svg_id}",
-                "path": data['path'],
-                "viewBox": data['viewBox']
-            }
-        else:
-            print(f"⚠️ Invalid/Raster {svg_id}, using placeholder.")
-            callouts[svg_id] = {
-                "id": svg_id,
-                "name": f"Imported {svg_id} (Placeholder)",
-                "path": PLACEHOLDER_PATH,
-                "viewBox": PLACEHOLDER_VIEWBOX
-            }
+    filepaths = [os.path.join(reference_dir, f) for f in files]
+    parsed = [None] * len(files)
 
-    # Generate TypeScript File Content
-    ts_content = """import { CalloutDef } from './CalloutRegistry';
+    # Only new or edited sources are re-read; the rest come from the cache.
+    cache = BuildCache("reingest_registry", GENERATOR_VERSION, enabled=use_cache)
+    stale = []
+    for index, filepath in enumerate(filepaths):
+        hit, data = cache.lookup(filepath)
+        if hit:
+            parsed[index] = data
+        else:
+            stale.append(index)
 
-export interface CalloutDef {
-    id: string;
-    name: string;
-    path: string;
-    viewBox: { width: number; height: number; offsetX: number; offsetY: number };
-}
+    # Workers finish in any order; keep the numeric order for the output.
+    stale_paths = [filepaths[i] for i in stale]
+    # Sources go through the generator's own pipeline: every path, with its
+    # transforms baked in, normalized to its exact bounds
+    for n, data, error in run_per_file(process_file, stale_paths, jobs):
+        index = stale[n]
+        if error is not None:
+            print(f"Error parsing {filepaths[index]}: {error}")
+            continue
+        cache.store(filepaths[index], data)
+        parsed[index] = data
+    cache.save()
+    if use_cache:
+        print(f"Cache: {cache.hits} unchanged, {cache.misses} reparsed")
 
-export const CALLOUTS: Record<string, CalloutDef> = {
-"""
-    
-    for key, val in callouts.items():
-        # JSON formatting for safety, but we want it as a JS object literal in TS
-        # We manually construct the string to ensure clean indentation and no JSON quotes on keys if possible (totally fine to quote keys though)
-        
-        # VERY IMPORTANT: use json.dumps for the path string to handle escaping correctly!
-        path_json = json.dumps(val['path'])
-        
-        ts_content += f"    '{key}': {{\n"
-        ts_content += f"        id: '{val['id']}',\n"
-        ts_content += f"        name: '{val['name']}',\n"
-        ts_content += f"        path: {path_json},\n"
-        ts_content += f"        viewBox: {{ width: {val['viewBox']['width']}, height: {val['viewBox']['height']}, offsetX: {val['viewBox']['offsetX']}, offsetY: {val['viewBox']['offsetY']} }}\n"
-        ts_content += "    },\n"
+    # emit_registry() loads the results into the same callout model as
+    # generate_registry.py and writes the registry alongside the
+    # hand-written entries
+    results = []
+    for filename, data in zip(files, parsed):
+        svg_id = filename.replace('.md', '')
 
-    ts_content += "};\n"
+        if data and 'skipped' not in data:
+            print(f"✅ Loaded {svg_id}")
+            data = dict(data, id=svg_id, name=f"Imported {svg_id}")
+        else:
+            reason = data['message'] if data else "could not be read"
+            print(f"⚠️ {reason}; using placeholder for {svg_id}.")
+            data = dict(placeholder(), id=svg_id, name=f"Imported {svg_id} (Placeholder)")
+        results.append(dict(data, source={'kind': 'import', 'file': filename}))
 
-    with open(OUTPUT_FILE, 'w') as f:
-        f.write(ts_content)
-    
-    print(f"Successfully wrote registry to {OUTPUT_FILE}")
+    emit_registry(results, output_file, jobs)
 
 if __name__ == "__main__":
-    generate_registry()
+    parser = argparse.ArgumentParser(description="Re-ingest svgN.md callouts into CalloutRegistry.ts.")
+    parser.add_argument("--source-dir", default=REFERENCE_DIR,
+                        help="Directory of svgN.md sources (default: %(default)s)")
+    parser.add_argument("--output", default=OUTPUT_FILE,
+                        help="Registry module to write (default: %(default)s)")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help=f"Parse sources in N worker processes (0 = one per CPU, {default_jobs()} here)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore the incremental build cache and reparse every source")
+    args = parser.parse_args()
+    generate_registry(jobs=args.jobs or default_jobs(), use_cache=not args.no_cache,
+                      reference_dir=args.source_dir, output_file=args.output)
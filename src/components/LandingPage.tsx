@@ -1,6 +1,7 @@
 import React from 'react';
 import { Sparkles, ArrowRight, Layers, Zap, BookOpen } from 'lucide-react';
 import { useTheme, type Theme } from '../context/ThemeContext';
+import { getBackgroundImage } from '../utils/responsiveImage';
 
 type Portal = 'home' | 'studio' | 'reference' | 'related' | 'lab' | 'comic';
 
@@ -22,7 +23,7 @@ export const LandingPage: React.FC<LandingPageProps> = ({ onNavigate }) => {
             <div className="relative h-96 rounded-[30px] overflow-hidden group shadow-premium ring-1 ring-white/10">
                 {/* Dynamic Background */}
                 <div className="absolute inset-0 bg-gradient-to-br from-[#893741] via-[#0F0F12] to-[#5F368E] opacity-80 z-0" />
-                <div className="absolute inset-0 bg-[url('/assets/images/Aries%20Approaches%20the%20Observatory.png')] bg-cover bg-center opacity-40 mix-blend-overlay group-hover:scale-105 transition-transform duration-[2s]" />
+                <div className="absolute inset-0 bg-cover bg-center opacity-40 mix-blend-overlay group-hover:scale-105 transition-transform duration-[2s]" style={{ backgroundImage: getBackgroundImage('/assets/images/Aries Approaches the Observatory.png', 1280) }} />
 
                 {/* Glass Slices Overlay */}
                 <div className="absolute inset-0 bg-gradient-to-t from-[#0F0F12] via-transparent to-transparent opacity-90" />
@@ -53,7 +54,7 @@ export const LandingPage: React.FC<LandingPageProps> = ({ onNavigate }) => {
 
                 {/* Card 1: Studio (Teal) */}
                 <div onClick={() => handleCardClick('studio', 'teal')} className="h-80 relative group cursor-pointer rounded-[24px] overflow-hidden shadow-2xl transition-all duration-500 hover:shadow-[0_10px_40px_-10px_rgba(55,97,93,0.5)] border border-white/5 hover:border-[#37615D]/50">
-                    <div className="absolute inset-0 bg-[url('/assets/images/City%20of%20Aquarius.jpg')] bg-cover bg-center transition-transform duration-700 group-hover:scale-110" />
+                    <div className="absolute inset-0 bg-cover bg-center transition-transform duration-700 group-hover:scale-110" style={{ backgroundImage: getBackgroundImage('/assets/images/City of Aquarius.jpg', 400) }} />
                     <div className="absolute inset-0 bg-gradient-to-t from-[#0F0F12] via-[#37615D]/40 to-transparent opacity-90 group-hover:opacity-70 transition-opacity" />
 
                     <div className="absolute bottom-0 left-0 p-6 w-full">
@@ -67,7 +68,7 @@ export const LandingPage: React.FC<LandingPageProps> = ({ onNavigate }) => {
 
                 {/* Card 2: Reference (Purple) */}
                 <div onClick={() => handleCardClick('reference', 'purple')} className="h-80 relative group cursor-pointer rounded-[24px] overflow-hidden shadow-2xl transition-all duration-500 hover:shadow-[0_10px_40px_-10px_rgba(95,54,142,0.5)] border border-white/5 hover:border-[#5F368E]/50">
-                    <div className="absolute inset-0 bg-[url('/assets/images/Aries%20Palace.jpg')] bg-cover bg-center transition-transform duration-700 group-hover:scale-110" />
+                    <div className="absolute inset-0 bg-cover bg-center transition-transform duration-700 group-hover:scale-110" style={{ backgroundImage: getBackgroundImage('/assets/images/Aries Palace.jpg', 400) }} />
                     <div className="absolute inset-0 bg-gradient-to-t from-[#0F0F12] via-[#5F368E]/40 to-transparent opacity-90 group-hover:opacity-70 transition-opacity" />
 
                     <div className="absolute bottom-0 left-0 p-6 w-full">
@@ -81,7 +82,7 @@ export const LandingPage: React.FC<LandingPageProps> = ({ onNavigate }) => {
 
                 {/* Card 3: Related (Purple/Crimson Mix) */}
                 <div onClick={() => handleCardClick('related', 'purple')} className="h-80 relative group cursor-pointer rounded-[24px] overflow-hidden shadow-2xl transition-all duration-500 hover:shadow-[0_10px_40px_-10px_rgba(137,55,65,0.5)] border border-white/5 hover:border-[#893741]/50">
-                    <div className="absolute inset-0 bg-[url('/assets/images/Anunnaki%20Sphinx.png')] bg-cover bg-center transition-transform duration-700 group-hover:scale-110" />
+                    <div className="absolute inset-0 bg-cover bg-center transition-transform duration-700 group-hover:scale-110" style={{ backgroundImage: getBackgroundImage('/assets/images/Anunnaki Sphinx.png', 400) }} />
                     <div className="absolute inset-0 bg-gradient-to-t from-[#0F0F12] via-[#893741]/40 to-transparent opacity-90 group-hover:opacity-70 transition-opacity" />
 
                     <div className="absolute bottom-0 left-0 p-6 w-full">
@@ -95,7 +96,7 @@ export const LandingPage: React.FC<LandingPageProps> = ({ onNavigate }) => {
 
                 {/* Card 4: Photo Lab (Gold) */}
                 <div onClick={() => handleCardClick('lab', 'gold')} className="h-80 relative group cursor-pointer rounded-[24px] overflow-hidden shadow-2xl transition-all duration-500 hover:shadow-[0_10px_40px_-10px_rgba(212,175,55,0.5)] border border-white/5 hover:border-[#D4AF37]/50">
-                    <div className="absolute inset-0 bg-[url('/assets/images/Aquarius%20Sphere.jpg')] bg-cover bg-center transition-transform duration-700 group-hover:scale-110" />
+                    <div className="absolute inset-0 bg-cover bg-center transition-transform duration-700 group-hover:scale-110" style={{ backgroundImage: getBackgroundImage('/assets/images/Aquarius Sphere.jpg', 400) }} />
                     <div className="absolute inset-0 bg-gradient-to-t from-[#0F0F12] via-[#D4AF37]/40 to-transparent opacity-90 group-hover:opacity-70 transition-opacity" />
 
                     <div className="absolute bottom-0 left-0 p-6 w-full">
@@ -109,7 +110,7 @@ export const LandingPage: React.FC<LandingPageProps> = ({ onNavigate }) => {
 
                 {/* Card 5: Comic Mode (Cyan/Obsidian) */}
                 <div onClick={() => handleCardClick('comic', 'obsidian')} className="h-80 relative group cursor-pointer rounded-[24px] overflow-hidden shadow-2xl transition-all duration-500 hover:shadow-[0_10px_40px_-10px_rgba(0,209,255,0.5)] border border-white/5 hover:border-[#00D1FF]/50">
-                    <div className="absolute inset-0 bg-[url('/assets/images/Aries%20In%20the%20Observatory.jpeg')] bg-cover bg-center transition-transform duration-700 group-hover:scale-110" />
+                    <div className="absolute inset-0 bg-cover bg-center transition-transform duration-700 group-hover:scale-110" style={{ backgroundImage: getBackgroundImage('/assets/images/Aries In the Observatory.jpeg', 400) }} />
                     <div className="absolute inset-0 bg-gradient-to-t from-[#0F0F12] via-[#00D1FF]/30 to-transparent opacity-90 group-hover:opacity-70 transition-opacity" />
 
                     <div className="absolute bottom-0 left-0 p-6 w-full">
@@ -1,5 +1,6 @@
 import React, { useState } from 'react';
 import { useTheme } from '../../context/ThemeContext';
+import { ResponsiveImage } from './ResponsiveImage';
 
 interface CinematicGalleryProps {
     images?: string[];
@@ -62,8 +63,9 @@ export const CinematicGallery: React.FC<CinematicGalleryProps> = () => {
                             onMouseLeave={() => setHoveredIndex(null)}
                         >
                             {/* Image Layer - Constrained Object Fit */}
-                            <img
+                            <ResponsiveImage
                                 src={item.src}
+                                sizes="(min-width: 640px) 400px, 100vw"
                                 alt={`Reference ${index}`}
                                 className={`
                                     w-full h-full object-cover
@@ -0,0 +1,36 @@
+import * as React from 'react';
+import { getResponsiveSource } from '../../utils/responsiveImage';
+
+interface ResponsiveImageProps extends Omit<React.ImgHTMLAttributes<HTMLImageElement>, 'src' | 'srcSet'> {
+    /** Original asset URL, e.g. '/assets/images/Aries Palace.jpg' */
+    src: string;
+    /** Rendered width hint for the browser, e.g. '(min-width: 768px) 200px, 50vw' */
+    sizes: string;
+}
+
+/**
+ * <img> that picks a WebP (or JPEG) derivative sized for the layout instead of
+ * the full original, reserving its aspect ratio and showing a blurred
+ * placeholder until it loads.
+ */
+export function ResponsiveImage({ src, sizes, style, ...props }: ResponsiveImageProps) {
+    const source = getResponsiveSource(src);
+    const placeholderStyle = source.placeholder
+        ? { backgroundImage: `url(${source.placeholder})`, backgroundSize: 'cover', ...style }
+        : style;
+
+    return (
+        <picture className="contents">
+            {source.webpSrcSet && <source type="image/webp" srcSet={source.webpSrcSet} sizes={sizes} />}
+            <img
+                {...props}
+                src={source.src}
+                srcSet={source.srcSet}
+                sizes={source.srcSet ? sizes : undefined}
+                width={source.width}
+                height={source.height}
+                style={placeholderStyle}
+            />
+        </picture>
+    );
+}
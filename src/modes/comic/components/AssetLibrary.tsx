@@ -1,6 +1,7 @@
 import React from 'react';
 import { useComicStore } from '../../../stores/comicStore';
 import { generatePrompt } from '../utils/promptMiddleware';
+import { ResponsiveImage } from '../../../components/ui/ResponsiveImage';
 
 const ASSETS = [
     '/assets/images/Anunnaki Anubis.png',
@@ -162,8 +163,9 @@ export const AssetLibrary: React.FC<AssetLibraryProps> = ({ isOpen, onClose, emb
                         className="w-full rounded-lg overflow-hidden border border-white/10 hover:border-gold-500/50 hover:shadow-[0_0_15px_rgba(212,175,55,0.2)] transition-all group relative break-inside-avoid bg-black/20"
                         onClick={() => handleAssetClick(asset)}
                     >
-                        <img
+                        <ResponsiveImage
                             src={asset}
+                            sizes="(min-width: 768px) 200px, 50vw"
                             alt={asset.split('/').pop()}
                             loading="lazy"
                             draggable={false}
@@ -0,0 +1,77 @@
+// Decoder for the packed callout geometry written by `generate_registry.py --output-mode packed`.
+// Layout (little-endian), see callouts/packed.py:
+//   'CLG1' | u8 format | 3 reserved | u32 opCount | u32 coordCount | f32 scale
+//   | u8 ops[opCount] | pad to 4 | f32|i16 coords[coordCount]
+
+const MAGIC = 'CLG1';
+const HEADER_SIZE = 20;
+const FORMAT_I16 = 1;
+
+const COMMANDS = ['M', 'L', 'C', 'Q', 'Z'];
+const ARG_COUNTS = [2, 2, 6, 4, 0];
+
+// Coordinates are origin-anchored callout units (hundreds to thousands wide),
+// so two decimals is far below anything visible.
+const formatNumber = (value: number) => String(Math.round(value * 100) / 100);
+
+export function decodeCalloutGeometry(buffer: ArrayBuffer): string {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3));
+    if (magic !== MAGIC) {
+        throw new Error('Not a packed callout geometry buffer');
+    }
+
+    const format = view.getUint8(4);
+    const opCount = view.getUint32(8, true);
+    const coordCount = view.getUint32(12, true);
+    const scale = view.getFloat32(16, true);
+
+    const ops = new Uint8Array(buffer, HEADER_SIZE, opCount);
+    let offset = HEADER_SIZE + opCount;
+    offset += (4 - (offset % 4)) % 4;
+
+    // Typed array views assume host byte order; every platform we ship to is little-endian.
+    const coords = format === FORMAT_I16
+        ? new Int16Array(buffer, offset, coordCount)
+        : new Float32Array(buffer, offset, coordCount);
+    const factor = format === FORMAT_I16 ? scale : 1;
+
+    const parts: string[] = [];
+    let pos = 0;
+    for (let i = 0; i < ops.length; i++) {
+        const op = ops[i];
+        const numbers: string[] = [];
+        for (let n = 0; n < ARG_COUNTS[op]; n++) {
+            numbers.push(formatNumber(coords[pos++] * factor));
+        }
+        parts.push(numbers.length ? `${COMMANDS[op]}${numbers.join(' ')}` : COMMANDS[op]);
+    }
+    return parts.join(' ');
+}
+
+const pending = new Map<string, Promise<string>>();
+
+/**
+ * Resolves a callout's SVG path data. Hand-drawn entries carry it inline;
+ * imported ones are fetched and decoded the first time they are placed,
+ * then served from memory.
+ */
+export function loadCalloutPath(def: { path?: string; geometry?: string }): Promise<string> {
+    if (def.path !== undefined) return Promise.resolve(def.path);
+    if (!def.geometry) return Promise.reject(new Error('Callout has neither path nor geometry'));
+
+    const url = def.geometry;
+    let request = pending.get(url);
+    if (!request) {
+        request = fetch(url)
+            .then((response) => {
+                if (!response.ok) throw new Error(`Failed to load ${url}: ${response.status}`);
+                return response.arrayBuffer();
+            })
+            .then(decodeCalloutGeometry);
+        // Let a failed fetch be retried on the next placement
+        request.catch(() => pending.delete(url));
+        pending.set(url, request);
+    }
+    return request;
+}
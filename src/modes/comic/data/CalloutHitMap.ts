@@ -0,0 +1,276 @@
+// Decoder and queries for the callout hit maps written by `generate_registry.py --hit-maps`.
+// Layout (little-endian), see callouts/hitmap.py:
+//   'CLH1' | u8 levelCount | 3 reserved | f32 minX, minY, maxX, maxY
+//   | levelCount x (f32 tolerance | u32 ringCount | u32 pointCount | u16 columns | u16 rows
+//                   | f32 cellWidth | f32 cellHeight | u32 entryCount | u32 dataOffset)
+//   then per level: u32 ringEnds[ringCount] | f32 points[pointCount * 2] | u32 cellStarts[cells + 1]
+//   | u16|u32 cellEdges[entryCount] | pad to 4 | i16 winding[cells] | pad to 4
+//
+// All coordinates are in the callout's own path units (the space of its
+// path and viewBox); map canvas points into it before querying.
+
+const MAGIC = 'CLH1';
+const HEADER_SIZE = 24;
+const LEVEL_SIZE = 32;
+const U16_POINTS = 65536;
+// Where each cell's winding number is measured, as fractions of the cell (see REFERENCE in hitmap.py)
+const REFERENCE_X = 0.4973;
+const REFERENCE_Y = 0.5031;
+
+export interface HitMapLevel {
+    // Largest distance between this outline and the path, in callout units
+    tolerance: number;
+    // x, y pairs; edge i runs from point i to point next[i]
+    points: Float32Array;
+    next: Uint32Array;
+    columns: number;
+    rows: number;
+    cellWidth: number;
+    cellHeight: number;
+    // Edges touching cell c are cellEdges[cellStarts[c] .. cellStarts[c + 1]]
+    cellStarts: Uint32Array;
+    cellEdges: Uint16Array | Uint32Array;
+    winding: Int16Array;
+}
+
+export interface CalloutHitMap {
+    minX: number;
+    minY: number;
+    maxX: number;
+    maxY: number;
+    // Coarsest first
+    levels: HitMapLevel[];
+}
+
+export interface NearestEdge {
+    distance: number;
+    // Closest point on the outline
+    x: number;
+    y: number;
+    edge: number;
+}
+
+export function decodeCalloutHitMap(buffer: ArrayBuffer): CalloutHitMap {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3));
+    if (magic !== MAGIC) {
+        throw new Error('Not a packed callout hit map');
+    }
+
+    const levels: HitMapLevel[] = [];
+    const levelCount = view.getUint8(4);
+    for (let n = 0; n < levelCount; n++) {
+        const entry = HEADER_SIZE + n * LEVEL_SIZE;
+        const ringCount = view.getUint32(entry + 4, true);
+        const pointCount = view.getUint32(entry + 8, true);
+        const columns = view.getUint16(entry + 12, true);
+        const rows = view.getUint16(entry + 14, true);
+        const entryCount = view.getUint32(entry + 24, true);
+        let offset = view.getUint32(entry + 28, true);
+        const cells = columns * rows;
+
+        // Typed array views assume host byte order; every platform we ship to is little-endian.
+        const ringEnds = new Uint32Array(buffer, offset, ringCount);
+        offset += ringCount * 4;
+        const points = new Float32Array(buffer, offset, pointCount * 2);
+        offset += pointCount * 8;
+        const cellStarts = new Uint32Array(buffer, offset, cells + 1);
+        offset += (cells + 1) * 4;
+        let cellEdges: Uint16Array | Uint32Array;
+        if (pointCount <= U16_POINTS) {
+            cellEdges = new Uint16Array(buffer, offset, entryCount);
+            offset += entryCount * 2;
+            offset += (4 - (offset % 4)) % 4;
+        } else {
+            cellEdges = new Uint32Array(buffer, offset, entryCount);
+            offset += entryCount * 4;
+        }
+        const winding = new Int16Array(buffer, offset, cells);
+
+        // Successor of every point within its ring, so queries need no ring lookup
+        const next = new Uint32Array(pointCount);
+        let start = 0;
+        for (let r = 0; r < ringCount; r++) {
+            const end = ringEnds[r];
+            for (let i = start; i < end - 1; i++) next[i] = i + 1;
+            if (end > start) next[end - 1] = start;
+            start = end;
+        }
+
+        levels.push({
+            tolerance: view.getFloat32(entry, true),
+            points,
+            next,
+            columns,
+            rows,
+            cellWidth: view.getFloat32(entry + 16, true),
+            cellHeight: view.getFloat32(entry + 20, true),
+            cellStarts,
+            cellEdges,
+            winding,
+        });
+    }
+
+    return {
+        minX: view.getFloat32(8, true),
+        minY: view.getFloat32(12, true),
+        maxX: view.getFloat32(16, true),
+        maxY: view.getFloat32(20, true),
+        levels,
+    };
+}
+
+/**
+ * The coarsest level whose outline is within `tolerance` callout units of
+ * the path, or the finest level if none is. Pass the size of a screen pixel
+ * in callout units to get an outline that is exact on screen.
+ */
+export function pickLevel(map: CalloutHitMap, tolerance = 0): HitMapLevel {
+    for (const level of map.levels) {
+        if (level.tolerance <= tolerance) return level;
+    }
+    return map.levels[map.levels.length - 1];
+}
+
+/**
+ * Winding number of (x, y): the reference point's, stored per cell, plus a
+ * signed crossing for every edge of the cell between it and (x, y).
+ */
+export function windingNumber(map: CalloutHitMap, level: HitMapLevel, x: number, y: number): number {
+    const cx = Math.floor((x - map.minX) / level.cellWidth);
+    const cy = Math.floor((y - map.minY) / level.cellHeight);
+    if (cx < 0 || cy < 0 || cx >= level.columns || cy >= level.rows) return 0;
+
+    const cell = cy * level.columns + cx;
+    const ox = map.minX + (cx + REFERENCE_X) * level.cellWidth;
+    const oy = map.minY + (cy + REFERENCE_Y) * level.cellHeight;
+    const rx = x - ox;
+    const ry = y - oy;
+    const { points, next, cellEdges } = level;
+    let winding = level.winding[cell];
+    for (let k = level.cellStarts[cell]; k < level.cellStarts[cell + 1]; k++) {
+        const a = cellEdges[k];
+        const b = next[a];
+        const ax = points[2 * a];
+        const ay = points[2 * a + 1];
+        const sx = points[2 * b] - ax;
+        const sy = points[2 * b + 1] - ay;
+        const denom = rx * sy - ry * sx;
+        if (denom === 0) continue;
+        const qx = ax - ox;
+        const qy = ay - oy;
+        const t = (qx * sy - qy * sx) / denom;
+        const u = (qx * ry - qy * rx) / denom;
+        // Half-open along the edge, so a crossing through a shared vertex counts once
+        if (t >= 0 && t <= 1 && u >= 0 && u < 1) {
+            winding += denom > 0 ? 1 : -1;
+        }
+    }
+    return winding;
+}
+
+/** Point-in-callout test under the SVG fill rule the registry paths are drawn with. */
+export function containsPoint(
+    map: CalloutHitMap,
+    x: number,
+    y: number,
+    tolerance = 0,
+    fillRule: 'nonzero' | 'evenodd' = 'nonzero',
+): boolean {
+    if (x < map.minX || y < map.minY || x > map.maxX || y > map.maxY) return false;
+    const winding = windingNumber(map, pickLevel(map, tolerance), x, y);
+    return fillRule === 'evenodd' ? (winding & 1) !== 0 : winding !== 0;
+}
+
+/**
+ * Closest point on the callout's outline to (x, y), searching rings of
+ * cells outwards from the one containing it until no unsearched cell can
+ * hold anything closer. Returns null if nothing lies within `maxDistance`.
+ */
+export function nearestEdge(
+    map: CalloutHitMap,
+    x: number,
+    y: number,
+    tolerance = 0,
+    maxDistance = Infinity,
+): NearestEdge | null {
+    const level = pickLevel(map, tolerance);
+    const { columns, rows, cellWidth, cellHeight, points, next, cellEdges, cellStarts } = level;
+    const cx = Math.min(columns - 1, Math.max(0, Math.floor((x - map.minX) / cellWidth)));
+    const cy = Math.min(rows - 1, Math.max(0, Math.floor((y - map.minY) / cellHeight)));
+
+    let best: NearestEdge | null = null;
+    let bestSq = maxDistance * maxDistance;
+    const visit = (cell: number) => {
+        for (let k = cellStarts[cell]; k < cellStarts[cell + 1]; k++) {
+            const a = cellEdges[k];
+            const b = next[a];
+            const ax = points[2 * a];
+            const ay = points[2 * a + 1];
+            const dx = points[2 * b] - ax;
+            const dy = points[2 * b + 1] - ay;
+            const lengthSq = dx * dx + dy * dy;
+            const t = lengthSq > 0 ? Math.max(0, Math.min(1, ((x - ax) * dx + (y - ay) * dy) / lengthSq)) : 0;
+            const px = ax + t * dx;
+            const py = ay + t * dy;
+            const distSq = (x - px) * (x - px) + (y - py) * (y - py);
+            if (distSq <= bestSq) {
+                bestSq = distSq;
+                best = { distance: Math.sqrt(distSq), x: px, y: py, edge: a };
+            }
+        }
+    };
+
+    const rings = Math.max(columns, rows);
+    for (let r = 0; r < rings; r++) {
+        for (let row = cy - r; row <= cy + r; row++) {
+            if (row < 0 || row >= rows) continue;
+            // Whole first and last rows of the ring, only the two ends of the rows between
+            const step = row === cy - r || row === cy + r ? 1 : 2 * r;
+            for (let col = cx - r; col <= cx + r; col += step) {
+                if (col >= 0 && col < columns) visit(row * columns + col);
+            }
+        }
+        // Every cell outside the searched square is at least this far away
+        let bound = Infinity;
+        if (cx - r > 0) bound = Math.min(bound, x - (map.minX + (cx - r) * cellWidth));
+        if (cx + r < columns - 1) bound = Math.min(bound, map.minX + (cx + r + 1) * cellWidth - x);
+        if (cy - r > 0) bound = Math.min(bound, y - (map.minY + (cy - r) * cellHeight));
+        if (cy + r < rows - 1) bound = Math.min(bound, map.minY + (cy + r + 1) * cellHeight - y);
+        if (bound * bound >= bestSq) break;
+    }
+    return best;
+}
+
+// A glob rather than a plain import so a checkout without the generated index still builds
+const indexes = import.meta.glob<{ lods: number[]; callouts: Record<string, string> }>('./CalloutHitMaps.json', {
+    eager: true,
+    import: 'default',
+});
+const HIT_MAP_URLS: Record<string, string> = Object.values(indexes)[0]?.callouts ?? {};
+
+const pending = new Map<string, Promise<CalloutHitMap | null>>();
+
+/**
+ * Resolves a callout's hit map, fetched and decoded on first use and then
+ * served from memory. Resolves null for callouts without one (or before
+ * the maps have been generated); callers fall back to the bounding box.
+ */
+export function loadCalloutHitMap(id: string): Promise<CalloutHitMap | null> {
+    const url = HIT_MAP_URLS[id];
+    if (!url) return Promise.resolve(null);
+
+    let request = pending.get(url);
+    if (!request) {
+        request = fetch(url)
+            .then((response) => {
+                if (!response.ok) throw new Error(`Failed to load ${url}: ${response.status}`);
+                return response.arrayBuffer();
+            })
+            .then(decodeCalloutHitMap);
+        // Let a failed fetch be retried on the next query
+        request.catch(() => pending.delete(url));
+        pending.set(url, request);
+    }
+    return request;
+}
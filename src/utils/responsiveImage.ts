@@ -0,0 +1,63 @@
+/**
+ * Responsive variants of the images in public/assets/images, built by
+ * `python3 build_image_assets.py`. The manifest is optional: until it has
+ * been generated, or for images it does not list, callers get the original.
+ */
+
+export interface ImageManifestEntry {
+    width: number;
+    height: number;
+    // Derivative URLs are `${base}-${width}.webp` and `${base}-${width}.jpg`
+    base: string;
+    placeholder: string;
+    widths: number[];
+}
+
+// A glob rather than a plain import so a checkout without the generated file still builds
+const manifests = import.meta.glob<Record<string, ImageManifestEntry>>('../data/ImageManifest.json', {
+    eager: true,
+    import: 'default',
+});
+const MANIFEST: Record<string, ImageManifestEntry> = Object.values(manifests)[0] ?? {};
+
+export interface ResponsiveSource {
+    src: string;
+    srcSet?: string;
+    webpSrcSet?: string;
+    width?: number;
+    height?: number;
+    placeholder?: string;
+}
+
+const srcSet = (entry: ImageManifestEntry, ext: 'webp' | 'jpg') =>
+    entry.widths.map((w) => `${entry.base}-${w}.${ext} ${w}w`).join(', ');
+
+/**
+ * Looks up the derivatives of an original asset URL. `src` falls back to the
+ * widest JPEG so browsers without srcset support still avoid the original.
+ */
+export const getResponsiveSource = (src: string): ResponsiveSource => {
+    const entry = MANIFEST[src];
+    if (!entry) return { src };
+    const widest = entry.widths[entry.widths.length - 1];
+    return {
+        src: `${entry.base}-${widest}.jpg`,
+        srcSet: srcSet(entry, 'jpg'),
+        webpSrcSet: srcSet(entry, 'webp'),
+        width: entry.width,
+        height: entry.height,
+        placeholder: entry.placeholder,
+    };
+};
+
+/**
+ * CSS `background-image` value for an asset shown about `displayWidth` CSS
+ * pixels wide: the narrowest WebP covering it at 2x density.
+ */
+export const getBackgroundImage = (src: string, displayWidth: number): string => {
+    const entry = MANIFEST[src];
+    if (!entry) return `url("${encodeURI(src)}")`;
+    const needed = displayWidth * 2;
+    const width = entry.widths.find((w) => w >= needed) ?? entry.widths[entry.widths.length - 1];
+    return `url("${entry.base}-${width}.webp")`;
+};
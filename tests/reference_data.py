@@ -0,0 +1,40 @@
+import glob
+import os
+
+import pytest
+
+from callouts.bounds import normalize_to_origin
+from callouts.extract import extract_svg
+from callouts.pathdata import parse_path, transform_segments
+
+# The reference callout sources, as pytest parameters for the geometry tests
+
+REFERENCE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'reference', 'Callouts Codes')
+
+
+def _sources():
+    for filepath in sorted(glob.glob(os.path.join(REFERENCE_DIR, '*.md'))):
+        yield os.path.basename(filepath), extract_svg(filepath, stop_at_image=True)
+
+
+def reference_paths():
+    """Every path data string of the reference sources, one parameter each."""
+    return [pytest.param(d, id=f"{name}:{i}")
+            for name, svg in _sources() for i, d in enumerate(svg['paths'])]
+
+
+def reference_outlines():
+    """
+    Each reference callout as generate_registry.py sees it: every path with
+    its transform baked in, moved to the origin. One parameter per source.
+    """
+    outlines = []
+    for name, svg in _sources():
+        segments = []
+        for d, matrix in zip(svg['paths'], svg['transforms']):
+            segments.extend(transform_segments(parse_path(d), matrix))
+        geometry = normalize_to_origin(segments) if segments else None
+        if geometry is not None:
+            outlines.append(pytest.param(geometry[0], id=name))
+    return outlines
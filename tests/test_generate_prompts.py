@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+
+import pytest
+
+from generate_prompts import (
+    GENRE_FILE, BloomFilter, build_space, compile_prompt, decode, excluded, generate_prompts, hyphenate,
+    load_genres,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LIBRARY = {
+    'tag_library': {
+        'tier_1_global': {
+            'gender': ['Masculine', 'Feminine', 'Androgynous'],
+            'height': ['Short', 'Tall'],
+        },
+        'tier_2_architecture': {},
+        'tier_3_details': {
+            'lips': ['Thin', 'Pouty', 'Bee-stung', 'Full lips'],
+        },
+    },
+}
+GENRES = [
+    {'id': 'noir', 'aiBias': 'high contrast, film grain'},
+    {'id': 'solarpunk', 'aiBias': ''},
+]
+
+
+def digest(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+# Mirrors src/utils/PromptCompiler.test.ts
+
+def test_hyphenate():
+    assert hyphenate('warm brown eyes') == 'warm-brown-eyes'
+    assert hyphenate('  dark   blue  ') == 'dark-blue'
+    assert hyphenate('single') == 'single'
+
+
+def test_compile_prompt():
+    chips = [('photo-realistic', 'positive'), ('painting', 'neutral'), ('4k', 'positive')]
+    assert compile_prompt(chips, 'cinematic lighting, sharp focus') == \
+        'photo-realistic, 4k, cinematic-lighting, sharp-focus'
+
+
+def test_compile_prompt_empty():
+    assert compile_prompt([], '') == ''
+
+
+def test_build_space_axes():
+    space = build_space(LIBRARY, GENRES)
+    assert [name for name, _ in space['axes']] == ['genre', 'gender', 'height', 'lips']
+    assert space['radices'] == [2, 3, 2, 4]
+    assert space['total'] == 48
+    assert space['chips'][3][3] == ('full-lips', 'positive')
+
+
+def test_decode_round_trip():
+    space = build_space(LIBRARY, GENRES)
+    seen = set()
+    for index in range(space['total']):
+        choice = decode(space, index)
+        # Mixed radix, last axis fastest
+        rebuilt = 0
+        for value, radix in zip(choice, space['radices']):
+            assert 0 <= value < radix
+            rebuilt = rebuilt * radix + value
+        assert rebuilt == index
+        seen.add(tuple(choice))
+    assert len(seen) == space['total']
+    assert decode(space, 1) == [0, 0, 0, 1]
+    assert decode(space, space['total'] - 1) == [1, 2, 1, 3]
+
+
+def test_excluded():
+    space = build_space(LIBRARY, GENRES, {
+        'exclude': [{'gender': 'Masculine', 'lips': ['Pouty', 'Bee-stung']}],
+    })
+    assert space['exclude'] == [[(1, {0}), (3, {1, 2})]]
+    assert excluded(space, [0, 0, 0, 1])
+    assert excluded(space, [1, 0, 1, 2])
+    assert not excluded(space, [0, 0, 0, 0])
+    assert not excluded(space, [0, 1, 0, 1])
+
+
+def test_exclude_unknown_value():
+    with pytest.raises(ValueError, match="Pouty lips"):
+        build_space(LIBRARY, GENRES, {'exclude': [{'lips': ['Pouty lips']}]})
+
+
+def test_exclude_unknown_axis():
+    with pytest.raises(ValueError, match="nose"):
+        build_space(LIBRARY, GENRES, {'exclude': [{'nose': 'Small'}]})
+
+
+def test_values_as_string():
+    # A bare string is one value, not a substring test ("Full lips" contains "lips")
+    space = build_space(LIBRARY, GENRES, {'values': {'lips': 'Full lips'}, 'categories': 'lips'})
+    assert space['axes'][1:] == [('lips', ['Full lips'])]
+    with pytest.raises(ValueError, match="No values left"):
+        build_space(LIBRARY, GENRES, {'values': {'lips': 'lips'}})
+
+
+def test_unknown_category():
+    with pytest.raises(ValueError, match="Unknown categories: nope"):
+        build_space(LIBRARY, GENRES, {'categories': ['nope']})
+
+
+def test_bloom_filter_add():
+    seen = BloomFilter(1000)
+    assert seen.add(digest('a'))
+    assert not seen.add(digest('a'))
+    assert seen.add(digest('b'))
+    assert seen.count == 2
+    added = sum(seen.add(digest(str(i))) for i in range(1000))
+    # Sized for 1000 at a 1e-4 false positive rate
+    assert added >= 998
+    assert all(not seen.add(digest(str(i))) for i in range(1000))
+
+
+def test_load_genres_merges_both_lists():
+    path = os.path.join(ROOT, GENRE_FILE)
+    with open(path, 'r', encoding='utf-8') as f:
+        assert f.read().count('"genres"') == 2
+    genres = load_genres(path)
+    ids = [g['id'] for g in genres]
+    assert len(ids) == len(set(ids))
+    assert ids[0] == 'afro-futurism'
+    # The second list's genres come after the first list's
+    assert 'noir-romance' in ids
+
+
+def test_load_genres_keeps_first_of_repeated_id(tmp_path):
+    path = tmp_path / 'genres.json'
+    path.write_text('{"genres": [{"id": "a", "name": "A"}, {"id": "b"}]}\n'
+                    '{"genres": [{"id": "a", "name": "Again"}, {"id": "c"}]}\n', encoding='utf-8')
+    genres = load_genres(str(path))
+    assert [g['id'] for g in genres] == ['a', 'b', 'c']
+    assert genres[0]['name'] == 'A'
+
+
+@pytest.mark.parametrize('mode, count', [('product', None), ('sample', 30)])
+def test_jobs_do_not_change_output(tmp_path, mode, count):
+    library = tmp_path / 'library.json'
+    library.write_text(json.dumps(LIBRARY), encoding='utf-8')
+    genres = tmp_path / 'genres.json'
+    genres.write_text(json.dumps({'genres': GENRES}), encoding='utf-8')
+    outputs = []
+    for jobs in (1, 2):
+        output = tmp_path / f'prompts-{jobs}.jsonl'
+        written = generate_prompts(mode=mode, count=count, seed='7', output_file=str(output),
+                                   library_file=str(library), genre_file=str(genres), jobs=jobs, chunk_size=5)
+        outputs.append(output.read_text(encoding='utf-8'))
+        assert written == len(outputs[-1].splitlines())
+    assert outputs[0] == outputs[1]
+    if mode == 'product':
+        assert [json.loads(line)['index'] for line in outputs[0].splitlines()] == list(range(48))
+
+
+def test_product_mode_drops_neutral_duplicates(tmp_path):
+    # Heights that are both neutral leave the same prompt for either one
+    library = tmp_path / 'library.json'
+    library.write_text(json.dumps(LIBRARY), encoding='utf-8')
+    genres = tmp_path / 'genres.json'
+    genres.write_text(json.dumps({'genres': GENRES}), encoding='utf-8')
+    constraints = {'polarity': {'height:Short': 'neutral', 'height:Tall': 'neutral'}}
+    output = tmp_path / 'prompts.jsonl'
+    written = generate_prompts(constraints=constraints, output_file=str(output), library_file=str(library),
+                               genre_file=str(genres))
+    prompts = [json.loads(line)['prompt'] for line in output.read_text(encoding='utf-8').splitlines()]
+    assert written == len(prompts) == len(set(prompts)) == 24
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from callouts.hitmap import (
+    HEADER, LOD_TOLERANCES, MAGIC, REFERENCE, build_hitmap, pack_hitmap, unpack_hitmap,
+)
+from callouts.polylines import winding_numbers
+from reference_data import reference_outlines
+
+REFERENCE_OUTLINES = reference_outlines()
+
+# Two squares drawn the same way round (clockwise on screen, y down): winding
+# -1 between them and -2 inside the inner one
+NESTED = [('M', [0.0, 0.0]), ('L', [10.0, 0.0]), ('L', [10.0, 10.0]), ('L', [0.0, 10.0]), ('Z', []),
+          ('M', [3.0, 3.0]), ('L', [7.0, 3.0]), ('L', [7.0, 7.0]), ('L', [3.0, 7.0]), ('Z', [])]
+
+
+def rings_of(lod):
+    """The closed polylines of an unpacked LOD."""
+    starts = np.concatenate([[0], lod['ring_ends'][:-1]]).astype(np.int64)
+    return [lod['points'][start:end].astype(float) for start, end in zip(starts, lod['ring_ends'])]
+
+
+def reference_points(hitmap, lod):
+    """(rows, columns, 2) reference point of every cell, in callout units."""
+    min_x, min_y = hitmap['bounds'][:2]
+    cell_width, cell_height = lod['cell_size']
+    cols, rows = np.meshgrid(np.arange(lod['columns']), np.arange(lod['rows']))
+    return np.stack([min_x + (cols + REFERENCE[0]) * cell_width, min_y + (rows + REFERENCE[1]) * cell_height], -1)
+
+
+def brute_force_winding(rings, points):
+    """
+    Winding number of each point, from every edge of every ring: an edge
+    that crosses the point's horizontal line to its left counts +1 going
+    down (increasing y) and -1 going up, as in winding_numbers().
+    """
+    px, py = points[:, 0, None], points[:, 1, None]
+    starts = np.concatenate(rings)
+    ends = np.concatenate([np.roll(ring, -1, axis=0) for ring in rings])
+    x0, y0, x1, y1 = starts[:, 0], starts[:, 1], ends[:, 0], ends[:, 1]
+    spans = (np.minimum(y0, y1) <= py) & (py < np.maximum(y0, y1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        xs = x0 + (py - y0) / (y1 - y0) * (x1 - x0)
+    left = spans & (xs < px)
+    return np.where(left, np.where(y1 > y0, 1, -1), 0).sum(axis=1)
+
+
+def check_windings(data):
+    hitmap = unpack_hitmap(data)
+    assert len(hitmap['lods']) == len(LOD_TOLERANCES)
+    for lod in hitmap['lods']:
+        rings = rings_of(lod)
+        points = reference_points(hitmap, lod).reshape(-1, 2)
+        expected = brute_force_winding(rings, points)
+        assert np.array_equal(lod['winding'], expected)
+
+        # winding_numbers() on the same rings, shifted so its sample points
+        # (col + 0.5, row + 0.5) are the cells' reference points
+        shift = (0.5 - REFERENCE[0], 0.5 - REFERENCE[1])
+        scaled = [(ring - hitmap['bounds'][:2]) / lod['cell_size'] + shift for ring in rings]
+        assert np.array_equal(winding_numbers(scaled, lod['columns'], lod['rows']).ravel(), expected)
+    return hitmap
+
+
+def test_layout_round_trip():
+    built = build_hitmap(NESTED)
+    data = pack_hitmap(built)
+    assert HEADER.unpack_from(data)[:2] == (MAGIC, len(LOD_TOLERANCES))
+    assert len(data) % 4 == 0
+    hitmap = unpack_hitmap(data)
+    assert hitmap['bounds'] == built['bounds']
+    for got, want in zip(hitmap['lods'], built['lods']):
+        assert got['tolerance'] == pytest.approx(want['tolerance'], rel=1e-6)
+        assert (got['columns'], got['rows']) == (want['columns'], want['rows'])
+        assert got['cell_size'] == want['cell_size']
+        for key in ('ring_ends', 'points', 'cell_starts', 'cell_edges', 'winding'):
+            assert np.array_equal(got[key], want[key]), key
+
+
+def test_nested_winding():
+    hitmap = check_windings(pack_hitmap(build_hitmap(NESTED)))
+    # Every reference point lies inside the outer square
+    for lod in hitmap['lods']:
+        assert set(lod['winding'].tolist()) <= {-1, -2}
+
+
+def test_rejects_foreign_data():
+    with pytest.raises(ValueError):
+        unpack_hitmap(b'XXXX' + pack_hitmap(build_hitmap(NESTED))[4:])
+
+
+@pytest.mark.parametrize('segments', REFERENCE_OUTLINES)
+def test_reference_winding(segments):
+    check_windings(pack_hitmap(build_hitmap(segments)))
@@ -0,0 +1,60 @@
+import struct
+
+import numpy as np
+import pytest
+
+from callouts.packed import HEADER, I16_MAX, MAGIC, OPCODES, pack_geometry, unpack_geometry
+from reference_data import reference_outlines
+
+REFERENCE_OUTLINES = reference_outlines()
+
+SMALL = [('M', [0.0, 0.0]), ('L', [10.5, 0.0]), ('Q', [12.0, 1.0, 12.0, 4.0]),
+         ('C', [12.0, 8.0, 4.0, 9.0, -1.25, 6.0]), ('Z', [])]
+
+
+def assert_close(actual, expected, tolerance):
+    assert [cmd for cmd, _ in actual] == [cmd for cmd, _ in expected]
+    for (_, got), (_, want) in zip(actual, expected):
+        assert np.max(np.abs(np.array(got) - np.array(want)), initial=0.0) <= tolerance
+
+
+def test_layout():
+    data = pack_geometry(SMALL, 'i16')
+    magic, fmt, op_count, coord_count, scale = HEADER.unpack_from(data)
+    assert (magic, fmt, op_count, coord_count) == (MAGIC, 1, 5, 14)
+    assert scale == pytest.approx(12.0 / I16_MAX)
+    assert list(data[HEADER.size:HEADER.size + op_count]) == [OPCODES[cmd] for cmd, _ in SMALL]
+    # Opcodes are padded so the coordinates start on a 4-byte boundary
+    body = HEADER.size + op_count + 3
+    assert data[HEADER.size + op_count:body] == b'\0' * 3
+    assert len(data) == body + 2 * coord_count
+    assert struct.unpack_from('<h', data, body + 4)[0] == round(10.5 / scale)
+
+    data = pack_geometry(SMALL, 'f32')
+    assert HEADER.unpack_from(data)[1:] == (0, 5, 14, 1.0)
+    assert len(data) == body + 4 * 14
+
+
+def test_round_trip_small():
+    assert unpack_geometry(pack_geometry(SMALL, 'f32')) == SMALL
+    scale = HEADER.unpack_from(pack_geometry(SMALL, 'i16'))[4]
+    assert_close(unpack_geometry(pack_geometry(SMALL, 'i16')), SMALL, scale / 2 + 1e-12)
+
+
+def test_rejects_arcs_and_foreign_data():
+    with pytest.raises(ValueError):
+        pack_geometry([('M', [0.0, 0.0]), ('A', [5.0, 5.0, 0.0, 0.0, 1.0, 5.0, 5.0])])
+    with pytest.raises(ValueError):
+        unpack_geometry(b'XXXX' + pack_geometry(SMALL)[4:])
+
+
+@pytest.mark.parametrize('segments', REFERENCE_OUTLINES)
+def test_reference_round_trip(segments):
+    largest = max(abs(v) for _, args in segments for v in args)
+    # f32 keeps about 7 significant digits
+    assert_close(unpack_geometry(pack_geometry(segments, 'f32')), segments, largest * 1e-7)
+    # i16 rounds to the nearest step of the shape's largest |coordinate| / 32767
+    data = pack_geometry(segments, 'i16')
+    scale = HEADER.unpack_from(data)[4]
+    assert scale == pytest.approx(largest / I16_MAX, rel=1e-6)
+    assert_close(unpack_geometry(data), segments, scale / 2 * (1 + 1e-6))
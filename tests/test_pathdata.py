@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+
+from callouts.pathdata import (
+    PathSyntaxError, expand_arcs, optimize_segments, parse_path, precision_for, quantize, serialize,
+)
+from callouts.polylines import flatten
+from reference_data import reference_paths
+
+REFERENCE_PATHS = reference_paths()
+
+
+def assert_same_geometry(actual, expected, tolerance=1e-9):
+    assert [cmd for cmd, _ in actual] == [cmd for cmd, _ in expected]
+    for (_, got), (_, want) in zip(actual, expected):
+        assert got == pytest.approx(want, abs=tolerance)
+
+
+def segment_distances(points, polyline):
+    """Distance from each of `points` to the closed `polyline`."""
+    starts = polyline
+    edges = np.roll(polyline, -1, axis=0) - starts
+    lengths = np.maximum((edges * edges).sum(axis=1), 1e-300)
+    best = np.full(len(points), np.inf)
+    for i in range(0, len(points), 256):
+        p = points[i:i + 256, None, :]
+        t = np.clip(((p - starts) * edges).sum(axis=2) / lengths, 0.0, 1.0)
+        nearest = starts + t[..., None] * edges
+        best[i:i + 256] = np.hypot(*np.moveaxis(nearest - p, -1, 0)).min(axis=1)
+    return best
+
+
+def test_reference_sources_have_paths():
+    names = {param.id.split(':')[0] for param in REFERENCE_PATHS}
+    # 13.md is the potrace export written with relative commands
+    assert '13.md' in names
+    assert len(REFERENCE_PATHS) >= 30
+
+
+def test_relative_commands():
+    segments = parse_path("m10 20 l5 5 h10 v-5 c1 2 3 4 5 6 s1 1 2 2 q1 1 2 0 t2 0 z")
+    assert segments == [
+        ('M', [10.0, 20.0]),
+        ('L', [15.0, 25.0]),
+        ('L', [25.0, 25.0]),
+        ('L', [25.0, 20.0]),
+        ('C', [26.0, 22.0, 28.0, 24.0, 30.0, 26.0]),
+        # S reflects the previous second control point about the current point
+        ('C', [32.0, 28.0, 31.0, 27.0, 32.0, 28.0]),
+        ('Q', [33.0, 29.0, 34.0, 28.0]),
+        ('Q', [35.0, 27.0, 36.0, 28.0]),
+        ('Z', []),
+    ]
+
+
+def test_potrace_relative_path():
+    segments = parse_path("M6435 17063 c-114 -4 -220 -11 -235 -16 l10 20 z m5 5 10 10")
+    assert segments[1] == ('C', [6321.0, 17059.0, 6215.0, 17052.0, 6200.0, 17047.0])
+    assert segments[2] == ('L', [6210.0, 17067.0])
+    # After Z the pen is back at the subpath start; extra pairs after m are lineto
+    assert segments[4] == ('M', [6440.0, 17068.0])
+    assert segments[5] == ('L', [6450.0, 17078.0])
+
+
+@pytest.mark.parametrize('d, large_arc, sweep', [
+    ("M0 0a10 10 0 0110 10", 0.0, 1.0),
+    ("M0 0 a10,10 0 0,1 10,10", 0.0, 1.0),
+    ("M0 0a10 10 0 1010 10", 1.0, 0.0),
+    ("M0 0a10 10 0 1 1 10 10", 1.0, 1.0),
+])
+def test_packed_arc_flags(d, large_arc, sweep):
+    segments = parse_path(d)
+    assert segments[1] == ('A', [10.0, 10.0, 0.0, large_arc, sweep, 10.0, 10.0])
+    assert parse_path(serialize(segments, 3)) == segments
+
+
+def test_arc_flags_must_be_binary():
+    with pytest.raises(PathSyntaxError):
+        parse_path("M0 0a10 10 0 2 1 10 10")
+
+
+@pytest.mark.parametrize('d', REFERENCE_PATHS)
+def test_reference_round_trip(d):
+    segments = parse_path(d)
+    assert_same_geometry(parse_path(serialize(segments, 6)), segments, 1e-6)
+
+
+@pytest.mark.parametrize('d', REFERENCE_PATHS)
+def test_quantized_round_trip(d):
+    for precision in (0, 2):
+        quantized = quantize(parse_path(d), precision)
+        assert_same_geometry(parse_path(serialize(quantized, precision)), quantized, 1e-6)
+
+
+@pytest.mark.parametrize('d', REFERENCE_PATHS)
+def test_sampled_deviation_within_reported(d):
+    segments = expand_arcs(parse_path(d))
+    path, stats = optimize_segments(segments, 0.001)
+    assert stats['max_deviation'] <= stats['tolerance'] * (1 + 1e-9)
+
+    # Compare both outlines flattened far more finely than the tolerance
+    flatness = stats['tolerance'] * 1e-3
+    before = flatten(segments, flatness=flatness)
+    after = flatten(parse_path(path), flatness=flatness)
+    assert len(after) == len(before)
+    for original, simplified in zip(before, after):
+        worst = max(segment_distances(original, simplified).max(),
+                    segment_distances(simplified, original).max())
+        assert worst <= stats['max_deviation'] + 1e-9
+
+
+def test_precision_for():
+    assert precision_for(0.5) == 1
+    assert precision_for(0.05) == 2
+    assert precision_for(3.0) == 0
+    assert precision_for(0) == 3